@@ -6,17 +6,25 @@ import shutil
 import threading
 import subprocess
 import configparser
+import unicodedata
 import textwrap
 import urllib.request
 import zipfile
 from io import BytesIO
 from pathlib import Path
 import concurrent.futures
+import queue
+import heapq
 import sqlite3
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, deque, namedtuple
 from functools import lru_cache
+from fractions import Fraction
 import weakref
 import hashlib
+import zlib
+import base64
+import struct
+import time
 from datetime import datetime
 
 # Encoding-Fix für Umlaute
@@ -31,17 +39,33 @@ except ImportError:
     matplotlib_available = False
     print("Matplotlib nicht verfügbar - Diagramm-Features deaktiviert")
 
+# Watchdog optional (Live-Überwachung) - sonst Polling über Verzeichnis-mtimes
+try:
+    from watchdog.observers import Observer
+    watchdog_available = True
+except ImportError:
+    watchdog_available = False
+    print("Watchdog nicht verfügbar - Live-Überwachung nur per Polling")
+
 # Extern
 from PIL import Image, ImageTk
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, APIC
+from mutagen.mp3 import MP3, MPEGInfo
+from mutagen.id3 import ID3, APIC, TCON
+import mutagen
+from mutagen.flac import FLAC, Picture
+from mutagen.mp4 import MP4
+from mutagen.aac import AAC
+from mutagen.oggvorbis import OggVorbis
+from mutagen.oggopus import OggOpus
+from mutagen.oggflac import OggFLAC
+from mutagen.wave import WAVE
 import winsound
 import pyttsx3
 from ttkthemes import ThemedStyle
 
 # Tkinter
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, simpledialog
 import tkinter.font as tkFont
 import tkinter.ttk as ttk
 
@@ -177,6 +201,8 @@ actors_var = tk.BooleanVar()
 comment_var = tk.BooleanVar()
 album_search_var = tk.BooleanVar()
 interpret_search_var = tk.BooleanVar()
+live_watch_var = tk.BooleanVar()
+fuzzy_search_var = tk.BooleanVar()
 
 # Checkbox-Referenzen initialisieren
 title_checkbox = None
@@ -453,9 +479,7 @@ def normalize_all_genres_in_database():
     Zeigt Vorschau und fragt nach Bestätigung
     """
     try:
-        # KRITISCH: Verbindung im Haupt-Thread erstellen
-        conn = sqlite3.connect('media_index.db')
-        cursor = conn.cursor()
+        cursor = get_read_connection().cursor()
         
         # Sammle alle Genres und ihre Häufigkeit
         cursor.execute("""
@@ -470,7 +494,6 @@ def normalize_all_genres_in_database():
         
         if not all_genres:
             messagebox.showinfo("Keine Genres", "Keine Genres in der Datenbank gefunden.")
-            conn.close()
             return
         
         # Analysiere was geändert werden würde
@@ -490,9 +513,6 @@ def normalize_all_genres_in_database():
             else:
                 unchanged_count += count
         
-        # WICHTIG: Schließe Connection vor GUI-Operationen
-        conn.close()
-        
         # Erstelle Vorschau (identisch wie vorher)
         preview_text = "GENRE-NORMALISIERUNG VORSCHAU\n"
         preview_text += "="*60 + "\n\n"
@@ -568,39 +588,39 @@ def normalize_all_genres_in_database():
                 status_label = tk.Label(progress, text="Bitte warten...")
                 status_label.pack(pady=10)
                 
-                def do_normalization():
-                    """KRITISCH: Neue Connection im Worker-Thread erstellen!"""
+                def write_normalization(writer_conn):
+                    """Läuft im DB-Writer - alle Änderungen in einer Transaktion"""
                     updated_count = 0
+                    thread_cursor = writer_conn.cursor()
                     
-                    try:
-                        # NEU: Connection im WORKER-Thread erstellen
-                        thread_conn = sqlite3.connect('media_index.db', timeout=30.0)
-                        thread_cursor = thread_conn.cursor()
+                    # Durchlaufe alle Änderungen
+                    for normalized, variants in changes.items():
+                        old_genres = [v[0] for v in variants]
+                        placeholders = ','.join('?' * len(old_genres))
                         
-                        # Durchlaufe alle Änderungen
-                        for normalized, variants in changes.items():
-                            old_genres = [v[0] for v in variants]
-                            placeholders = ','.join('?' * len(old_genres))
-                            
+                        thread_cursor.execute(
+                            f"UPDATE media_files SET genre = ? WHERE genre IN ({placeholders})",
+                            [normalized] + old_genres
+                        )
+                        updated_count += thread_cursor.rowcount
+                    
+                    # Entferne unspezifische Genres
+                    if removed_count > 0:
+                        # Sammle zu entfernende Genres (aus Haupt-Thread-Daten)
+                        remove_genres = [g for g, _ in all_genres if normalize_genre(g) is None]
+                        if remove_genres:
+                            placeholders = ','.join('?' * len(remove_genres))
                             thread_cursor.execute(
-                                f"UPDATE media_files SET genre = ? WHERE genre IN ({placeholders})",
-                                [normalized] + old_genres
+                                f"UPDATE media_files SET genre = '' WHERE genre IN ({placeholders})",
+                                remove_genres
                             )
-                            updated_count += thread_cursor.rowcount
-                        
-                        # Entferne unspezifische Genres
-                        if removed_count > 0:
-                            # Sammle zu entfernende Genres (aus Haupt-Thread-Daten)
-                            remove_genres = [g for g, _ in all_genres if normalize_genre(g) is None]
-                            if remove_genres:
-                                placeholders = ','.join('?' * len(remove_genres))
-                                thread_cursor.execute(
-                                    f"UPDATE media_files SET genre = '' WHERE genre IN ({placeholders})",
-                                    remove_genres
-                                )
-                        
-                        thread_conn.commit()
-                        thread_conn.close()
+                    
+                    return updated_count
+                
+                def do_normalization():
+                    """Wartet im Worker-Thread auf den DB-Writer - die GUI bleibt bedienbar"""
+                    try:
+                        updated_count = db_writer.submit(write_normalization).result()
                         
                         # Zeige Ergebnis (im Haupt-Thread via after)
                         root.after(0, lambda: show_result(updated_count, progress))
@@ -758,16 +778,28 @@ def extract_cover_art(file_path, max_size=(300, 450)):
 
     try:
         if normalized_path.lower().endswith('.mp3'):
-            audio = MP3(normalized_path, ID3=ID3)
-            if audio.tags:
-                for tag in audio.tags.values():
+            try:
+                image_data = read_mp3_cover(normalized_path)
+            except (HeaderParseError, struct.error, IndexError, ValueError):
+                image_data = None
+                audio = MP3(normalized_path, ID3=ID3)
+                for tag in (audio.tags.values() if audio.tags else []):
                     if isinstance(tag, APIC):
                         image_data = tag.data
-                        image = Image.open(BytesIO(image_data))
-                        image.thumbnail(max_size, Image.LANCZOS)
-                        return image
+                        break
+            if image_data:
+                image = Image.open(BytesIO(image_data))
+                image.thumbnail(max_size, Image.LANCZOS)
+                return image
             print(f"Kein Cover gefunden in {normalized_path}")
             return None
+        elif is_audio_file(normalized_path):
+            image_data = read_embedded_audio_cover(normalized_path)
+            if image_data:
+                image = Image.open(BytesIO(image_data))
+                image.thumbnail(max_size, Image.LANCZOS)
+                return image
+            return None
         else:
             probe = ffprobe_file(normalized_path)
             streams = probe.get('streams', [])
@@ -785,10 +817,7 @@ def extract_cover_art(file_path, max_size=(300, 450)):
                     '-map', f'0:{cover_stream_index}', 
                     '-f', 'image2pipe', '-vcodec', 'mjpeg', '-'
                 ]
-                result = subprocess.run(
-                    cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
+                result = run_tool('ffmpeg', cmd, file_path=normalized_path)
                 
                 if result.stdout:
                     image = Image.open(BytesIO(result.stdout))
@@ -966,6 +995,20 @@ def show_tooltip(x_root, y_root, path, widget):
             pass
     
     try:
+        if getattr(widget, 'offline', False):
+            # Laufwerk getrennt: nur Index-Daten, kein Dateizugriff
+            tooltip = Tooltip(widget, f"Datei: {os.path.basename(path)}\n\n⚠ Laufwerk nicht verbunden\n{os.path.dirname(path)}")
+            widget.tooltip = tooltip
+            tooltip.show(x_root, y_root)
+            return
+        if enrichment_service.is_pending(path):
+            # Noch nicht analysiert: Vorrang in der Hintergrund-Analyse statt blockierendem ffprobe
+            enrichment_service.prioritize([path], PRIORITY_HOVER)
+            tooltip = Tooltip(widget, get_pending_metadata_info(path))
+            widget.tooltip = tooltip
+            tooltip.show(x_root, y_root)
+            widget.after(500, lambda: refresh_pending_tooltip(path, widget, tooltip))
+            return
         image = extract_cover_art(path)
         metadata = get_metadata_info(path)
         tooltip = Tooltip(widget, metadata, image=image)
@@ -974,34 +1017,390 @@ def show_tooltip(x_root, y_root, path, widget):
     except Exception as e:
         print(f"Tooltip-Fehler: {e}")
 
+def refresh_pending_tooltip(path, widget, tooltip):
+    """Ersetzt den Platzhalter, sobald die Hintergrund-Analyse die Datei erreicht hat"""
+    try:
+        if getattr(widget, 'tooltip', None) is not tooltip or not tooltip.winfo_exists():
+            return
+        if enrichment_service.is_pending(path):
+            widget.after(500, lambda: refresh_pending_tooltip(path, widget, tooltip))
+            return
+        show_tooltip(widget.winfo_pointerx(), widget.winfo_pointery(), path, widget)
+    except tk.TclError:
+        pass
+
 def bind_tooltip(widget, path):
     widget.bind("<Enter>", lambda event: on_enter(event, path, widget))
     widget.bind("<Leave>", lambda event: on_leave(event, widget))
     widget.bind("<Motion>", lambda event: on_motion(event, path, widget))
 
+# === PERSISTENTER ANALYSE-CACHE ===
+# Rohdaten von ffprobe/mutagen in eigener Datei - überlebt "Erstelle / Reset Datenbank"
+PROBE_CACHE_DB = 'media_cache.db'
+CONTENT_KEY_BLOCK_SIZE = 64 * 1024
+_probe_cache_local = threading.local()
+
+def get_probe_cache_connection():
+    """Eine Cache-Verbindung pro Thread (Scan-Worker laufen parallel)"""
+    conn = getattr(_probe_cache_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(PROBE_CACHE_DB, timeout=30.0)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # Reiner Cache - kein fsync pro Commit nötig
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS probe_cache (
+                content_key TEXT,
+                kind TEXT,
+                payload BLOB,
+                created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (content_key, kind)
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS probe_cache_paths (
+                filepath TEXT PRIMARY KEY,
+                file_size INTEGER,
+                file_mtime REAL,
+                content_key TEXT
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS quarantine (
+                filepath TEXT PRIMARY KEY,
+                file_hash TEXT,
+                failures INTEGER,
+                tool TEXT,
+                last_error TEXT,
+                last_failure TIMESTAMP
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS dir_snapshots (
+                directory TEXT PRIMARY KEY,
+                dir_mtime REAL,
+                taken REAL,
+                entries BLOB
+            )
+        ''')
+        conn.commit()
+        _probe_cache_local.conn = conn
+    return conn
+
+def compute_content_key(file_path, file_size):
+    """Inhalts-Fingerprint: Größe + SHA1 über ersten und letzten Block (liest max. 128 KB)"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(CONTENT_KEY_BLOCK_SIZE))
+        if file_size > CONTENT_KEY_BLOCK_SIZE:
+            f.seek(max(CONTENT_KEY_BLOCK_SIZE, file_size - CONTENT_KEY_BLOCK_SIZE))
+            digest.update(f.read(CONTENT_KEY_BLOCK_SIZE))
+    return f"{file_size}-{digest.hexdigest()}"
+
+def get_content_key(file_path):
+    """
+    Liefert den Inhalts-Fingerprint einer Datei
+
+    Schneller Weg über (Pfad, Größe, mtime) - nur bei unbekannten oder
+    geänderten Dateien werden die Blöcke tatsächlich gelesen.
+    """
+    try:
+        stat = os.stat(file_path)
+        conn = get_probe_cache_connection()
+        row = conn.execute(
+            "SELECT file_size, file_mtime, content_key FROM probe_cache_paths WHERE filepath = ?",
+            (file_path,)
+        ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            return row[2]
+
+        content_key = compute_content_key(file_path, stat.st_size)
+        conn.execute(
+            "INSERT OR REPLACE INTO probe_cache_paths (filepath, file_size, file_mtime, content_key) VALUES (?, ?, ?, ?)",
+            (file_path, stat.st_size, stat.st_mtime, content_key)
+        )
+        conn.commit()
+        return content_key
+    except (OSError, sqlite3.Error) as e:
+        print(f"Cache-Schlüssel Fehler für {file_path}: {e}")
+        return None
+
+def probe_cache_load(content_key, kind):
+    try:
+        row = get_probe_cache_connection().execute(
+            "SELECT payload FROM probe_cache WHERE content_key = ? AND kind = ?",
+            (content_key, kind)
+        ).fetchone()
+        if row:
+            return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+    except (sqlite3.Error, zlib.error, ValueError) as e:
+        print(f"Cache-Lesefehler ({kind}): {e}")
+    return None
+
+def probe_cache_store(content_key, kind, payload):
+    try:
+        conn = get_probe_cache_connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO probe_cache (content_key, kind, payload) VALUES (?, ?, ?)",
+            (content_key, kind, zlib.compress(json.dumps(payload).encode('utf-8')))
+        )
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"Cache-Schreibfehler ({kind}): {e}")
+
+def cached_probe(file_path, kind, producer, store_if=bool):
+    """
+    Liefert ein Analyse-Ergebnis aus dem Cache oder erzeugt es über producer()
+
+    Nur Ergebnisse, für die store_if() True liefert, werden gespeichert -
+    Fehler-Ergebnisse sollen beim nächsten Mal erneut versucht werden.
+    """
+    content_key = get_content_key(file_path)
+    if content_key:
+        cached = probe_cache_load(content_key, kind)
+        if cached is not None:
+            return cached
+
+    result = producer()
+    if content_key and store_if(result):
+        probe_cache_store(content_key, kind, result)
+    return result
+
+def clear_probe_cache():
+    """Leert den Analyse-Cache (Settings-Button)"""
+    if not messagebox.askyesno("Analyse-Cache leeren",
+                               "Alle zwischengespeicherten ffprobe/mutagen-Ergebnisse\n"
+                               "und Verzeichnis-Snapshots löschen?\n\n"
+                               "Der nächste Scan muss dann alle Dateien neu analysieren."):
+        return
+    try:
+        conn = get_probe_cache_connection()
+        conn.execute("DELETE FROM probe_cache")
+        conn.execute("DELETE FROM probe_cache_paths")
+        conn.execute("DELETE FROM dir_snapshots")
+        conn.commit()
+        conn.execute("VACUUM")
+        print("Analyse-Cache geleert")
+    except sqlite3.Error as e:
+        messagebox.showerror("Fehler", f"Cache konnte nicht geleert werden:\n{e}")
+
+# === EXTERNE TOOLS (ffprobe/ffmpeg) ===
+# Alle Aufrufe laufen über einen zentralen Supervisor:
+# Zeitlimit pro Aufruf, Abbruch bei Scan-Stopp/Programmende, begrenzte Anzahl gleichzeitiger Prozesse
+DEFAULT_TOOL_TIMEOUTS = {'ffprobe': 30, 'ffmpeg': 60}
+DEFAULT_MAX_TOOL_PROCESSES = max(2, min(8, os.cpu_count() or 4))
+QUARANTINE_AFTER_FAILURES = 2
+
+# Abbruch-Signal des aufrufenden Threads (z.B. stop_scanning der Scan-Worker)
+_tool_context = threading.local()
+
+class ToolError(Exception):
+    """Externes Tool abgebrochen - reason: 'timeout', 'crash', 'cancelled' oder 'quarantined'"""
+    def __init__(self, message, reason):
+        super().__init__(message)
+        self.reason = reason
+
+class ToolSupervisor:
+    """Startet und überwacht ffprobe/ffmpeg-Prozesse"""
+
+    def __init__(self):
+        self._slots = None
+        self._lock = threading.Lock()
+        self._processes = set()
+        self._shutting_down = False
+
+    def _get_slots(self):
+        # Erst beim ersten Aufruf anlegen - die Config ist beim Import noch nicht gelesen
+        with self._lock:
+            if self._slots is None:
+                max_processes = config.getint('Scan', 'max_tool_processes', fallback=DEFAULT_MAX_TOOL_PROCESSES)
+                self._slots = threading.BoundedSemaphore(max(1, max_processes))
+            return self._slots
+
+    def run(self, cmd, timeout, cancel_event=None):
+        """Führt cmd aus und liefert CompletedProcess (stdout/stderr als Bytes)"""
+        slots = self._get_slots()
+        while not slots.acquire(timeout=0.2):
+            if self._shutting_down or (cancel_event is not None and cancel_event.is_set()):
+                raise ToolError(f"Abgebrochen vor Start: {cmd[0]}", 'cancelled')
+        try:
+            if self._shutting_down:
+                raise ToolError(f"Programmende: {cmd[0]}", 'cancelled')
+            process = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+            )
+            with self._lock:
+                self._processes.add(process)
+            try:
+                deadline = time.time() + timeout
+                while True:
+                    try:
+                        stdout, stderr = process.communicate(timeout=0.2)
+                        break
+                    except subprocess.TimeoutExpired:
+                        if self._shutting_down or (cancel_event is not None and cancel_event.is_set()):
+                            self._kill(process)
+                            raise ToolError(f"Abgebrochen: {cmd[0]}", 'cancelled')
+                        if time.time() > deadline:
+                            self._kill(process)
+                            raise ToolError(f"Zeitlimit ({timeout}s) überschritten", 'timeout')
+            finally:
+                with self._lock:
+                    self._processes.discard(process)
+            return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+        finally:
+            slots.release()
+
+    @staticmethod
+    def _kill(process):
+        try:
+            process.kill()
+            process.communicate(timeout=5)
+        except Exception:
+            pass
+
+    def kill_all(self):
+        """Beendet alle laufenden Prozesse (Programmende)"""
+        self._shutting_down = True
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            self._kill(process)
+
+tool_supervisor = ToolSupervisor()
+
+def is_process_crash(returncode):
+    """Absturz statt normalem Fehlercode (POSIX: Signal, Windows: NTSTATUS 0xC...)"""
+    return returncode < 0 or returncode >= 0xC0000000
+
+def run_tool(tool, cmd, file_path=None):
+    """
+    Zentraler Aufruf für ffprobe/ffmpeg
+
+    - Zeitlimit aus [Scan] ffprobe_timeout / ffmpeg_timeout
+    - Abbruch über das Cancel-Event des aufrufenden Threads
+    - Timeouts und Abstürze werden für file_path in der Quarantäne vermerkt
+    Wirft ToolError bei Timeout, Absturz, Abbruch oder Datei in Quarantäne.
+    """
+    if file_path and is_quarantined(file_path):
+        raise ToolError(f"In Quarantäne: {file_path}", 'quarantined')
+
+    timeout = config.getint('Scan', f'{tool}_timeout', fallback=DEFAULT_TOOL_TIMEOUTS[tool])
+    try:
+        result = tool_supervisor.run(cmd, timeout, getattr(_tool_context, 'cancel_event', None))
+    except ToolError as e:
+        if e.reason == 'timeout' and file_path:
+            record_tool_failure(file_path, tool, e)
+        raise
+
+    if is_process_crash(result.returncode):
+        error = ToolError(f"{tool} abgestürzt (Code {result.returncode})", 'crash')
+        if file_path:
+            record_tool_failure(file_path, tool, error)
+        raise error
+    return result
+
+def is_quarantined(file_path):
+    """True, wenn die Datei (unverändert) zu oft Timeouts/Abstürze verursacht hat"""
+    file_info = get_file_hash(file_path)
+    if file_info is None:
+        return False
+    try:
+        row = get_probe_cache_connection().execute(
+            "SELECT failures, file_hash FROM quarantine WHERE filepath = ?", (os.path.normpath(file_path),)
+        ).fetchone()
+    except sqlite3.Error:
+        return False
+    return bool(row) and row[1] == file_info[0] and row[0] >= QUARANTINE_AFTER_FAILURES
+
+def record_tool_failure(file_path, tool, error):
+    """Zählt Timeouts/Abstürze (ToolError) pro Datei - geänderte Dateien starten wieder bei 1"""
+    file_path = os.path.normpath(file_path)
+    file_info = get_file_hash(file_path)
+    fingerprint = file_info[0] if file_info else ''
+    try:
+        conn = get_probe_cache_connection()
+        row = conn.execute("SELECT failures, file_hash FROM quarantine WHERE filepath = ?", (file_path,)).fetchone()
+        failures = row[0] + 1 if row and row[1] == fingerprint else 1
+        conn.execute(
+            "INSERT OR REPLACE INTO quarantine (filepath, file_hash, failures, tool, last_error, last_failure) "
+            "VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
+            (file_path, fingerprint, failures, tool, str(error))
+        )
+        conn.commit()
+        if failures >= QUARANTINE_AFTER_FAILURES:
+            print(f"Quarantäne: {file_path} ({failures}x {error})")
+    except sqlite3.Error as e:
+        print(f"Quarantäne-Eintrag fehlgeschlagen: {e}")
+
+def load_quarantine_fingerprints():
+    """Alle Dateien in Quarantäne als {Pfad: Fingerprint} (für den Scan)"""
+    try:
+        return dict(get_probe_cache_connection().execute(
+            "SELECT filepath, file_hash FROM quarantine WHERE failures >= ?", (QUARANTINE_AFTER_FAILURES,)
+        ).fetchall())
+    except sqlite3.Error as e:
+        print(f"Quarantäne konnte nicht gelesen werden: {e}")
+        return {}
+
+def get_quarantine_entries():
+    """Quarantäne-Liste für die Analytics-Ansicht"""
+    try:
+        return get_probe_cache_connection().execute(
+            "SELECT filepath, failures, tool, last_error, last_failure FROM quarantine "
+            "WHERE failures >= ? ORDER BY last_failure DESC", (QUARANTINE_AFTER_FAILURES,)
+        ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Quarantäne konnte nicht gelesen werden: {e}")
+        return []
+
+def clear_quarantine():
+    try:
+        conn = get_probe_cache_connection()
+        conn.execute("DELETE FROM quarantine")
+        conn.commit()
+        print("Quarantäne aufgehoben")
+    except sqlite3.Error as e:
+        messagebox.showerror("Fehler", f"Quarantäne konnte nicht geleert werden:\n{e}")
+        return
+    # Fehlgeschlagene Einträge erneut zur Detail-Analyse vormerken
+    try:
+        db_writer.execute("UPDATE media_files SET enrichment_pending = ? WHERE enrichment_pending = ?",
+                          (ENRICHMENT_PENDING, ENRICHMENT_FAILED)).result()
+        enrichment_service.start()
+    except sqlite3.Error as e:
+        print(f"Detail-Analyse konnte nicht neu vorgemerkt werden: {e}")
+
 def ffprobe_file(file_path):
+    """ffprobe mit Analyse-Cache - startet nur bei Cache-Miss einen Prozess"""
+    normalized_path = os.path.normpath(file_path)
+    return cached_probe(normalized_path, 'ffprobe', lambda: run_ffprobe_uncached(normalized_path))
+
+def run_ffprobe_uncached(file_path):
     """ffprobe mit besserer Pfad-Behandlung"""
     try:
         normalized_path = os.path.normpath(file_path)
         
-        result = subprocess.run(
-            [ffprobe_path, '-v', 'quiet', '-print_format', 'json', 
-             '-show_format', '-show_streams', normalized_path],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            text=True, encoding='utf-8', errors='replace',
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
+        result = run_tool('ffprobe', [
+            ffprobe_path, '-v', 'quiet', '-print_format', 'json',
+            '-show_format', '-show_streams', normalized_path
+        ], file_path=normalized_path)
+        stdout = result.stdout.decode('utf-8', errors='replace')
         
         if result.returncode != 0:
-            print(f"ffprobe Fehler für {normalized_path}: {result.stderr}")
+            print(f"ffprobe Fehler für {normalized_path}: {result.stderr.decode('utf-8', errors='replace')}")
             return {}
             
-        if not result.stdout.strip():
+        if not stdout.strip():
             print(f"Leere ffprobe Ausgabe für {normalized_path}")
             return {}
             
-        metadata = json.loads(result.stdout)
+        metadata = json.loads(stdout)
         return metadata
+    except ToolError:
+        # Timeout/Absturz/Abbruch/Quarantäne: kein (leeres) Ergebnis - der Aufrufer entscheidet
+        raise
     except json.JSONDecodeError as e:
         print(f"JSON Parsing Fehler für {file_path}: {e}")
         return {}
@@ -1009,69 +1408,1093 @@ def ffprobe_file(file_path):
         print(f"ffprobe Fehler: {e}")
         return {}
 
-def get_mp3_metadata_with_timeout(file_path, timeout=5):
+# === CONTAINER-HEADER-PARSER (MP4/MOV, MKV/WebM, AVI) ===
+# Liest Laufzeit, Auflösung, fps, Codecs und Tags direkt aus den Header-Strukturen
+# (nur die benötigten Byte-Bereiche) und liefert ein ffprobe-kompatibles dict.
+# Alles Ungewöhnliche (fragmentierte MP4, unbekannte Codecs, defekte Header) → ffprobe
+# Abschaltbar über [Scan] header_parser = False
+HEADER_PARSER_MAX_BYTES = 64 * 1024 * 1024
+
+class HeaderParseError(Exception):
+    """Datei passt nicht zum schnellen Parser - ffprobe übernimmt"""
+
+MP4_CODECS = {
+    'avc1': 'h264', 'avc3': 'h264', 'hvc1': 'hevc', 'hev1': 'hevc', 'mp4v': 'mpeg4',
+    'av01': 'av1', 'vp09': 'vp9', 'vp08': 'vp8', 'jpeg': 'mjpeg', 'mjpa': 'mjpeg',
+    'apch': 'prores', 'apcn': 'prores', 'apcs': 'prores', 'apco': 'prores', 'ap4h': 'prores',
+    'mp4a': 'aac', 'ac-3': 'ac3', 'ec-3': 'eac3', 'Opus': 'opus', 'fLaC': 'flac',
+    'alac': 'alac', '.mp3': 'mp3', 'sowt': 'pcm_s16le', 'twos': 'pcm_s16be',
+}
+# ObjectTypeIndication aus esds (MPEG-4 Systems)
+MP4_OBJECT_TYPES = {
+    0x20: 'mpeg4', 0x21: 'h264', 0x40: 'aac', 0x66: 'aac', 0x67: 'aac', 0x68: 'aac',
+    0x69: 'mp3', 0x6B: 'mp3', 0x6C: 'mjpeg', 0xA5: 'ac3', 0xA6: 'eac3', 0xA9: 'dts',
+}
+MP4_TAG_NAMES = {
+    b'\xa9gen': 'genre', b'\xa9ART': 'artist', b'\xa9cmt': 'comment', b'\xa9day': 'date',
+    b'\xa9nam': 'title', b'\xa9alb': 'album', b'aART': 'album_artist', b'desc': 'description',
+}
+
+MKV_CODECS = {
+    'V_MPEG4/ISO/AVC': 'h264', 'V_MPEGH/ISO/HEVC': 'hevc', 'V_VP8': 'vp8', 'V_VP9': 'vp9',
+    'V_AV1': 'av1', 'V_MPEG4/ISO/ASP': 'mpeg4', 'V_MPEG4/ISO/SP': 'mpeg4', 'V_MPEG4/ISO/AP': 'mpeg4',
+    'V_MPEG1': 'mpeg1video', 'V_MPEG2': 'mpeg2video', 'V_THEORA': 'theora', 'V_MJPEG': 'mjpeg',
+    'V_PRORES': 'prores', 'A_AAC': 'aac', 'A_AC3': 'ac3', 'A_EAC3': 'eac3', 'A_DTS': 'dts',
+    'A_MPEG/L3': 'mp3', 'A_MPEG/L2': 'mp2', 'A_OPUS': 'opus', 'A_VORBIS': 'vorbis',
+    'A_FLAC': 'flac', 'A_TRUEHD': 'truehd', 'A_ALAC': 'alac',
+}
+
+AVI_VIDEO_CODECS = {
+    'XVID': 'mpeg4', 'DIVX': 'mpeg4', 'DX50': 'mpeg4', 'FMP4': 'mpeg4', 'MP4V': 'mpeg4', 'M4S2': 'mpeg4',
+    'H264': 'h264', 'X264': 'h264', 'AVC1': 'h264', 'DAVC': 'h264',
+    'HEVC': 'hevc', 'H265': 'hevc', 'HVC1': 'hevc', 'X265': 'hevc',
+    'MJPG': 'mjpeg', 'DIV3': 'msmpeg4v3', 'MP43': 'msmpeg4v3', 'MP42': 'msmpeg4v2',
+    'WMV1': 'wmv1', 'WMV2': 'wmv2', 'WMV3': 'wmv3', 'MPG2': 'mpeg2video', 'VP80': 'vp8', 'AV01': 'av1',
+}
+AVI_AUDIO_CODECS = {
+    0x0003: 'pcm_f32le', 0x0050: 'mp2', 0x0055: 'mp3', 0x00FF: 'aac', 0x1610: 'aac',
+    0x2000: 'ac3', 0x2001: 'dts', 0x0160: 'wmav1', 0x0161: 'wmav2', 0x0162: 'wmapro',
+}
+AVI_INFO_TAGS = {
+    b'IART': 'artist', b'ICMT': 'comment', b'ICRD': 'date', b'IGNR': 'genre',
+    b'INAM': 'title', b'IPRD': 'album', b'ILNG': 'language', b'ICOP': 'copyright',
+}
+
+def build_header_probe(file_size, duration, streams, tags):
+    """ffprobe-kompatibles Ergebnis (Zahlen als Strings wie bei -print_format json)"""
+    if duration <= 0 or not streams:
+        raise HeaderParseError("keine Laufzeit/Streams im Header")
+    probe_format = {
+        'duration': f"{duration:.6f}",
+        'size': str(file_size),
+        'bit_rate': str(int(file_size * 8 / duration)),
+        'tags': tags,
+    }
+    for index, stream in enumerate(streams):
+        stream['index'] = index
+    return {'format': probe_format, 'streams': streams}
+
+def format_frame_rate(rate):
+    """Fraction → 'num/den' wie r_frame_rate von ffprobe"""
+    return f"{rate.numerator}/{rate.denominator}"
+
+def read_exact(f, offset, length):
+    if length > HEADER_PARSER_MAX_BYTES:
+        raise HeaderParseError(f"Header zu groß ({length} Bytes)")
+    f.seek(offset)
+    data = f.read(length)
+    if len(data) != length:
+        raise HeaderParseError("Datei endet im Header")
+    return data
+
+def decode_tag_text(raw):
+    raw = raw.split(b'\x00', 1)[0]
+    try:
+        return raw.decode('utf-8').strip()
+    except UnicodeDecodeError:
+        return raw.decode('latin-1').strip()
+
+# --- MP4 / MOV (ISO-BMFF) ---
+
+def iter_mp4_boxes(data, start, end):
+    """Liefert (typ, inhalt_start, inhalt_ende) der Boxen in data[start:end]"""
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise HeaderParseError(f"defekte Box {box_type!r}")
+        yield box_type, pos + header, pos + size
+        pos += size
+
+def find_mp4_box(data, start, end, *path):
+    for name in path:
+        for box_type, child_start, child_end in iter_mp4_boxes(data, start, end):
+            if box_type == name:
+                start, end = child_start, child_end
+                break
+        else:
+            return None
+    return start, end
+
+def read_mp4_moov(f, file_size):
+    """Springt über die Top-Level-Boxen (mdat wird nicht gelesen) und liest nur moov"""
+    pos = 0
+    while pos + 8 <= file_size:
+        header = read_exact(f, pos, min(16, file_size - pos))
+        size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - pos
+        if pos == 0 and box_type not in (b'ftyp', b'moov', b'mdat', b'free', b'wide', b'skip'):
+            raise HeaderParseError("keine MP4/MOV-Struktur")
+        if size < header_size:
+            raise HeaderParseError(f"defekte Box {box_type!r}")
+        if box_type == b'moov':
+            return read_exact(f, pos + header_size, size - header_size)
+        pos += size
+    raise HeaderParseError("moov-Box fehlt")
+
+def parse_mp4_esds_codec(moov, entry_start, entry_end):
+    """Codec aus dem ObjectTypeIndication der esds-Box (mp4a/mp4v)"""
+    esds = moov.find(b'esds', entry_start, entry_end)
+    if esds < 0:
+        return None
+    pos = esds + 8  # Typ + Version/Flags
+    while pos < entry_end:
+        tag = moov[pos]
+        pos += 1
+        length = 0
+        for _ in range(4):
+            byte = moov[pos]
+            pos += 1
+            length = (length << 7) | (byte & 0x7F)
+            if not byte & 0x80:
+                break
+        if tag == 0x03:  # ES_Descriptor: ES_ID, Flags, optionale Felder
+            flags = moov[pos + 2]
+            pos += 3
+            if flags & 0x80:
+                pos += 2
+            if flags & 0x40:
+                pos += 1 + moov[pos]
+            if flags & 0x20:
+                pos += 2
+        elif tag == 0x04:  # DecoderConfigDescriptor
+            return MP4_OBJECT_TYPES.get(moov[pos])
+        else:
+            pos += length
+    return None
+
+def parse_mp4_trak(moov, start, end):
+    """Ein Stream aus trak/mdia - None für Spuren ohne Bild/Ton (Kapitel, Untertitel, Timecode)"""
+    mdia = find_mp4_box(moov, start, end, b'mdia')
+    if not mdia:
+        return None
+    hdlr = find_mp4_box(moov, *mdia, b'hdlr')
+    handler = moov[hdlr[0] + 8:hdlr[0] + 12] if hdlr else b''
+    if handler not in (b'vide', b'soun'):
+        return None
+
+    mdhd = find_mp4_box(moov, *mdia, b'mdhd')
+    stbl = find_mp4_box(moov, *mdia, b'minf', b'stbl')
+    stsd = stbl and find_mp4_box(moov, *stbl, b'stsd')
+    if not mdhd or not stsd:
+        raise HeaderParseError("Spur ohne mdhd/stsd")
+    if moov[mdhd[0]] == 1:
+        timescale, track_duration = struct.unpack_from('>IQ', moov, mdhd[0] + 20)
+    else:
+        timescale, track_duration = struct.unpack_from('>II', moov, mdhd[0] + 12)
+    if not timescale:
+        raise HeaderParseError("Spur ohne Timescale")
+
+    entry = stsd[0] + 8
+    entry_size, fourcc = struct.unpack_from('>I4s', moov, entry)
+    entry_end = min(entry + entry_size, stsd[1])
+    fourcc = fourcc.decode('latin-1')
+    codec = MP4_CODECS.get(fourcc)
+    if fourcc in ('mp4a', 'mp4v'):
+        codec = parse_mp4_esds_codec(moov, entry + 8, entry_end) or codec
+    if codec is None:
+        raise HeaderParseError(f"unbekannter Codec {fourcc!r}")
+
+    seconds = track_duration / timescale
+    stream = {'codec_type': 'video' if handler == b'vide' else 'audio', 'codec_name': codec}
+    if seconds > 0:
+        stream['duration'] = f"{seconds:.6f}"
+
+    stsz = find_mp4_box(moov, *stbl, b'stsz')
+    if stsz and seconds > 0:
+        sample_size, sample_count = struct.unpack_from('>II', moov, stsz[0] + 4)
+        if sample_size:
+            total_bytes = sample_size * sample_count
+        else:
+            total_bytes = sum(struct.unpack_from(f'>{sample_count}I', moov, stsz[0] + 12))
+        stream['bit_rate'] = str(int(total_bytes * 8 / seconds))
+
+    content = entry + 16  # nach Box-Kopf, reserved(6) und data_reference_index(2)
+    if handler == b'vide':
+        stream['width'], stream['height'] = struct.unpack_from('>HH', moov, content + 16)
+        stts = find_mp4_box(moov, *stbl, b'stts')
+        deltas = Counter()
+        if stts:
+            entry_count = struct.unpack_from('>I', moov, stts[0] + 4)[0]
+            for i in range(min(entry_count, (stts[1] - stts[0] - 8) // 8)):
+                count, delta = struct.unpack_from('>II', moov, stts[0] + 8 + i * 8)
+                deltas[delta] += count
+        if not deltas or not deltas.most_common(1)[0][0]:
+            raise HeaderParseError("Bildrate nicht im Header")
+        stream['r_frame_rate'] = format_frame_rate(Fraction(timescale, deltas.most_common(1)[0][0]))
+    else:
+        version = struct.unpack_from('>H', moov, content)[0]
+        if version == 2:
+            raise HeaderParseError("QuickTime-Audio v2")
+        channels = struct.unpack_from('>H', moov, content + 8)[0]
+        sample_rate = struct.unpack_from('>I', moov, content + 16)[0] >> 16
+        stream['channels'] = channels
+        stream['sample_rate'] = str(sample_rate or timescale)
+    return stream
+
+def parse_mp4_tags(moov, start, end):
+    """udta: iTunes-Tags (meta/ilst) und QuickTime-Text (©xxx direkt in udta)"""
+    tags = {}
+    for box_type, box_start, box_end in iter_mp4_boxes(moov, start, end):
+        if box_type == b'meta':
+            ilst = find_mp4_box(moov, box_start + 4, box_end, b'ilst')
+            if not ilst:
+                continue
+            for item_type, item_start, item_end in iter_mp4_boxes(moov, *ilst):
+                name = MP4_TAG_NAMES.get(item_type)
+                data = find_mp4_box(moov, item_start, item_end, b'data')
+                if name and data and struct.unpack_from('>I', moov, data[0])[0] == 1:
+                    tags[name] = decode_tag_text(moov[data[0] + 8:data[1]])
+        elif box_type in MP4_TAG_NAMES and box_end - box_start > 4:
+            text_length = struct.unpack_from('>H', moov, box_start)[0]
+            tags.setdefault(MP4_TAG_NAMES[box_type], decode_tag_text(moov[box_start + 4:box_start + 4 + text_length]))
+    return tags
+
+def parse_mp4_header(f, file_size):
+    moov = read_mp4_moov(f, file_size)
+    duration = 0.0
+    streams = []
+    tags = {}
+    for box_type, start, end in iter_mp4_boxes(moov, 0, len(moov)):
+        if box_type == b'mvhd':
+            if moov[start] == 1:
+                timescale, movie_duration = struct.unpack_from('>IQ', moov, start + 20)
+            else:
+                timescale, movie_duration = struct.unpack_from('>II', moov, start + 12)
+            duration = movie_duration / timescale if timescale else 0.0
+        elif box_type == b'mvex':
+            raise HeaderParseError("fragmentierte MP4")
+        elif box_type == b'trak':
+            stream = parse_mp4_trak(moov, start, end)
+            if stream:
+                streams.append(stream)
+        elif box_type == b'udta':
+            tags.update(parse_mp4_tags(moov, start, end))
+    return build_header_probe(file_size, duration, streams, tags)
+
+# --- Matroska / WebM (EBML) ---
+MKV_SEGMENT, MKV_SEEKHEAD, MKV_INFO, MKV_TRACKS, MKV_TAGS, MKV_CLUSTER = (
+    0x18538067, 0x114D9B74, 0x1549A966, 0x1654AE6B, 0x1254C367, 0x1F43B675)
+
+def read_ebml_element_header(data, pos):
+    """(id, size, inhalt_start) - size None bei unbekannter Länge"""
+    first = data[pos]
+    id_length = 8 - first.bit_length() + 1
+    if id_length > 4:
+        raise HeaderParseError("ungültige EBML-ID")
+    element_id = int.from_bytes(data[pos:pos + id_length], 'big')
+    pos += id_length
+    first = data[pos]
+    size_length = 8 - first.bit_length() + 1
+    if size_length > 8:
+        raise HeaderParseError("ungültige EBML-Länge")
+    size = first & ((1 << (8 - size_length)) - 1)
+    for byte in data[pos + 1:pos + size_length]:
+        size = (size << 8) | byte
+    if size == (1 << (7 * size_length)) - 1:
+        size = None
+    return element_id, size, pos + size_length
+
+def iter_ebml_elements(data, start=0, end=None):
+    """Liefert (id, inhalt_start, inhalt_ende) der Kind-Elemente"""
+    end = len(data) if end is None else end
+    pos = start
+    while pos < end:
+        element_id, size, content = read_ebml_element_header(data, pos)
+        if size is None or content + size > end:
+            raise HeaderParseError("EBML-Element ohne gültige Länge")
+        yield element_id, content, content + size
+        pos = content + size
+
+def ebml_children(data, start, end):
+    return {element_id: (child_start, child_end) for element_id, child_start, child_end in iter_ebml_elements(data, start, end)}
+
+def ebml_uint(data, span, default=0):
+    return int.from_bytes(data[span[0]:span[1]], 'big') if span else default
+
+def ebml_float(data, span, default=0.0):
+    if not span:
+        return default
+    raw = data[span[0]:span[1]]
+    if len(raw) == 4:
+        return struct.unpack('>f', raw)[0]
+    if len(raw) == 8:
+        return struct.unpack('>d', raw)[0]
+    raise HeaderParseError("ungültiger EBML-Float")
+
+def ebml_text(data, span):
+    return decode_tag_text(data[span[0]:span[1]]) if span else ''
+
+def mkv_codec_name(codec_id, bit_depth, codec_private):
+    if codec_id in MKV_CODECS:
+        return MKV_CODECS[codec_id]
+    if codec_id.startswith(('A_AAC', 'A_DTS')):
+        return MKV_CODECS[codec_id.split('/')[0]]
+    if codec_id.startswith('A_PCM/'):
+        # Ohne BitDepth-Element: Float-PCM ist praktisch immer 32 Bit, Integer-PCM 16 Bit
+        if codec_id == 'A_PCM/FLOAT/IEEE':
+            return 'pcm_f64le' if bit_depth == 64 else 'pcm_f32le'
+        bit_depth = bit_depth or 16
+        if bit_depth == 8:
+            return 'pcm_u8'
+        return f"pcm_s{bit_depth}{'be' if codec_id == 'A_PCM/INT/BIG' else 'le'}"
+    if codec_id == 'V_MS/VFW/FOURCC' and len(codec_private) >= 20:
+        return AVI_VIDEO_CODECS.get(codec_private[16:20].decode('latin-1').upper())
+    return None
+
+def parse_mkv_tracks(data, start, end):
+    streams = []
+    for element_id, entry_start, entry_end in iter_ebml_elements(data, start, end):
+        if element_id != 0xAE:  # TrackEntry
+            continue
+        entry = ebml_children(data, entry_start, entry_end)
+        track_type = ebml_uint(data, entry.get(0x83))
+        if track_type not in (1, 2):
+            continue
+        codec_id = ebml_text(data, entry.get(0x86))
+        codec_private = data[slice(*entry[0x63A2])] if 0x63A2 in entry else b''
+        audio = ebml_children(data, *entry[0xE1]) if 0xE1 in entry else {}
+        codec = mkv_codec_name(codec_id, ebml_uint(data, audio.get(0x6264), None), codec_private)
+        if codec is None:
+            raise HeaderParseError(f"unbekannter Codec {codec_id!r}")
+
+        if track_type == 1:
+            video = ebml_children(data, *entry[0xE0]) if 0xE0 in entry else {}
+            default_duration = ebml_uint(data, entry.get(0x23E383))
+            if not default_duration:
+                raise HeaderParseError("Bildrate nicht im Header")
+            streams.append({
+                'codec_type': 'video', 'codec_name': codec,
+                'width': ebml_uint(data, video.get(0xB0)), 'height': ebml_uint(data, video.get(0xBA)),
+                'r_frame_rate': format_frame_rate(Fraction(1_000_000_000, default_duration).limit_denominator(1001)),
+            })
+        else:
+            streams.append({
+                'codec_type': 'audio', 'codec_name': codec,
+                'channels': ebml_uint(data, audio.get(0x9F), 1),
+                'sample_rate': str(int(ebml_float(data, audio.get(0xB5), 8000.0))),
+            })
+    return streams
+
+def parse_mkv_tags(data, start, end):
+    """Nur globale Tags (ohne Track-/Kapitel-Ziel) - Namen bleiben wie im File, wie bei ffprobe"""
+    tags = {}
+    for element_id, tag_start, tag_end in iter_ebml_elements(data, start, end):
+        if element_id != 0x7373:  # Tag
+            continue
+        tag = list(iter_ebml_elements(data, tag_start, tag_end))
+        targets = [span for child_id, *span in tag if child_id == 0x63C0]
+        if targets and any(child_id in (0x63C5, 0x63C9, 0x63C4, 0x63C6)
+                           for child_id, _, _ in iter_ebml_elements(data, *targets[0])):
+            continue
+        for child_id, simple_start, simple_end in tag:
+            if child_id == 0x67C8:  # SimpleTag
+                simple = ebml_children(data, simple_start, simple_end)
+                name = ebml_text(data, simple.get(0x45A3))
+                if name and 0x4487 in simple:
+                    tags[name] = ebml_text(data, simple[0x4487])
+    return tags
+
+def read_ebml_element_at(f, offset, file_size):
+    """Liest Kopf + Inhalt eines Elements ab offset → (id, inhalt_bytes)"""
+    header = read_exact(f, offset, min(12, file_size - offset))
+    element_id, size, content = read_ebml_element_header(header, 0)
+    if size is None:
+        raise HeaderParseError("Element mit unbekannter Länge")
+    return element_id, read_exact(f, offset + content, size)
+
+def parse_mkv_header(f, file_size):
+    header = read_exact(f, 0, min(64, file_size))
+    element_id, size, content = read_ebml_element_header(header, 0)
+    if element_id != 0x1A45DFA3 or size is None:
+        raise HeaderParseError("keine EBML-Datei")
+    ebml_header = read_exact(f, content, size)
+    doc_type = ebml_text(ebml_header, ebml_children(ebml_header, 0, size).get(0x4282))
+    if doc_type not in ('matroska', 'webm'):
+        raise HeaderParseError(f"DocType {doc_type!r}")
+
+    segment_header = read_exact(f, content + size, min(12, file_size - content - size))
+    element_id, segment_size, segment_content = read_ebml_element_header(segment_header, 0)
+    if element_id != MKV_SEGMENT:
+        raise HeaderParseError("Segment fehlt")
+    segment_start = content + size + segment_content
+    segment_end = min(file_size, segment_start + segment_size) if segment_size is not None else file_size
+
+    # Level-1-Elemente bis zum ersten Cluster linear lesen, Rest über den SeekHead
+    sections = {}
+    seek_positions = {}
+    pos = segment_start
+    while pos + 2 <= segment_end:
+        element_header = read_exact(f, pos, min(12, segment_end - pos))
+        element_id, size, content = read_ebml_element_header(element_header, 0)
+        if element_id == MKV_CLUSTER or size is None:
+            break
+        if element_id in (MKV_SEEKHEAD, MKV_INFO, MKV_TRACKS, MKV_TAGS) and element_id not in sections:
+            data = read_exact(f, pos + content, size)
+            sections[element_id] = data
+            if element_id == MKV_SEEKHEAD:
+                for seek_id, seek_start, seek_end in iter_ebml_elements(data):
+                    if seek_id == 0x4DBB:  # Seek
+                        seek = ebml_children(data, seek_start, seek_end)
+                        target = ebml_uint(data, seek.get(0x53AB))
+                        seek_positions.setdefault(target, segment_start + ebml_uint(data, seek.get(0x53AC)))
+        pos += content + size
+
+    for element_id in (MKV_INFO, MKV_TRACKS, MKV_TAGS):
+        offset = seek_positions.get(element_id)
+        if element_id not in sections and offset is not None and offset < segment_end:
+            found_id, data = read_ebml_element_at(f, offset, file_size)
+            if found_id == element_id:
+                sections[element_id] = data
+    if MKV_INFO not in sections or MKV_TRACKS not in sections:
+        raise HeaderParseError("Info/Tracks fehlen")
+
+    info_data = sections[MKV_INFO]
+    info = ebml_children(info_data, 0, len(info_data))
+    timecode_scale = ebml_uint(info_data, info.get(0x2AD7B1), 1_000_000)
+    duration = ebml_float(info_data, info.get(0x4489)) * timecode_scale / 1e9
+
+    tags = {}
+    if 0x7BA9 in info:
+        tags['title'] = ebml_text(info_data, info[0x7BA9])
+    if MKV_TAGS in sections:
+        tags.update(parse_mkv_tags(sections[MKV_TAGS], 0, len(sections[MKV_TAGS])))
+    streams = parse_mkv_tracks(sections[MKV_TRACKS], 0, len(sections[MKV_TRACKS]))
+    return build_header_probe(file_size, duration, streams, tags)
+
+# --- AVI (RIFF) ---
+
+def iter_riff_chunks(data, start, end):
+    pos = start
+    while pos + 8 <= end:
+        chunk_id, size = struct.unpack_from('<4sI', data, pos)
+        if pos + 8 + size > end:
+            raise HeaderParseError(f"defekter Chunk {chunk_id!r}")
+        yield chunk_id, pos + 8, pos + 8 + size
+        pos += 8 + size + (size & 1)
+
+def parse_avi_stream(data, start, end):
+    """strl-Liste: strh (Zeitbasis, Länge) + strf (BITMAPINFOHEADER/WAVEFORMATEX)"""
+    chunks = {chunk_id: (chunk_start, chunk_end) for chunk_id, chunk_start, chunk_end in iter_riff_chunks(data, start, end)}
+    if b'strh' not in chunks or b'strf' not in chunks:
+        raise HeaderParseError("strl ohne strh/strf")
+    strh, strf = chunks[b'strh'][0], chunks[b'strf'][0]
+    stream_type = data[strh:strh + 4]
+    scale, rate, _, length = struct.unpack_from('<IIII', data, strh + 20)
+    seconds = length * scale / rate if rate else 0.0
+
+    if stream_type == b'vids':
+        width, height = struct.unpack_from('<ii', data, strf + 4)
+        compression = data[strf + 16:strf + 20]
+        codec = 'rawvideo' if compression == b'\x00\x00\x00\x00' else AVI_VIDEO_CODECS.get(compression.decode('latin-1').upper())
+        if codec is None or not scale or not rate:
+            raise HeaderParseError(f"unbekannter Video-Codec {compression!r}")
+        stream = {'codec_type': 'video', 'codec_name': codec, 'width': width, 'height': abs(height),
+                  'r_frame_rate': format_frame_rate(Fraction(rate, scale))}
+    elif stream_type == b'auds':
+        format_tag, channels, sample_rate, avg_bytes = struct.unpack_from('<HHII', data, strf)
+        bits = struct.unpack_from('<H', data, strf + 14)[0] if chunks[b'strf'][1] - strf >= 16 else 16
+        if format_tag == 0x0001:
+            codec = 'pcm_u8' if bits == 8 else f"pcm_s{bits}le"
+        else:
+            codec = AVI_AUDIO_CODECS.get(format_tag)
+        if codec is None:
+            raise HeaderParseError(f"unbekannter Audio-Codec 0x{format_tag:04X}")
+        stream = {'codec_type': 'audio', 'codec_name': codec, 'channels': channels, 'sample_rate': str(sample_rate)}
+        if avg_bytes:  # 0 bei VBR-MP3
+            stream['bit_rate'] = str(avg_bytes * 8)
+    else:
+        return None
+    if seconds > 0:
+        stream['duration'] = f"{seconds:.6f}"
+    return stream
+
+def parse_avi_header(f, file_size):
+    riff = read_exact(f, 0, 12)
+    if riff[:4] != b'RIFF' or riff[8:12] != b'AVI ':
+        raise HeaderParseError("keine AVI-Datei")
+
+    # Top-Level-Chunks bis zur movi-Liste - die Mediendaten selbst werden nicht gelesen
+    streams = []
+    tags = {}
+    pos = 12
+    while pos + 12 <= file_size:
+        chunk_id, size, list_type = struct.unpack('<4sI4s', read_exact(f, pos, 12))
+        if chunk_id == b'LIST' and list_type == b'movi':
+            break
+        if chunk_id == b'LIST' and list_type in (b'hdrl', b'INFO'):
+            data = read_exact(f, pos + 12, size - 4)
+            for child_id, child_start, child_end in iter_riff_chunks(data, 0, len(data)):
+                if list_type == b'INFO':
+                    if child_id in AVI_INFO_TAGS:
+                        tags[AVI_INFO_TAGS[child_id]] = decode_tag_text(data[child_start:child_end])
+                elif child_id == b'LIST' and data[child_start:child_start + 4] == b'strl':
+                    stream = parse_avi_stream(data, child_start + 4, child_end)
+                    if stream:
+                        streams.append(stream)
+        pos += 8 + size + (size & 1)
+
+    duration = max((float(s['duration']) for s in streams if 'duration' in s), default=0.0)
+    probe = build_header_probe(file_size, duration, streams, tags)
+    # Video-Bitrate steht nicht im Header: Gesamtrate abzüglich Audio (ohne Index-Scan)
+    audio_bitrate = sum(int(s.get('bit_rate', 0)) for s in streams if s['codec_type'] == 'audio')
+    for stream in streams:
+        if stream['codec_type'] == 'video':
+            stream['bit_rate'] = str(max(0, int(probe['format']['bit_rate']) - audio_bitrate))
+            break
+    return probe
+
+CONTAINER_HEADER_PARSERS = {
+    '.mp4': parse_mp4_header, '.m4v': parse_mp4_header, '.mov': parse_mp4_header,
+    '.mkv': parse_mkv_header, '.webm': parse_mkv_header,
+    '.avi': parse_avi_header,
+}
+
+def parse_container_header(file_path):
     """
-    Extrahiert MP3 Metadaten mit Timeout
+    Liest Metadaten direkt aus dem Container-Header (ohne ffprobe-Prozess)
     
-    Returns: (album, track_number, year, genre, contributors, length)
-    Immer 6 Werte - garantiert
+    Returns: ffprobe-kompatibles dict oder None, wenn die Datei ffprobe braucht
+    """
+    parser = CONTAINER_HEADER_PARSERS.get(os.path.splitext(file_path)[1].lower())
+    if parser is None:
+        return None
+    try:
+        file_size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as f:
+            return parser(f, file_size)
+    except (HeaderParseError, struct.error, IndexError, ValueError, ZeroDivisionError) as e:
+        print(f"Header-Parser → ffprobe für {os.path.basename(file_path)}: {e}")
+    except OSError as e:
+        print(f"Header-Parser: {file_path} nicht lesbar: {e}")
+    return None
+
+def probe_media_headers(file_path):
+    """
+    Laufzeit/Qualität/Tags: schneller Header-Parser, sonst ffprobe (mit Analyse-Cache)
+    Wirft ToolError, wenn ffprobe abbricht, abstürzt oder die Datei in Quarantäne ist
+    """
+    if config.getboolean('Scan', 'header_parser', fallback=True):
+        probe = parse_container_header(os.path.normpath(file_path))
+        if probe:
+            return probe
+    return ffprobe_file(file_path)
+
+def probe_media_headers_for_display(file_path):
+    """Für Tooltips/Diagnose: Tool-Fehler ergeben ein leeres Ergebnis statt einer Exception"""
+    try:
+        return probe_media_headers(file_path)
+    except ToolError as e:
+        print(f"ffprobe Fehler: {e}")
+        return {}
+
+# === GEMEINSAMER POOL FÜR TAG-LESEVORGÄNGE ===
+# Ein langlebiger Pool statt eines ThreadPoolExecutors pro Datei - ein hängender
+# Lesevorgang (z.B. Netzlaufwerk) belegt nur einen Slot, der Aufrufer läuft nach dem Timeout weiter
+_metadata_executor = None
+_metadata_executor_lock = threading.Lock()
+
+def get_metadata_executor():
+    global _metadata_executor
+    with _metadata_executor_lock:
+        if _metadata_executor is None:
+            # Doppelte Scan-Worker-Zahl: einzelne hängende Lesevorgänge blockieren den Scan nicht
+            max_workers = load_scan_settings()['workers'] * 2
+            _metadata_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix='MetadataReader'
+            )
+        return _metadata_executor
+
+def read_with_timeout(reader, file_path, timeout):
+    """Führt reader(file_path) im gemeinsamen Pool aus - None bei Zeitüberschreitung"""
+    future = get_metadata_executor().submit(reader, file_path)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        print(f"Datei '{file_path}' überschritt den Zeitrahmen und wird übersprungen.")
+        return None
+
+# === MP3-HEADER-PARSER (ID3v2 + erster MPEG-Frame) ===
+# Liest nur den Dateianfang: ID3v2-Tag und den ersten Frame mit Xing/Info/VBRI-Header.
+# Defekte oder ungewöhnliche Dateien (komprimierte Frames, Layer I/II, Free-Format) → mutagen
+MP3_HEADER_READ_BYTES = 256 * 1024
+MP3_FRAME_PROBE_BYTES = 16 * 1024
+MP3_BITRATES_V1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+MP3_BITRATES_V2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+ID3_WANTED_FRAMES = {'TALB', 'TRCK', 'TDRC', 'TYER', 'TCON', 'TPE1', 'TPE2', 'APIC'}
+ID3V22_FRAME_NAMES = {'TAL': 'TALB', 'TRK': 'TRCK', 'TYE': 'TYER', 'TCO': 'TCON', 'TP1': 'TPE1', 'TP2': 'TPE2', 'PIC': 'APIC'}
+ID3_TEXT_ENCODINGS = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}
+
+def syncsafe_int(raw):
+    if any(byte & 0x80 for byte in raw):
+        raise HeaderParseError("ungültige Syncsafe-Länge")
+    value = 0
+    for byte in raw:
+        value = (value << 7) | byte
+    return value
+
+def read_mp3_prefix(f, file_size):
+    """Ein Lesevorgang für Tag + ersten Frame (zweiter nur bei sehr großen Tags, z.B. Cover)"""
+    data = f.read(MP3_HEADER_READ_BYTES)
+    if data[:3] == b'ID3' and len(data) >= 10:
+        needed = 10 + syncsafe_int(data[6:10]) + MP3_FRAME_PROBE_BYTES
+        if needed > len(data) and len(data) < file_size:
+            if needed - len(data) > HEADER_PARSER_MAX_BYTES:
+                raise HeaderParseError("ID3-Tag zu groß")
+            data += f.read(needed - len(data))
+    return data
+
+def parse_id3v2_frames(data):
+    """
+    Liest die benötigten ID3v2.2/2.3/2.4-Frames
+
+    Returns: ({frame_id: payload}, Ende des Tags)
+    """
+    if data[:3] != b'ID3':
+        return {}, 0
+    major, flags = data[3], data[5]
+    if major not in (2, 3, 4):
+        raise HeaderParseError(f"ID3v2.{major}")
+    size = syncsafe_int(data[6:10])
+    tag_end = 10 + size + (10 if major == 4 and flags & 0x10 else 0)
+    if 10 + size > len(data):
+        raise HeaderParseError("ID3-Tag unvollständig")
+    body = data[10:10 + size]
+    if flags & 0x80 and major < 4:
+        body = body.replace(b'\xff\x00', b'\xff')
+
+    pos = 0
+    if flags & 0x40 and major == 3:
+        pos = 4 + struct.unpack_from('>I', body)[0]
+    elif flags & 0x40 and major == 4:
+        pos = syncsafe_int(body[:4])
+
+    frames = {}
+    id_length, header_length = (3, 6) if major == 2 else (4, 10)
+    while pos + header_length <= len(body):
+        frame_id = body[pos:pos + id_length]
+        if frame_id[0] == 0:  # Padding
+            break
+        if major == 2:
+            frame_size, frame_flags = int.from_bytes(body[pos + 3:pos + 6], 'big'), 0
+        elif major == 3:
+            frame_size, frame_flags = struct.unpack_from('>IH', body, pos + 4)
+        else:
+            frame_size, frame_flags = syncsafe_int(body[pos + 4:pos + 8]), struct.unpack_from('>H', body, pos + 8)[0]
+        payload = body[pos + header_length:pos + header_length + frame_size]
+        if len(payload) < frame_size:
+            raise HeaderParseError(f"Frame {frame_id!r} unvollständig")
+        pos += header_length + frame_size
+
+        name = frame_id.decode('latin-1')
+        name = ID3V22_FRAME_NAMES.get(name, name)
+        if name not in ID3_WANTED_FRAMES or name in frames:
+            continue
+        if major == 3:
+            if frame_flags & 0x00C0:
+                raise HeaderParseError("komprimierter/verschlüsselter Frame")
+            if frame_flags & 0x0020:
+                payload = payload[1:]
+        elif major == 4:
+            if frame_flags & 0x000C:
+                raise HeaderParseError("komprimierter/verschlüsselter Frame")
+            if frame_flags & 0x0040:
+                payload = payload[1:]
+            if frame_flags & 0x0001:
+                payload = payload[4:]
+            if frame_flags & 0x0002:
+                payload = payload.replace(b'\xff\x00', b'\xff')
+        frames[name] = payload
+    return frames, tag_end
+
+def decode_id3_text(payload):
+    """Erster Wert eines Textframes"""
+    if not payload:
+        return ''
+    encoding = ID3_TEXT_ENCODINGS.get(payload[0])
+    if encoding is None:
+        raise HeaderParseError("unbekannte Textkodierung")
+    raw = payload[1:]
+    if encoding.startswith('utf-16') and len(raw) % 2:
+        raw = raw[:-1]
+    return raw.decode(encoding).split('\x00', 1)[0].strip()
+
+def resolve_id3_genre(genre):
+    """
+    ID3v1-Genre-Referenzen auflösen (über mutagen TCON.genres):
+    '(17)' oder '17' → 'Rock', '(17)(18)' → 'Rock, Techno', '(17)Hard Rock' → 'Rock, Hard Rock'
+    """
+    if not genre:
+        return genre
+    return ', '.join(name.strip() for name in TCON(text=[genre]).genres if name.strip())
+
+def decode_id3_picture(payload, v22=False):
+    """Bilddaten aus APIC (bzw. PIC bei ID3v2.2)"""
+    terminator = b'\x00\x00' if payload[0] in (1, 2) else b'\x00'
+    if v22:
+        pos = 5  # Kodierung, Format (3), Bildtyp
+    else:
+        pos = payload.index(b'\x00', 1) + 2  # MIME-Typ + Nullbyte, Bildtyp
+    end = payload.index(terminator, pos)
+    while len(terminator) == 2 and (end - pos) % 2:
+        end = payload.index(terminator, end + 1)
+    return payload[end + len(terminator):]
+
+def parse_mpeg_frame_header(data, pos):
+    """Layer-III-Frame-Header an pos → dict oder None"""
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    version_bits = (data[pos + 1] >> 3) & 3
+    layer_bits = (data[pos + 1] >> 1) & 3
+    bitrate_index, rate_index = data[pos + 2] >> 4, (data[pos + 2] >> 2) & 3
+    if version_bits == 1 or layer_bits != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version_bits == 3
+    bitrate = (MP3_BITRATES_V1 if mpeg1 else MP3_BITRATES_V2)[bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version_bits][rate_index]
+    channels = 1 if data[pos + 3] >> 6 == 3 else 2
+    return {
+        'mpeg1': mpeg1, 'bitrate': bitrate, 'sample_rate': sample_rate, 'channels': channels,
+        'samples': 1152 if mpeg1 else 576,
+        'frame_length': (144 if mpeg1 else 72) * bitrate // sample_rate + ((data[pos + 2] >> 1) & 1),
+    }
+
+def parse_mpeg_audio_info(data, start, file_size):
+    """
+    Sucht den ersten gültigen Frame ab start und wertet Xing/Info/VBRI aus
+
+    Returns: (länge_sekunden, bitrate, sample_rate, channels)
+    """
+    pos = start
+    while True:
+        pos = data.find(b'\xff', pos, len(data) - 4)
+        if pos < 0:
+            raise HeaderParseError("kein MPEG-Frame im Dateianfang")
+        frame = parse_mpeg_frame_header(data, pos)
+        if frame:
+            next_frame = pos + frame['frame_length']
+            if next_frame + 4 > len(data) or parse_mpeg_frame_header(data, next_frame):
+                break
+        pos += 1
+
+    side_info = (32 if frame['channels'] == 2 else 17) if frame['mpeg1'] else (17 if frame['channels'] == 2 else 9)
+    xing = pos + 4 + side_info
+    frame_count = audio_bytes = 0
+    constant_bitrate = data[xing:xing + 4] == b'Info'  # LAME-CBR: Frame-Bitrate gilt
+    if data[xing:xing + 4] in (b'Xing', b'Info'):
+        xing_flags = struct.unpack_from('>I', data, xing + 4)[0]
+        field = xing + 8
+        if xing_flags & 1:
+            frame_count = struct.unpack_from('>I', data, field)[0]
+            field += 4
+        if xing_flags & 2:
+            audio_bytes = struct.unpack_from('>I', data, field)[0]
+    elif data[pos + 36:pos + 40] == b'VBRI':
+        audio_bytes, frame_count = struct.unpack_from('>II', data, pos + 46)
+
+    if frame_count:
+        length = frame_count * frame['samples'] / frame['sample_rate']
+        bitrate = frame['bitrate']
+        if length and not constant_bitrate:
+            bitrate = int((audio_bytes or file_size - pos) * 8 / length)
+    else:
+        # Kein VBR-Header: konstante Bitrate annehmen
+        length = (file_size - pos) * 8 / frame['bitrate']
+        bitrate = frame['bitrate']
+    return length, bitrate, frame['sample_rate'], frame['channels']
+
+def parse_mp3_header(file_path):
+    """Tags + Stream-Infos einer MP3 aus dem Dateianfang (Format wie read_mp3_record_uncached)"""
+    with open(file_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        data = read_mp3_prefix(f, file_size)
+    frames, tag_end = parse_id3v2_frames(data)
+    length, bitrate, sample_rate, channels = parse_mpeg_audio_info(data, tag_end, file_size)
+
+    tags = [decode_id3_text(frames.get(name, b''))
+            for name in ('TALB', 'TRCK', 'TDRC', 'TCON', 'TPE1')]
+    tags[2] = tags[2] or decode_id3_text(frames.get('TYER', b''))
+    tags[3] = resolve_id3_genre(tags[3])
+    tags[4] = tags[4] or decode_id3_text(frames.get('TPE2', b''))
+    tags.append(f"{round(length / 60, 2)} min" if length > 0 else "0 min")
+    return {
+        'tags': tags,
+        'quality': {'bitrate': bitrate, 'sample_rate': sample_rate, 'audio_channels': channels, 'audio_codec': 'mp3'}
+    }
+
+def read_mp3_cover(file_path):
+    """APIC-Bilddaten aus dem ID3v2-Tag (Bytes oder None)"""
+    with open(file_path, 'rb') as f:
+        data = read_mp3_prefix(f, os.fstat(f.fileno()).st_size)
+    frames, _ = parse_id3v2_frames(data)
+    if 'APIC' not in frames:
+        return None
+    return decode_id3_picture(frames['APIC'], v22=data[3] == 2)
+
+def read_mp3_record_uncached(file_path):
+    """MP3: schneller Header-Parser, bei defekten/ungewöhnlichen Dateien mutagen"""
+    try:
+        return parse_mp3_header(file_path)
+    except (HeaderParseError, struct.error, IndexError, ValueError, UnicodeDecodeError, ZeroDivisionError) as e:
+        print(f"MP3-Header-Parser → mutagen für {os.path.basename(file_path)}: {e}")
+    except OSError as e:
+        print(f"Fehler bei Audio-Analyse für {file_path}: {e}")
+        return {'tags': ['', '', '', '', '', "0 min"],
+                'quality': {'bitrate': 0, 'sample_rate': 0, 'audio_channels': 0, 'audio_codec': 'mp3'}}
+    return read_mp3_record_mutagen(file_path)
+
+def read_mp3_record_mutagen(file_path):
+    """
+    Liest ID3-Tags und MPEG-Stream-Infos einer MP3 über mutagen in einem Durchgang
+
+    Defekte ID3-Tags: Stream-Infos werden aus derselben geöffneten Datei gelesen
+    Returns: wie read_audio_record_uncached
     """
-    def fetch_metadata():
+    tags = ['', '', '', '', '', "0 min"]
+    quality = {'bitrate': 0, 'sample_rate': 0, 'audio_channels': 0, 'audio_codec': 'mp3'}
+    try:
+        with open(file_path, 'rb') as f:
+            try:
+                audio = MP3(f)
+                info, id3_tags = audio.info, audio.tags
+            except Exception as e:
+                print(f"Error extracting MP3 metadata from {file_path}: {e}")
+                f.seek(0)
+                info, id3_tags = MPEGInfo(f), None
+
+        length = getattr(info, 'length', 0) or 0
+        if length > 0:
+            tags[5] = f"{round(length / 60, 2)} min"
+        quality['bitrate'] = getattr(info, 'bitrate', 0) or 0
+        quality['sample_rate'] = getattr(info, 'sample_rate', 0) or 0
+        quality['audio_channels'] = getattr(info, 'channels', 0) or 0
+
+        if id3_tags is not None:
+            tags[:5] = [first_tag_value(id3_tags, keys) for keys in ID3_TAG_FIELDS]
+            tags[3] = resolve_id3_genre(tags[3])
+    except Exception as e:
+        print(f"Fehler bei Audio-Analyse für {file_path}: {e}")
+    return {'tags': tags, 'quality': quality}
+
+# === WEITERE AUDIO-FORMATE (mutagen, ohne ffprobe) ===
+# FLAC, M4A/AAC, Ogg Vorbis/Opus/FLAC und WAV - Tags und Stream-Infos in einem Lesevorgang
+MUTAGEN_AUDIO_TYPES = [FLAC, MP4, AAC, OggVorbis, OggOpus, OggFLAC, WAVE]
+MUTAGEN_AUDIO_CODECS = {FLAC: 'flac', OggFLAC: 'flac', OggVorbis: 'vorbis', OggOpus: 'opus', AAC: 'aac'}
+MP4_AUDIO_CODECS = {'mp4a.6B': 'mp3', 'mp4a.69': 'mp3', 'alac': 'alac', 'ac-3': 'ac3', 'ec-3': 'eac3'}
+
+# Tag-Namen je Format → (album, track_number, year, genre, contributors)
+VORBIS_TAG_FIELDS = (('album',), ('tracknumber',), ('date', 'year'), ('genre',), ('artist', 'albumartist', 'performer'))
+MP4_TAG_FIELDS = (('\xa9alb',), ('trkn',), ('\xa9day',), ('\xa9gen',), ('\xa9ART', 'aART'))
+ID3_TAG_FIELDS = (('TALB',), ('TRCK',), ('TDRC', 'TYER'), ('TCON',), ('TPE1', 'TPE2'))
+RIFF_INFO_TAG_FIELDS = (('album',), ('track',), ('date',), ('genre',), ('artist',))
+
+def is_audio_file(file_path):
+    return file_path.lower().endswith(AUDIO_EXTENSIONS)
+
+def first_tag_value(tags, keys):
+    """Erster nicht-leerer Wert (mutagen liefert Listen bzw. ID3-Frames)"""
+    for key in keys:
         try:
-            audio = MP3(file_path, ID3=ID3)
-            tags = audio.tags
+            value = tags.get(key)
+        except (KeyError, ValueError):
+            value = None
+        if value is None:
+            continue
+        if hasattr(value, 'text'):
+            value = value.text
+        if isinstance(value, (list, tuple)):
+            value = value[0] if value else ''
+        if isinstance(value, tuple):  # MP4 trkn: (nummer, gesamt)
+            value = value[0]
+        value = str(value).strip()
+        if value:
+            return value
+    return ''
+
+def read_riff_info_tags(file_path):
+    """RIFF-LIST-INFO einer WAV-Datei (liest mutagen nicht) → dict wie AVI_INFO_TAGS"""
+    tags = {}
+    with open(file_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            return tags
+        pos = 12
+        while pos + 12 <= file_size:
+            f.seek(pos)
+            chunk_id, size, list_type = struct.unpack('<4sI4s', f.read(12))
+            if chunk_id == b'LIST' and list_type == b'INFO' and size <= HEADER_PARSER_MAX_BYTES:
+                data = f.read(size - 4)
+                for child_id, child_start, child_end in iter_riff_chunks(data, 0, len(data)):
+                    if child_id in AVI_INFO_TAGS:
+                        tags[AVI_INFO_TAGS[child_id]] = decode_tag_text(data[child_start:child_end])
+                break
+            pos += 8 + size + (size & 1)
+    return tags
 
-            length = "0 min"
-            if hasattr(audio, 'info') and audio.info and hasattr(audio.info, 'length'):
+def read_wave_subformat(file_path):
+    """
+    WAVE_FORMAT_EXTENSIBLE (0xFFFE): eigentlicher Format-Tag aus der SubFormat-GUID
+    des fmt-Chunks (mutagen liest nur die ersten 16 Bytes). Returns: Format-Tag oder None
+    """
+    with open(file_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            return None
+        pos = 12
+        while pos + 8 <= file_size:
+            f.seek(pos)
+            chunk_id, size = struct.unpack('<4sI', f.read(8))
+            if chunk_id == b'fmt ':
+                fmt = f.read(min(size, 40))
+                return struct.unpack_from('<H', fmt, 24)[0] if len(fmt) >= 26 else None
+            pos += 8 + size + (size & 1)
+    return None
+
+def read_audio_record_uncached(file_path):
+    """
+    Liest ein Nicht-MP3-Audioformat über den passenden mutagen-Reader
+
+    Returns: {'tags': [album, track_number, year, genre, contributors, length],
+              'quality': {'bitrate', 'sample_rate', 'audio_channels', 'audio_codec'}}
+    """
+    tags = ['', '', '', '', '', "0 min"]
+    quality = {'bitrate': 0, 'sample_rate': 0, 'audio_channels': 0, 'audio_codec': ''}
+    try:
+        audio = mutagen.File(file_path, options=MUTAGEN_AUDIO_TYPES)
+        if audio is None:
+            print(f"Unbekanntes Audioformat: {file_path}")
+            return {'tags': tags, 'quality': quality}
+
+        info = audio.info
+        length = getattr(info, 'length', 0) or 0
+        if length > 0:
+            tags[5] = f"{round(length / 60, 2)} min"
+
+        if isinstance(audio, MP4):
+            codec = getattr(info, 'codec', '')
+            quality['audio_codec'] = MP4_AUDIO_CODECS.get(codec, 'aac' if codec.startswith('mp4a') else codec)
+        elif isinstance(audio, WAVE):
+            bits = getattr(info, 'bits_per_sample', 16)
+            format_tag = getattr(info, 'audio_format', 0x0001)
+            if format_tag == 0xFFFE:
+                format_tag = read_wave_subformat(file_path) or 0x0001
+            if format_tag == 0x0003:  # IEEE-Float wie bei AVI
+                quality['audio_codec'] = 'pcm_f64le' if bits == 64 else 'pcm_f32le'
+            else:
+                quality['audio_codec'] = 'pcm_u8' if bits == 8 else f"pcm_s{bits}le"
+        else:
+            quality['audio_codec'] = MUTAGEN_AUDIO_CODECS.get(type(audio), '')
+        quality['sample_rate'] = getattr(info, 'sample_rate', 0) or (48000 if isinstance(audio, OggOpus) else 0)
+        quality['audio_channels'] = getattr(info, 'channels', 0)
+        quality['bitrate'] = int(getattr(info, 'bitrate', 0) or 0)
+        if not quality['bitrate'] and length > 0:
+            quality['bitrate'] = int(os.path.getsize(file_path) * 8 / length)
+
+        file_tags = audio.tags
+        if isinstance(audio, MP4):
+            fields = MP4_TAG_FIELDS
+        elif isinstance(audio, (WAVE, AAC)):
+            # WAV: ID3-Chunk bevorzugt, sonst RIFF INFO; AAC (ADTS): nur ID3 möglich
+            fields = ID3_TAG_FIELDS
+            if file_tags is None and isinstance(audio, AAC):
                 try:
-                    length = f"{round(audio.info.length / 60, 2)} min"
-                except:
-                    pass
+                    file_tags = ID3(file_path)
+                except Exception:
+                    file_tags = None
+            if file_tags is None and isinstance(audio, WAVE):
+                file_tags = read_riff_info_tags(file_path)
+                fields = RIFF_INFO_TAG_FIELDS
+        else:
+            fields = VORBIS_TAG_FIELDS
+        if file_tags:
+            tags[:5] = [first_tag_value(file_tags, keys) for keys in fields]
+            if fields is ID3_TAG_FIELDS:
+                tags[3] = resolve_id3_genre(tags[3])
+    except Exception as e:
+        print(f"Fehler beim Lesen der Audio-Metadaten von {file_path}: {e}")
+    return {'tags': tags, 'quality': quality}
 
-            if tags is None:
-                return '', '', '', '', '', length
+def get_audio_record(file_path, timeout=5):
+    """
+    Tags + Qualität einer Audiodatei in einem Lesevorgang (mit Analyse-Cache)
 
-            album = tags.get("TALB").text[0] if tags.get("TALB") else ''
-            track_number = tags.get("TRCK").text[0] if tags.get("TRCK") else ''
-            year = str(tags.get("TDRC").text[0]) if tags.get("TDRC") else ''
-            genre = tags.get("TCON").text[0] if tags.get("TCON") else ''
-            contributors = tags.get("TPE1").text[0] if tags.get("TPE1") else ''
-            
-            return album, track_number, year, genre, contributors, length
-            
-        except Exception as e:
-            print(f"Error extracting MP3 metadata from {file_path}: {e}")
-            try:
-                audio = MP3(file_path)
-                if hasattr(audio, 'info') and audio.info and hasattr(audio.info, 'length'):
-                    length = f"{round(audio.info.length / 60, 2)} min"
-                else:
-                    length = "0 min"
-            except:
-                length = "0 min"
-            
-            return '', '', '', '', '', length
+    Der Lesevorgang läuft im gemeinsamen Pool mit Timeout - hängt er, gibt es leere Werte
+    """
+    if file_path.lower().endswith('.mp3'):
+        kind, reader, codec = 'mp3_record', read_mp3_record_uncached, 'mp3'
+    else:
+        kind, reader, codec = 'audio_record', read_audio_record_uncached, ''
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future = executor.submit(fetch_metadata)
-        try:
-            return future.result(timeout=timeout)
-        except concurrent.futures.TimeoutError:
-            print(f"Datei '{file_path}' überschritt den Zeitrahmen und wird übersprungen.")
-            return '', '', '', '', '', "0 min"
+    def read_record():
+        record = read_with_timeout(reader, file_path, timeout)
+        if record is None:
+            record = {'tags': ['', '', '', '', '', "0 min"],
+                      'quality': {'bitrate': 0, 'sample_rate': 0, 'audio_channels': 0, 'audio_codec': codec}}
+        return record
+
+    return cached_probe(file_path, kind, read_record,
+                        store_if=lambda record: record['quality']['sample_rate'] > 0)
+
+def get_audio_metadata(file_path):
+    """
+    Audio-Tags für alle Audioformate
+
+    Returns: (album, track_number, year, genre, contributors, length)
+    """
+    return tuple(get_audio_record(file_path)['tags'])
+
+def read_embedded_audio_cover(file_path):
+    """Eingebettetes Cover aus FLAC/M4A/Ogg/WAV (Bytes oder None)"""
+    audio = mutagen.File(file_path, options=MUTAGEN_AUDIO_TYPES)
+    if audio is None:
+        return None
+    if getattr(audio, 'pictures', None):  # FLAC
+        return audio.pictures[0].data
+    tags = audio.tags
+    if not tags:
+        return None
+    if isinstance(audio, MP4):
+        covers = tags.get('covr')
+        return bytes(covers[0]) if covers else None
+    if isinstance(audio, (OggVorbis, OggOpus, OggFLAC)):
+        for encoded in tags.get('metadata_block_picture', []):
+            try:
+                return Picture(base64.b64decode(encoded)).data
+            except Exception:
+                continue
+        return None
+    for frame in tags.values():  # ID3 in WAV
+        if isinstance(frame, APIC):
+            return frame.data
+    return None
 
 def get_enhanced_metadata(file_path):
     """
     Einheitliche Metadaten-Extraktion für alle Dateitypen
     
     Returns: (primary, secondary, tertiary, year, length, path_meta, media_type)
-    - MP3: (album, contributors, track_number, year, length, path_meta, media_type)
+    - Audio: (album, contributors, track_number, year, length, path_meta, media_type)
     - Video: (genre, actors, comment, year, length, path_meta, media_type)
     """
     path_meta = classify_path_dynamic(file_path)
     
-    if file_path.lower().endswith('.mp3'):
-        album, track_number, year, genre, contributors, length = get_mp3_metadata_with_timeout(file_path)
+    if is_audio_file(file_path):
+        album, track_number, year, genre, contributors, length = get_audio_metadata(file_path)
         
         if not album:
             album = path_meta.get('sub_genre') or path_meta.get('album') or path_meta.get('genre') or ''
@@ -1092,7 +2515,8 @@ def get_enhanced_metadata(file_path):
         return album, contributors, track_number, year, length, path_meta, media_type
 
     else:
-        genre, actors, comment, year = get_media_metadata_hidden(file_path)
+        probe = probe_media_headers_for_display(file_path)
+        genre, actors, comment, year = extract_video_tags(probe)
         
         if not genre:
             genre = path_meta.get('genre') or path_meta.get('sub_genre') or path_meta.get('main_category') or ''
@@ -1106,7 +2530,7 @@ def get_enhanced_metadata(file_path):
         if genre and ',' in genre:
             genre = genre.split(',')[0].strip()
         
-        length = get_media_duration(file_path)
+        length = extract_media_duration(probe)
         if not length or length == "Unbekannt" or length.strip() == "":
             length = "0 min"
         
@@ -1200,112 +2624,658 @@ def open_folder():
         search_active = False
         save_last_directory(folder_path)
         update_display()
+        restart_library_watcher()
 
 def natural_sort_key(s):
     return [int(text) if text.isdigit() else text.lower()
             for text in re.split('(\d+)', s)]
 
 def search_files_recursive(path, media_extensions, playlist_extensions, search_results):
-    stack = [path]
-    while stack:
-        current_path = stack.pop()
-        try:
-            entries = os.listdir(current_path)
-        except PermissionError:
-            continue
-        
-        for entry in entries:
-            entry_path = os.path.join(current_path, entry)
-            if os.path.isdir(entry_path):
-                stack.append(entry_path)
-            elif entry.lower().endswith(media_extensions) or entry.lower().endswith(playlist_extensions):
-                search_results.append(entry_path)
-
-def perform_search():
-    """
-    BEREINIGT: Ohne Diagnose-Button und überflüssige Meldungen
-    """
-    search_term = search_entry.get()
+    """Dateisystem-Suche über den gemeinsamen Verzeichnis-Walker"""
+    extensions = tuple(media_extensions) + tuple(playlist_extensions)
+    for record in walk_media_files(path, extensions, trust_snapshots=True):
+        search_results.append(record.path)
+    search_results.sort()
+
+# bm25-Gewicht je Suchfeld (höher = Treffer zählt mehr) - nicht angehakte Felder werden nicht durchsucht
+SEARCH_FIELD_WEIGHTS = {
+    'filename': 10.0,
+    'container': 8.0,
+    'genre': 3.0,
+    'actors': 5.0,
+    'comment': 1.0,
+    'album': 5.0,
+    'contributors': 6.0
+}
 
-    if folder_path and search_term:
-        media_extensions = ('.mp3', '.mp4', '.mkv', '.avi', '.flv', '.mov', '.wmv')
-        search_results = []
+def media_fts_available(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'media_fts'").fetchone() is not None
 
-        if use_db_var.get():
-            try:
-                conn = sqlite3.connect('media_index.db')
-                cursor = conn.cursor()
+def build_fts_match(search_term, columns):
+    """FTS5-Ausdruck: jedes Wort als Präfix, alle Wörter müssen vorkommen - None ohne verwertbare Wörter"""
+    words = re.findall(r'\w+', search_term)
+    if not words:
+        return None
+    terms = ' '.join(f'"{word}"*' for word in words)
+    return f"{{{' '.join(columns)}}} : ({terms})"
 
-                # Normalisiere Pfad für Windows (Backslashes)
-                normalized_search_path = os.path.normpath(folder_path)
-                sql_search_path = normalized_search_path.replace('\\', '\\\\')
-                
-                # Debug-Output
-                print(f"\n=== SUCHE GESTARTET ===")
-                print(f"Suchbegriff: '{search_term}'")
-                print(f"Ordner (Normalisiert): {normalized_search_path}")
+def search_media_fts(conn, search_term, columns, scope_path):
+    """
+    Volltext-Suche im Ordner scope_path, sortiert nach Relevanz (bm25 mit SEARCH_FIELD_WEIGHTS)
 
-                # Basis-Query mit ESCAPE für Backslashes
-                query = "SELECT filepath FROM media_files WHERE filepath LIKE ? ESCAPE '\\' AND (1=0"
-                params = [f"{sql_search_path}%"]
+    Returns: Liste von Pfaden - None, wenn der Suchbegriff keine Wörter enthält
+    """
+    match = build_fts_match(search_term, columns)
+    if match is None:
+        return None
+    weights = ', '.join(str(SEARCH_FIELD_WEIGHTS[column] if column in columns else 0.0)
+                        for column in MEDIA_FTS_COLUMNS)
+    in_scope, scope_params = path_prefix_filter(scope_path, 'm.filepath')
+    rows = conn.execute(f"""
+        SELECT m.filepath FROM media_fts
+        JOIN media_files m ON m.id = media_fts.rowid
+        WHERE media_fts MATCH ? AND {in_scope}
+        ORDER BY bm25(media_fts, {weights})
+    """, (match, *scope_params)).fetchall()
+    return [row[0] for row in rows]
+
+# === FEHLERTOLERANTE SUCHE ===
+# Trigramm-Index über das Vokabular des Volltext-Index: Tippfehler finden ähnliche Wörter
+FUZZY_VOCAB_COLUMNS = ('filename', 'container', 'actors', 'album', 'contributors')  # Titel, Künstler, Alben
+FUZZY_MIN_SIMILARITY = 0.35   # Mindest-Ähnlichkeit (Jaccard der Trigramme) für eine Korrektur
+FUZZY_MAX_CANDIDATES = 5      # Korrekturen pro Suchwort
+FUZZY_CANDIDATE_POOL = 200    # Vorauswahl per Trigramm-Überlappung vor dem genauen Ranking
+FUZZY_RESULT_LIMIT = 2000     # Treffer der fehlertoleranten Suche (nach Relevanz)
+FUZZY_REFRESH_INTERVAL = 300  # Sekunden - Live-Updates gleichen höchstens so oft ab
+fuzzy_refresh_lock = threading.Lock()
+fuzzy_refresh_future = None   # zuletzt eingeplanter Abgleich
+fuzzy_refresh_timer = None    # nachgeholter Abgleich nach gedrosselten Anfragen
+fuzzy_refresh_started = 0.0   # Startzeit des letzten Abgleichs
+
+def normalize_search_words(text):
+    """Wörter wie der FTS-Tokenizer (unicode61 remove_diacritics): klein, ohne Akzente, ohne Trennzeichen"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return re.findall(r'[^\W_]+', stripped)
+
+@lru_cache(maxsize=65536)
+def word_trigrams(word):
+    """Trigramme mit Rand-Markierung (wie pg_trgm) - auch kurze Wörter haben so mehrere Trigramme"""
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def trigram_similarity(first, second):
+    if not first or not second:
+        return 0.0
+    shared = len(first & second)
+    return shared / (len(first) + len(second) - shared)
+
+def ensure_fuzzy_index(conn):
+    """Vokabular-Sicht auf media_fts und Trigramm-Tabellen (nur mit FTS5)"""
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS media_fts_vocab USING fts5vocab(media_fts, 'col')")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fuzzy_terms (
+            id INTEGER PRIMARY KEY,
+            term TEXT UNIQUE NOT NULL,
+            trigram_count INTEGER NOT NULL
+        )""")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fuzzy_trigrams (
+            trigram TEXT NOT NULL,
+            term_id INTEGER NOT NULL,
+            PRIMARY KEY (trigram, term_id)
+        ) WITHOUT ROWID""")
+
+def refresh_fuzzy_index(conn):
+    """
+    Gleicht fuzzy_terms mit dem Vokabular des Volltext-Index ab (läuft im DB-Writer).
+    Nur neue und verschwundene Wörter werden angefasst. Returns: (neu, entfernt)
+    """
+    global fuzzy_refresh_started
+    fuzzy_refresh_started = time.time()
+    if not media_fts_available(conn):
+        return 0, 0
+    ensure_fuzzy_index(conn)
+    placeholders = ','.join('?' * len(FUZZY_VOCAB_COLUMNS))
+    # Reine Zahlen (Jahre, Track-Nummern) und Einzelzeichen taugen nicht als Korrektur.
+    # Das Vokabular wird nur einmal gelesen - jeder Durchlauf liest den ganzen Volltext-Index
+    vocabulary = {row[0] for row in conn.execute(f"""
+        SELECT DISTINCT term FROM media_fts_vocab
+        WHERE col IN ({placeholders}) AND length(term) > 1 AND term GLOB '*[^0-9]*'
+    """, FUZZY_VOCAB_COLUMNS)}
+    known = dict(conn.execute("SELECT term, id FROM fuzzy_terms"))
+    added = vocabulary.difference(known)
+    removed = [(term_id, term) for term, term_id in known.items() if term not in vocabulary]
+
+    for term_id, term in removed:
+        conn.executemany("DELETE FROM fuzzy_trigrams WHERE trigram = ? AND term_id = ?",
+                         [(trigram, term_id) for trigram in word_trigrams(term)])
+    conn.executemany("DELETE FROM fuzzy_terms WHERE id = ?", [(term_id,) for term_id, _ in removed])
+
+    for term in added:
+        trigrams = word_trigrams(term)
+        term_id = conn.execute("INSERT INTO fuzzy_terms (term, trigram_count) VALUES (?, ?)",
+                               (term, len(trigrams))).lastrowid
+        conn.executemany("INSERT INTO fuzzy_trigrams (trigram, term_id) VALUES (?, ?)",
+                         [(trigram, term_id) for trigram in trigrams])
+    if added or removed:
+        print(f"Fehlertolerante Suche: {len(added)} Wörter neu, {len(removed)} entfernt")
+    return len(added), len(removed)
+
+def schedule_fuzzy_index_refresh(throttled=False):
+    """
+    Abgleich im Writer einplanen - mehrfache Anfragen vor dem Lauf werden zusammengefasst.
+    Läuft der Abgleich schon, wird ein neuer eingeplant (er sieht die Wörter der Zwischenzeit nicht)
+
+    throttled: Live-Updates (Watcher, Detail-Analyse) - der Abgleich liest das ganze Vokabular
+    und hält dabei den Writer auf, daher höchstens alle FUZZY_REFRESH_INTERVAL Sekunden;
+    eine frühere Anfrage wird per Timer nachgeholt
+    Returns: Future oder None, wenn bereits ein Abgleich wartet bzw. nachgeholt wird
+    """
+    global fuzzy_refresh_future, fuzzy_refresh_timer
+    with fuzzy_refresh_lock:
+        # running()/done(): vom Writer übernommen, fertig oder verworfen
+        future = fuzzy_refresh_future
+        if future is not None and not future.running() and not future.done():
+            return None
+        if throttled:
+            delay = fuzzy_refresh_started + FUZZY_REFRESH_INTERVAL - time.time()
+            if delay > 0:
+                if fuzzy_refresh_timer is None:
+                    fuzzy_refresh_timer = threading.Timer(delay, run_deferred_fuzzy_refresh)
+                    fuzzy_refresh_timer.daemon = True
+                    fuzzy_refresh_timer.start()
+                return None
+        # Der jetzt eingeplante Abgleich deckt auch die aufgeschobenen Anfragen ab
+        if fuzzy_refresh_timer is not None:
+            fuzzy_refresh_timer.cancel()
+            fuzzy_refresh_timer = None
+        fuzzy_refresh_future = db_writer.submit(refresh_fuzzy_index)
+        return fuzzy_refresh_future
+
+def run_deferred_fuzzy_refresh():
+    """Timer: aufgeschobenen Abgleich nachholen"""
+    global fuzzy_refresh_timer
+    with fuzzy_refresh_lock:
+        fuzzy_refresh_timer = None
+    schedule_fuzzy_index_refresh(throttled=True)
+
+def fuzzy_index_ready(conn):
+    """
+    Trigramm-Index vorhanden und befüllt - sonst Aufbau im Writer einplanen und (noch) nicht verwenden
+    Läuft im GUI-Thread: bis der Index steht, liefert die Suche normale FTS/LIKE-Treffer
+    """
+    if not media_fts_available(conn):
+        return False
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fuzzy_terms'").fetchone():
+        if conn.execute("SELECT 1 FROM fuzzy_terms LIMIT 1").fetchone():
+            return True
+    schedule_fuzzy_index_refresh()
+    return False
+
+def find_similar_terms(conn, word, limit=FUZZY_MAX_CANDIDATES):
+    """
+    Ähnliche Wörter aus dem Trigramm-Index: Vorauswahl nach gemeinsamen Trigrammen,
+    Ranking nach Jaccard-Ähnlichkeit. Returns: Liste von (Wort, Ähnlichkeit), beste zuerst
+    """
+    trigrams = word_trigrams(word)
+    # Jaccard >= s geht nur, wenn die Trigramm-Anzahl höchstens um den Faktor 1/s abweicht
+    min_count = int(len(trigrams) * FUZZY_MIN_SIMILARITY)
+    max_count = int(len(trigrams) / FUZZY_MIN_SIMILARITY) + 1
+    placeholders = ','.join('?' * len(trigrams))
+    rows = conn.execute(f"""
+        SELECT t.term, t.trigram_count, COUNT(*) AS shared
+        FROM fuzzy_trigrams g JOIN fuzzy_terms t ON t.id = g.term_id
+        WHERE g.trigram IN ({placeholders}) AND t.trigram_count BETWEEN ? AND ?
+        GROUP BY g.term_id
+        ORDER BY shared DESC
+        LIMIT ?
+    """, [*trigrams, min_count, max_count, FUZZY_CANDIDATE_POOL]).fetchall()
+    scored = [(term, shared / (len(trigrams) + count - shared)) for term, count, shared in rows]
+    scored = [item for item in scored if item[1] >= FUZZY_MIN_SIMILARITY]
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:limit]
+
+def score_fuzzy_text(text, word_candidates):
+    """Relevanz eines Treffers: je Suchwort die Ähnlichkeit des besten enthaltenen Wortes"""
+    tokens = set(normalize_search_words(text))
+    score = 0.0
+    for word, candidates in word_candidates:
+        best = 1.0 if any(token.startswith(word) for token in tokens) else 0.0
+        for term, similarity in candidates:
+            if similarity > best and term in tokens:
+                best = similarity
+        score += best
+    return score
+
+def search_media_fuzzy(conn, search_term, columns, scope_path):
+    """
+    Fehlertolerante Volltext-Suche: jedes Suchwort passt als Präfix oder über ein ähnliches Wort
+    aus dem Trigramm-Index. Sortiert nach Ähnlichkeit, bei Gleichstand nach bm25.
+    Returns: Liste von Pfaden - None ohne Wörter oder ohne Trigramm-Index
+    """
+    words = normalize_search_words(search_term)
+    if not words or not fuzzy_index_ready(conn):
+        return None
+    word_candidates = [(word, find_similar_terms(conn, word)) for word in words]
+    groups = []
+    for word, candidates in word_candidates:
+        alternatives = [f'"{word}"*'] + [f'"{term}"' for term, _ in candidates if term != word]
+        groups.append(f"({' OR '.join(alternatives)})")
+    match = f"{{{' '.join(columns)}}} : ({' AND '.join(groups)})"
+
+    weights = ', '.join(str(SEARCH_FIELD_WEIGHTS[column] if column in columns else 0.0)
+                        for column in MEDIA_FTS_COLUMNS)
+    selected = ', '.join(f"coalesce(m.{column}, '')" for column in columns)
+    in_scope, scope_params = path_prefix_filter(scope_path, 'm.filepath')
+    rows = conn.execute(f"""
+        SELECT m.filepath, {selected} FROM media_fts
+        JOIN media_files m ON m.id = media_fts.rowid
+        WHERE media_fts MATCH ? AND {in_scope}
+        ORDER BY bm25(media_fts, {weights})
+        LIMIT ?
+    """, (match, *scope_params, FUZZY_RESULT_LIMIT)).fetchall()
+    # sort() ist stabil: bei gleicher Ähnlichkeit bleibt die bm25-Reihenfolge
+    ranked = [(score_fuzzy_text(' '.join(row[1:]), word_candidates), row[0]) for row in rows]
+    ranked.sort(key=lambda item: -item[0])
+    return [filepath for _, filepath in ranked]
+
+def suggest_search_correction(conn, search_term):
+    """'Meinten Sie ...': jedes unbekannte Suchwort durch das ähnlichste bekannte ersetzen - None ohne Änderung"""
+    words = normalize_search_words(search_term)
+    if not words or not fuzzy_index_ready(conn):
+        return None
+    corrected = []
+    for word in words:
+        known = conn.execute("SELECT 1 FROM fuzzy_terms WHERE term >= ? AND term < ? LIMIT 1",
+                             (word, word + '\uffff')).fetchone()
+        candidates = [] if known else find_similar_terms(conn, word, limit=1)
+        corrected.append(candidates[0][0] if candidates else word)
+    return ' '.join(corrected) if corrected != words else None
+
+def fuzzy_filter_paths(paths, search_term):
+    """
+    Dateisystem-Modus: Dateinamen nach Trigramm-Ähnlichkeit zum Suchbegriff filtern und sortieren.
+    Returns: (Pfade, beste Korrektur des Suchbegriffs oder None)
+    """
+    words = normalize_search_words(search_term)
+    if not words:
+        return [], None
+    query_trigrams = [word_trigrams(word) for word in words]
+    ranked = []
+    best_correction, best_score = None, 0.0
+    for path in paths:
+        tokens = set(normalize_search_words(os.path.splitext(os.path.basename(path))[0]))
+        if not tokens:
+            continue
+        score = 0.0
+        matches = []
+        for word, trigrams in zip(words, query_trigrams):
+            similarity, token = max((trigram_similarity(trigrams, word_trigrams(token)), token) for token in tokens)
+            if similarity < FUZZY_MIN_SIMILARITY:
+                break
+            score += similarity
+            matches.append(token)
+        else:
+            ranked.append((score, path))
+            if score > best_score:
+                best_correction, best_score = ' '.join(matches), score
+    ranked.sort(key=lambda item: -item[0])
+    if best_correction == ' '.join(words):
+        best_correction = None
+    return [path for _, path in ranked], best_correction
+
+def show_search_suggestion(suggestion):
+    """Klickbaren 'Meinten Sie ...'-Hinweis unter dem Suchfeld zeigen (None blendet ihn aus)"""
+    if not suggestion:
+        suggestion_label.config(text="")
+        suggestion_label.grid_remove()
+        return
+    suggestion_label.config(text=f"Meinten Sie: {suggestion}?")
+    suggestion_label.suggestion = suggestion
+    suggestion_label.grid()
+
+def apply_search_suggestion(event=None):
+    suggestion = getattr(suggestion_label, 'suggestion', None)
+    if suggestion:
+        search_entry.delete(0, tk.END)
+        search_entry.insert(0, suggestion)
+        perform_search()
+
+# === SUCHSPRACHE ===
+# Feld-Abfragen im Suchfeld, z.B. genre:action year:1990..1999 res:>=1080 dur:>120 codec:hevc -genre:horror
+# Zahlenwerte stehen als Text in der DB - diese Ausdrücke haben eigene Indizes (MEDIA_INDEXES)
+YEAR_NUMBER_SQL = "CAST(substr(year, 1, 4) AS INTEGER)"
+DURATION_MINUTES_SQL = "CAST(REPLACE(REPLACE(length, ' min', ''), 'min', '') AS REAL)"
+# Bildzeilen der Auflösungsklasse: 1920x800 (Cinemascope) zählt wie 1920x1080 als 1080
+VIDEO_LINES_SQL = ("max(CAST(substr(resolution, instr(resolution, 'x') + 1) AS INTEGER), "
+                   "CAST(substr(resolution, 1, instr(resolution, 'x') - 1) AS INTEGER) * 9 / 16)")
+
+# Wort-/Phrasensuche über media_fts (ohne FTS5 per LIKE)
+QUERY_TEXT_FIELDS = {
+    'title': ('filename', 'container'),
+    'genre': ('genre',),
+    'actor': ('actors',),
+    'album': ('album',),
+    'artist': ('contributors',),
+    'comment': ('comment',),
+}
+# Feld -> (SQL-Ausdruck, Faktor je Einheit; '' = ohne Einheit)
+QUERY_NUMBER_FIELDS = {
+    'year': (YEAR_NUMBER_SQL, {'': 1}),
+    'dur': (DURATION_MINUTES_SQL, {'': 1, 'm': 1, 'min': 1, 'h': 60}),
+    'res': (VIDEO_LINES_SQL, {'': 1, 'p': 1, 'k': 540}),
+    'size': ('file_size', {'': 1024 ** 2, 'k': 1024, 'kb': 1024, 'm': 1024 ** 2, 'mb': 1024 ** 2,
+                           'g': 1024 ** 3, 'gb': 1024 ** 3, 't': 1024 ** 4, 'tb': 1024 ** 4}),
+    'bitrate': ('bitrate', {'': 1000, 'k': 1000, 'kbps': 1000, 'm': 1000000, 'mbps': 1000000}),
+    'fps': ('fps', {'': 1}),
+    'channels': ('audio_channels', {'': 1}),
+}
+# Exakter Vergleich (Kategorie als Präfix: cat:film findet "Filme")
+QUERY_EXACT_FIELDS = {
+    'cat': ('category',),
+    'codec': ('video_codec', 'audio_codec'),
+    'vcodec': ('video_codec',),
+    'acodec': ('audio_codec',),
+    'ext': ('filepath',),
+}
+QUERY_FIELD_ALIASES = {
+    'titel': 'title', 'name': 'title', 'actors': 'actor', 'darsteller': 'actor', 'interpret': 'artist',
+    'kommentar': 'comment', 'jahr': 'year', 'dauer': 'dur', 'duration': 'dur', 'length': 'dur',
+    'resolution': 'res', 'auflösung': 'res', 'größe': 'size', 'groesse': 'size', 'kanäle': 'channels',
+    'category': 'cat', 'kategorie': 'cat',
+}
+CODEC_ALIASES = {'h265': 'hevc', 'x265': 'hevc', 'x264': 'h264', 'avc': 'h264', 'xvid': 'mpeg4', 'divx': 'mpeg4'}
+QUERY_DEFAULT_TEXT_COLUMNS = ('filename', 'container')
+
+QueryToken = namedtuple('QueryToken', ['kind', 'field', 'value', 'negated', 'quoted'])
+SearchQueryPlan = namedtuple('SearchQueryPlan', ['where', 'params'])
+QUERY_TOKEN_PATTERN = re.compile(r'(-?)\(|\)|(-?)(?:(\w+):)?("[^"]*"?|[^\s()"]+)')
+
+def resolve_query_field(name):
+    name = name.lower()
+    name = QUERY_FIELD_ALIASES.get(name, name)
+    if name in QUERY_TEXT_FIELDS or name in QUERY_NUMBER_FIELDS or name in QUERY_EXACT_FIELDS:
+        return name
+    return None
+
+def is_structured_query(search_term):
+    """Feld-Abfrage statt einfacher Suche: bekanntes Feld (genre:...) oder OR/AND/NOT"""
+    for match in re.finditer(r'(?:^|[\s(])-?(\w+):\S', search_term):
+        if resolve_query_field(match.group(1)):
+            return True
+    return re.search(r'(?:^|\s)(OR|AND|NOT)\s', search_term) is not None
+
+def tokenize_search_query(query):
+    tokens = []
+    for match in QUERY_TOKEN_PATTERN.finditer(query):
+        text = match.group()
+        if text.endswith('('):
+            if match.group(1):
+                tokens.append(QueryToken('NOT', None, None, False, False))
+            tokens.append(QueryToken('(', None, None, False, False))
+            continue
+        if text == ')':
+            tokens.append(QueryToken(')', None, None, False, False))
+            continue
+        negated, name, value = bool(match.group(2)), match.group(3), match.group(4)
+        quoted = value.startswith('"')
+        value = value.strip('"')
+        field = resolve_query_field(name) if name else None
+        if name and field is None:
+            # Unbekanntes Feld ("Star Trek:Voyager") bleibt normaler Suchtext
+            value = f"{name}:{value}"
+        if field is None and not negated and not quoted and value in ('OR', 'AND', 'NOT'):
+            tokens.append(QueryToken(value, None, None, False, False))
+        else:
+            tokens.append(QueryToken('TERM', field, value, negated, quoted))
+    return tokens
+
+def parse_query_number(field, text):
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([a-z]*)', text.strip().lower())
+    units = QUERY_NUMBER_FIELDS[field][1]
+    if not match or match.group(2) not in units:
+        raise ValueError(f"Ungültiger Wert für {field}: '{text}'")
+    value = float(match.group(1)) * units[match.group(2)]
+    return int(value) if value.is_integer() else value
+
+def escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def compile_query_term(token, text_columns, fts_available, params):
+    """Ein Suchwort oder feld:wert als SQL-Bedingung - Parameter werden an params angehängt"""
+    field, value = token.field, token.value
+    if field is None or field in QUERY_TEXT_FIELDS:
+        columns = text_columns if field is None else QUERY_TEXT_FIELDS[field]
+        words = re.findall(r'\w+', value)
+        if not words:
+            if field is None:
+                return None
+            raise ValueError(f"Kein Suchwort für {field}")
+        if fts_available:
+            # Feld-Werte als Phrase, freie Wörter als Präfix - "wert*" erzwingt Präfix auch im Feld
+            if token.quoted or (field is not None and not value.endswith('*')):
+                terms = '"' + ' '.join(words) + '"'
+            else:
+                terms = ' '.join(f'"{word}"*' for word in words)
+            params.append(f"{{{' '.join(columns)}}} : ({terms})")
+            return "id IN (SELECT rowid FROM media_fts WHERE media_fts MATCH ?)"
+        params.extend(f"%{escape_like(value.rstrip('*'))}%" for _ in columns)
+        return '(' + ' OR '.join(f"{column} LIKE ? ESCAPE '\\'" for column in columns) + ')'
+
+    if field in QUERY_NUMBER_FIELDS:
+        expression = QUERY_NUMBER_FIELDS[field][0]
+        if '..' in value:
+            low, high = value.split('..', 1)
+            if low and high:
+                params.extend((parse_query_number(field, low), parse_query_number(field, high)))
+                return f"{expression} BETWEEN ? AND ?"
+            if not low and not high:
+                raise ValueError(f"Ungültiger Bereich für {field}: '{value}'")
+            params.append(parse_query_number(field, low or high))
+            return f"{expression} {'>=' if low else '<='} ?"
+        operator, number = re.match(r'(>=|<=|>|<|=)?(.*)', value).groups()
+        params.append(parse_query_number(field, number))
+        return f"{expression} {operator or '='} ?"
+
+    columns = QUERY_EXACT_FIELDS[field]
+    value = value.lower()
+    if field == 'cat':
+        # Präfix-LIKE nutzt idx_category_nocase
+        params.append(escape_like(value) + '%')
+        return "category LIKE ? ESCAPE '\\'"
+    if field == 'ext':
+        # Suffix-LIKE kann keinen Index nutzen - eingegrenzt wird über die übrigen Bedingungen.
+        # LIKE ignoriert Groß-/Kleinschreibung (ASCII), ext:mkv findet also auch .MKV
+        params.append('%.' + escape_like(value.lstrip('.')))
+        return "filepath LIKE ? ESCAPE '\\'"
+    value = CODEC_ALIASES.get(value, value)
+    params.extend(value for _ in columns)
+    return '(' + ' OR '.join(f"{column} = ?" for column in columns) + ')'
+
+@lru_cache(maxsize=256)
+def compile_search_query(query, text_columns, fts_available):
+    """
+    Übersetzt eine Feld-Abfrage in eine parametrisierte WHERE-Bedingung (gecacht je Suchbegriff).
+    Leerzeichen = UND, OR bindet schwächer, NOT/-feld:wert verneint, Klammern gruppieren.
+    Raises: ValueError bei ungültigen Werten oder Klammern
+    """
+    tokens = deque(tokenize_search_query(query))
+    params = []
+
+    def parse_or():
+        parts = [parse_and()]
+        while tokens and tokens[0].kind == 'OR':
+            tokens.popleft()
+            parts.append(parse_and())
+        parts = [part for part in parts if part]
+        if len(parts) <= 1:
+            return parts[0] if parts else None
+        return '(' + ' OR '.join(parts) + ')'
+
+    def parse_and():
+        parts = []
+        while tokens and tokens[0].kind not in ('OR', ')'):
+            if tokens[0].kind == 'AND':
+                tokens.popleft()
+                continue
+            part = parse_not()
+            if part:
+                parts.append(part)
+        if len(parts) <= 1:
+            return parts[0] if parts else None
+        return '(' + ' AND '.join(parts) + ')'
+
+    def parse_not():
+        token = tokens.popleft()
+        if token.kind == 'NOT':
+            if not tokens or tokens[0].kind in ('OR', 'AND', ')'):
+                raise ValueError("NOT ohne folgenden Suchbegriff")
+            inner = parse_not()
+            # coalesce: fehlende Werte (NULL) gelten bei Verneinung als "trifft nicht zu"
+            return f"NOT coalesce({inner}, 0)" if inner else None
+        if token.kind == '(':
+            inner = parse_or()
+            if not tokens or tokens.popleft().kind != ')':
+                raise ValueError("Klammer nicht geschlossen")
+            return inner
+        condition = compile_query_term(token, text_columns, fts_available, params)
+        if condition and token.negated:
+            return f"NOT coalesce({condition}, 0)"
+        return condition
+
+    where = parse_or()
+    if tokens:
+        raise ValueError("Unerwartete schließende Klammer")
+    if where is None:
+        raise ValueError("Keine Suchbedingung")
+    return SearchQueryPlan(where, tuple(params))
+
+def search_media_query(conn, plan, scope_path):
+    """Führt eine kompilierte Feld-Abfrage im Ordner scope_path aus. Returns: Liste von Pfaden"""
+    in_scope, scope_params = path_prefix_filter(scope_path)
+    rows = conn.execute(f"""
+        SELECT filepath FROM media_files
+        WHERE {in_scope} AND {plan.where}
+    """, (*scope_params, *plan.params)).fetchall()
+    return [row[0] for row in rows]
+
+def perform_search():
+    """
+    BEREINIGT: Ohne Diagnose-Button und überflüssige Meldungen
+    """
+    search_term = search_entry.get()
+    show_search_suggestion(None)
+
+    if folder_path and search_term:
+        media_extensions = INDEX_MEDIA_EXTENSIONS
+        search_results = []
+        suggestion = None
+
+        if use_db_var.get():
+            try:
+                cursor = get_read_connection().cursor()
+
+                # Normalisiere Pfad für Windows (Backslashes)
+                normalized_search_path = os.path.normpath(folder_path)
+                sql_search_path = normalized_search_path.replace('\\', '\\\\')
+                
+                # Debug-Output
+                print(f"\n=== SUCHE GESTARTET ===")
+                print(f"Suchbegriff: '{search_term}'")
+                print(f"Ordner (Normalisiert): {normalized_search_path}")
+
+                # Basis-Query mit ESCAPE für Backslashes
+                query = "SELECT filepath FROM media_files WHERE filepath LIKE ? ESCAPE '\\' AND (1=0"
+                params = [f"{sql_search_path}%"]
 
                 search_conditions = []
+                search_columns = []
                 
                 if title_search_var.get():
                     query += " OR filename LIKE ? OR container LIKE ?"
                     params.append(f"%{search_term}%")
                     params.append(f"%{search_term}%")
                     search_conditions.append("Titel/Dateiname")
+                    search_columns += ['filename', 'container']
 
                 if genre_var.get():
                     query += " OR genre LIKE ?"
                     params.append(f"%{search_term}%")
                     search_conditions.append("Genre")
+                    search_columns.append('genre')
 
                 if actors_var.get():
                     query += " OR actors LIKE ?"
                     params.append(f"%{search_term}%")
                     search_conditions.append("Actors")
+                    search_columns.append('actors')
 
                 if comment_var.get():
                     query += " OR comment LIKE ?"
                     params.append(f"%{search_term}%")
                     search_conditions.append("Comment")
+                    search_columns.append('comment')
 
                 if album_search_var.get():
                     query += " OR album LIKE ?"
                     params.append(f"%{search_term}%")
                     search_conditions.append("Album")
+                    search_columns.append('album')
 
                 if interpret_search_var.get():
                     query += " OR contributors LIKE ?"
                     params.append(f"%{search_term}%")
                     search_conditions.append("Interpret")
+                    search_columns.append('contributors')
 
                 query += ")"
 
                 print(f"Suchfelder: {', '.join(search_conditions) if search_conditions else 'KEINE'}")
+                structured = is_structured_query(search_term)
                 
-                if not search_conditions:
+                if not search_conditions and not structured:
                     messagebox.showwarning(
                         "Keine Suchfelder", 
                         "Bitte wählen Sie mindestens ein Suchfeld in den Einstellungen aus."
                     )
-                    conn.close()
                     return
                 
-                cursor.execute(query, params)
-                search_results = [row[0] for row in cursor.fetchall()]
+                # Feld-Abfrage (genre:action year:1990..1999 ...), sonst Volltext-Index (nach Relevanz
+                # sortiert) - LIKE nur ohne FTS5 oder ohne Wörter im Suchbegriff
+                fts_results = None
+                fts_available = media_fts_available(cursor.connection)
+                if structured:
+                    try:
+                        plan = compile_search_query(search_term, tuple(search_columns or QUERY_DEFAULT_TEXT_COLUMNS),
+                                                    fts_available)
+                    except ValueError as e:
+                        messagebox.showwarning("Ungültige Suchanfrage", str(e))
+                        return
+                    print(f"Feld-Abfrage: {plan.where} {plan.params}")
+                    fts_results = search_media_query(cursor.connection, plan, normalized_search_path)
+                elif fts_available and fuzzy_search_var.get():
+                    fts_results = search_media_fuzzy(cursor.connection, search_term, search_columns,
+                                                     normalized_search_path)
+                if fts_available and fts_results is None:
+                    fts_results = search_media_fts(cursor.connection, search_term, search_columns,
+                                                   normalized_search_path)
+                if fts_results is not None:
+                    search_results = fts_results
+                else:
+                    print("Suche per LIKE (ohne Volltext-Index)")
+                    cursor.execute(query, params)
+                    search_results = [row[0] for row in cursor.fetchall()]
                 
                 print(f"Treffer gefunden: {len(search_results)}")
+                if not search_results and fts_available and not structured:
+                    suggestion = suggest_search_correction(cursor.connection, search_term)
                 
                 if search_results:
                     print("Erste 3 Treffer:")
                     for result in search_results[:3]:
                         print(f"  - {os.path.basename(result)}")
                 
-                conn.close()
-                
             except sqlite3.Error as e:
                 print(f"Datenbank-Fehler: {e}")
                 messagebox.showerror("Datenbank-Fehler", f"Fehler bei der Suche:\n{e}")
@@ -1315,8 +3285,14 @@ def perform_search():
             # Dateisystem-Suche
             print("Verwende Dateisystem-Suche (kein DB-Modus)")
             search_files_recursive(folder_path, media_extensions, (), search_results)
-            search_results = [result for result in search_results 
+            all_files = search_results
+            search_results = [result for result in all_files 
                             if search_term.lower() in os.path.basename(result).lower()]
+            if fuzzy_search_var.get() or not search_results:
+                fuzzy_results, suggestion = fuzzy_filter_paths(all_files, search_term)
+                if fuzzy_search_var.get():
+                    exact = set(search_results)
+                    search_results += [result for result in fuzzy_results if result not in exact]
             print(f"Treffer gefunden (Dateisystem): {len(search_results)}")
 
         # Zeige Ergebnisse (ohne Dialog bei 0 Treffern)
@@ -1334,6 +3310,9 @@ def perform_search():
             print("=== KEINE TREFFER ===\n")
             display_folders(folder_path, [])
             display_files([])
+            if suggestion:
+                print(f"Vorschlag: {suggestion}")
+                show_search_suggestion(suggestion)
     
     elif not folder_path:
         messagebox.showwarning("Kein Ordner", "Bitte wählen Sie zuerst einen Ordner aus.")
@@ -1370,10 +3349,10 @@ def display_folders(folder_path, search_results=None):
 
     try:
         if search_results is None:
-            folders = [entry for entry in os.listdir(folder_path) if os.path.isdir(os.path.join(folder_path, entry))]
+            folders = [entry.name for entry in list_directory(folder_path) if entry.is_dir]
         else:
             folders = sorted({os.path.dirname(result) for result in search_results})
-    except PermissionError:
+    except OSError:
         print(f"Permission denied: {folder_path}")
         folders = []
 
@@ -1425,7 +3404,7 @@ def calculate_columns(window_width, button_width):
     return max(1, (window_width - padding - scrollbar_width) // (button_width + padding))
 
 def display_files(files_or_folder_path):
-    media_extensions = ('.mp3', '.mp4', '.mkv', '.avi', '.flv', '.mov', '.wmv')
+    media_extensions = INDEX_MEDIA_EXTENSIONS
     playlist_extensions = ('.xspf',)
 
     for widget in media_frame.winfo_children():
@@ -1458,14 +3437,20 @@ def display_files(files_or_folder_path):
     if isinstance(files_or_folder_path, str): 
         folder_path_local = files_or_folder_path
         try:
-            files = os.listdir(folder_path_local)
+            files = [entry.name for entry in list_directory(folder_path_local)]
             files.sort(key=natural_sort_key)
-        except PermissionError:
+        except OSError:
             print(f"Permission denied: {folder_path_local}")
             files = []
+        # Angezeigten Ordner bei der Hintergrund-Analyse vorziehen
+        enrichment_service.focus_folder(folder_path_local)
     else:  
         files = files_or_folder_path
         files.sort(key=lambda x: natural_sort_key(os.path.basename(x)))
+        if enrichment_service.status['running']:
+            enrichment_service.prioritize(files, PRIORITY_SEARCH)
+    # Treffer auf getrennten Laufwerken (nur Suchergebnisse aus der DB)
+    offline_paths = set() if isinstance(files_or_folder_path, str) else get_offline_paths(files)
 
     media_box = None
 
@@ -1489,6 +3474,13 @@ def display_files(files_or_folder_path):
             if file_ext.lower() in playlist_extensions:
                 media_box.config(bg='yellow')
 
+            if file_path in offline_paths:
+                media_box.config(fg='gray60', relief='flat',
+                                 command=lambda path=file_path: messagebox.showinfo(
+                                     "Laufwerk nicht verbunden",
+                                     f"Die Datei liegt auf einem nicht verbundenen Laufwerk:\n{path}"))
+                media_box.offline = True
+
             bind_tooltip(media_box, file_path)
 
             column += 1
@@ -1511,101 +3503,42 @@ def get_image_path(file_path):
             return image_path
     return None
 
-def get_media_duration(file_path):
+def extract_media_duration(probe):
     """
-    Extrahiert Videolänge mit verbesserter Fehlerbehandlung
+    Ermittelt die Laufzeit aus einem ffprobe-Ergebnis (reine Funktion)
     
     Fallback-Reihenfolge:
-    1. ffprobe format duration
-    2. ffprobe stream duration  
-    3. ffprobe JSON parsing
-    4. Nur bei explizitem Fehler: "0 min"
+    1. format duration
+    2. Video-Stream duration
+    3. Erster Stream mit duration
+    4. Kein Wert: "0 min"
     """
-    normalized_path = normalize_file_path(file_path)
-    
-    duration_value = None
-    last_error = None
+    candidates = [probe.get('format', {}).get('duration')]
+    streams = probe.get('streams', [])
+    candidates += [s.get('duration') for s in streams if s.get('codec_type') == 'video']
+    candidates += [s.get('duration') for s in streams]
     
-    # Methode 1: ffprobe format duration
-    try:
-        result = subprocess.run(
-            [ffprobe_path, '-v', 'error', '-show_entries', 'format=duration', 
-             '-of', 'default=noprint_wrappers=1:nokey=1', normalized_path],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
-            creationflags=subprocess.CREATE_NO_WINDOW, timeout=30
-        )
-        
-        duration_output = result.stdout.strip()
-        
-        if duration_output and duration_output != 'N/A':
-            try:
-                duration_value = float(duration_output)
-                if duration_value > 0:
-                    return f"{round(duration_value / 60, 2)} min"
-            except ValueError:
-                pass
-    except Exception as e:
-        last_error = f"Format duration: {e}"
-    
-    # Methode 2: ffprobe stream duration
-    try:
-        result = subprocess.run(
-            [ffprobe_path, '-v', 'error', '-select_streams', 'v:0', 
-             '-show_entries', 'stream=duration', '-of', 'default=noprint_wrappers=1:nokey=1', normalized_path],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
-            creationflags=subprocess.CREATE_NO_WINDOW, timeout=30
-        )
-        
-        duration_output = result.stdout.strip()
-        
-        if duration_output and duration_output != 'N/A':
-            try:
-                duration_value = float(duration_output)
-                if duration_value > 0:
-                    return f"{round(duration_value / 60, 2)} min"
-            except ValueError:
-                pass
-    except Exception as e:
-        last_error = f"Stream duration: {e}"
+    for candidate in candidates:
+        if not candidate or candidate == 'N/A':
+            continue
+        try:
+            duration_value = float(candidate)
+        except (ValueError, TypeError):
+            continue
+        if duration_value > 0:
+            return f"{round(duration_value / 60, 2)} min"
     
-    # Methode 3: ffprobe JSON parsing
-    try:
-        metadata = ffprobe_file(normalized_path)
-        
-        # Format duration
-        format_duration = metadata.get('format', {}).get('duration')
-        if format_duration:
-            try:
-                duration_value = float(format_duration)
-                if duration_value > 0:
-                    return f"{round(duration_value / 60, 2)} min"
-            except (ValueError, TypeError):
-                pass
-        
-        # Stream duration
-        streams = metadata.get('streams', [])
-        for stream in streams:
-            if stream.get('codec_type') == 'video':
-                stream_duration = stream.get('duration')
-                if stream_duration:
-                    try:
-                        duration_value = float(stream_duration)
-                        if duration_value > 0:
-                            return f"{round(duration_value / 60, 2)} min"
-                    except (ValueError, TypeError):
-                        pass
-                        
-    except Exception as e:
-        last_error = f"JSON parsing: {e}"
+    return "0 min"
+
+def get_media_duration(file_path, probe=None):
+    """Extrahiert Videolänge - Header-Parser bzw. ein ffprobe-Aufruf (oder vorhandenes Ergebnis)"""
+    if probe is None:
+        probe = probe_media_headers_for_display(normalize_file_path(file_path))
     
-    # Fehlerfall: Explizit loggen aber 0 min zurückgeben
-    if last_error:
-        print(f"WARNUNG: Keine Laufzeit ermittelbar für {file_path}")
-        print(f"Letzter Fehler: {last_error}")
-    else:
+    length = extract_media_duration(probe)
+    if length == "0 min":
         print(f"INFO: Keine Laufzeit-Metadaten in {file_path}")
-    
-    return "0 min"
+    return length
 
 def safe_startfile(file_path):
     """Sichere Datei-Öffnung mit Pfad-Normalisierung"""
@@ -1622,12 +3555,23 @@ def safe_startfile(file_path):
         messagebox.showerror("Fehler beim Öffnen", 
                            f"Fehler beim Öffnen der Datei:\n{file_path}\n\nFehler: {e}")
 
+def get_pending_metadata_info(file_path):
+    """Platzhalter-Tooltip für noch nicht analysierte Dateien - nur Daten aus dem Pfad"""
+    path_meta = classify_path_dynamic(file_path)
+    metadata_lines = [f"Datei: {os.path.basename(file_path)}"]
+    if path_meta.get('main_category'):
+        metadata_lines.append(f"Medientyp: {path_meta['main_category']}")
+    if path_meta.get('genre'):
+        metadata_lines.append(f"Genre: {path_meta['genre']}")
+    metadata_lines.append("\n⏳ Wird analysiert - Details folgen gleich...")
+    return "\n".join(metadata_lines)
+
 def get_metadata_info(file_path):
     """
     KORRIGIERT: Korrekte Reihenfolge der 7 Rückgabewerte
     """
     try:
-        if file_path.lower().endswith('.mp3'):
+        if is_audio_file(file_path):
             # Rückgabe: album, contributors, track_number, year, length, path_meta, media_type
             album, contributors, track_number, year, length, path_meta, media_type = get_enhanced_metadata(file_path)
             
@@ -1836,21 +3780,619 @@ def refresh_ui():
     except Exception as e:
         print(f"Refresh-UI Fehler (ignoriert): {e}")
 
+# Inode nur dort, wo er ohne Zusatzkosten verfügbar ist
+# (Windows-Verzeichnislisten liefern keine File-ID - dafür wäre ein Handle pro Datei nötig)
+FINGERPRINT_USES_INODE = os.name != 'nt'
+
+def make_file_fingerprint(size, mtime, inode=0):
+    """Günstiger Änderungs-Fingerprint aus (Größe, mtime, inode) - ohne Dateiinhalt zu lesen"""
+    return f"{size}:{mtime:.6f}:{inode if FINGERPRINT_USES_INODE else 0}"
+
 def get_file_hash(file_path):
-    """Erstellt Hash für Datei-Änderungserkennung"""
+    """
+    Erstellt Fingerprint für Datei-Änderungserkennung
+
+    Returns: (fingerprint, size, mtime, inode) oder None
+    """
     try:
         stat = os.stat(file_path)
-        hash_string = f"{file_path}_{stat.st_size}_{stat.st_mtime}"
-        return hashlib.md5(hash_string.encode()).hexdigest()
-    except:
+        inode = stat.st_ino if FINGERPRINT_USES_INODE else 0
+        return make_file_fingerprint(stat.st_size, stat.st_mtime, inode), stat.st_size, stat.st_mtime, inode
+    except OSError:
         return None
 
+# === VERZEICHNIS-SNAPSHOTS ===
+# Inhalt eines Ordners bleibt gültig, solange sich seine mtime nicht ändert
+# (liegt in media_cache.db neben dem Analyse-Cache)
+DirSnapshotEntry = namedtuple('DirSnapshotEntry', ['name', 'path', 'is_dir', 'size', 'mtime', 'inode'])
+
+# Snapshots, die zu kurz nach der letzten Änderung entstanden sind, sind unsicher
+# (grobe mtime-Auflösung z.B. FAT = 2 Sekunden)
+SNAPSHOT_RACE_SECONDS = 2.0
+
+def read_directory_fresh(directory):
+    """Liest ein Verzeichnis per os.scandir - Stat-Daten nur für Mediendateien"""
+    entries = []
+    with os.scandir(directory) as listing:
+        for entry in listing:
+            try:
+                if entry.is_dir():
+                    entries.append(DirSnapshotEntry(entry.name, entry.path, True, None, None, None))
+                elif entry.name.lower().endswith(INDEX_MEDIA_EXTENSIONS):
+                    stat = entry.stat()
+                    inode = stat.st_ino if FINGERPRINT_USES_INODE else 0
+                    entries.append(DirSnapshotEntry(entry.name, entry.path, False,
+                                                    stat.st_size, stat.st_mtime, inode))
+                else:
+                    entries.append(DirSnapshotEntry(entry.name, entry.path, False, None, None, None))
+            except OSError:
+                continue
+    return entries
+
+def list_directory(directory, trust_snapshot=True, dir_stat=None):
+    """
+    Liefert den Inhalt eines Verzeichnisses als Liste von DirSnapshotEntry
+
+    trust_snapshot=True: gespeicherter Snapshot wird genutzt, solange die mtime
+    des Ordners gleich ist (kein Listing, nur ein stat).
+    Achtung: Direkt überschriebene Dateien ändern die Ordner-mtime nicht.
+    trust_snapshot=False: frisches Listing ohne Snapshot - wird auch nicht gespeichert,
+    ein Voll-Scan schreibt so nicht bei jedem Ordner in media_cache.db.
+    Wirft OSError, wenn der Ordner nicht lesbar ist.
+    """
+    directory = os.path.normpath(directory)
+    if dir_stat is None:
+        dir_stat = os.stat(directory)
+
+    if trust_snapshot:
+        conn = get_probe_cache_connection()
+        try:
+            row = conn.execute(
+                "SELECT dir_mtime, taken, entries FROM dir_snapshots WHERE directory = ?", (directory,)
+            ).fetchone()
+            if row and row[0] == dir_stat.st_mtime and row[1] - row[0] > SNAPSHOT_RACE_SECONDS:
+                return [DirSnapshotEntry(name, os.path.join(directory, name), bool(is_dir), size, mtime, inode)
+                        for name, is_dir, size, mtime, inode in json.loads(zlib.decompress(row[2]).decode('utf-8'))]
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            print(f"Snapshot-Lesefehler für {directory}: {e}")
+
+    entries = read_directory_fresh(directory)
+    if trust_snapshot:
+        try:
+            payload = [[e.name, int(e.is_dir), e.size, e.mtime, e.inode] for e in entries]
+            conn.execute(
+                "INSERT OR REPLACE INTO dir_snapshots (directory, dir_mtime, taken, entries) VALUES (?, ?, ?, ?)",
+                (directory, dir_stat.st_mtime, time.time(), zlib.compress(json.dumps(payload).encode('utf-8')))
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Snapshot-Schreibfehler für {directory}: {e}")
+    return entries
+
+# === PARALLELER VERZEICHNIS-WALKER ===
+# Ein Datensatz pro gefundener Datei - Stat-Daten direkt aus dem DirEntry
+FileRecord = namedtuple('FileRecord', ['path', 'size', 'mtime', 'inode'])
+
+# Verzeichnisse werden parallel gelesen (lohnt sich vor allem bei Netzlaufwerken)
+DEFAULT_WALKER_THREADS = 8
+
+def scan_directory_entries(directory, extensions, visited, visited_lock, trust_snapshots=False):
+    """
+    Liest EIN Verzeichnis (per os.scandir oder aus dem Snapshot)
+
+    Returns: (Liste von FileRecord, Liste von Unterverzeichnissen)
+    Bereits besuchte Verzeichnisse (Symlink-Schleifen) liefern leere Listen.
+    """
+    records = []
+    subdirs = []
+    try:
+        dir_stat = os.stat(directory)
+        dir_key = (dir_stat.st_dev, dir_stat.st_ino)
+        # st_ino = 0: Dateisystem ohne IDs - dann Pfad als Schlüssel
+        if not dir_stat.st_ino:
+            dir_key = os.path.normcase(os.path.realpath(directory))
+        with visited_lock:
+            if dir_key in visited:
+                return records, subdirs
+            visited.add(dir_key)
+
+        for entry in list_directory(directory, trust_snapshots, dir_stat):
+            if entry.is_dir:
+                subdirs.append(entry.path)
+            elif entry.name.lower().endswith(extensions):
+                if entry.size is None:
+                    # Nicht im Snapshot erfasster Dateityp
+                    try:
+                        stat = os.stat(entry.path)
+                    except OSError:
+                        continue
+                    inode = stat.st_ino if FINGERPRINT_USES_INODE else 0
+                    records.append(FileRecord(entry.path, stat.st_size, stat.st_mtime, inode))
+                else:
+                    records.append(FileRecord(entry.path, entry.size, entry.mtime, entry.inode))
+    except OSError:
+        pass
+    return records, subdirs
+
+def walk_media_files(root_path, extensions, stop_event=None, threads=None, trust_snapshots=False):
+    """
+    Generator: durchläuft root_path rekursiv und liefert FileRecord(path, size, mtime, inode)
+
+    Unterverzeichnisse werden auf mehreren Threads gleichzeitig gelesen,
+    die Reihenfolge der Ergebnisse ist daher nicht festgelegt.
+    Symlink-Schleifen werden über (st_dev, st_ino) der Verzeichnisse erkannt.
+    trust_snapshots: unveränderte Ordner (gleiche mtime) aus dem Snapshot statt neu listen
+    """
+    extensions = tuple(ext.lower() for ext in extensions)
+    visited = set()
+    visited_lock = threading.Lock()
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, threads or DEFAULT_WALKER_THREADS), thread_name_prefix='walk'
+    )
+    try:
+        pending = {executor.submit(scan_directory_entries, root_path, extensions, visited, visited_lock,
+                                   trust_snapshots)}
+        while pending:
+            if stop_event is not None and stop_event.is_set():
+                break
+            done, pending = concurrent.futures.wait(
+                pending, timeout=0.5, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                records, subdirs = future.result()
+                for subdir in subdirs:
+                    pending.add(executor.submit(scan_directory_entries, subdir, extensions, visited, visited_lock,
+                                                trust_snapshots))
+                yield from records
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# Spalten, die nach der ersten Version hinzugekommen sind (Migration bestehender Datenbanken)
+MEDIA_FILES_EXTRA_COLUMNS = {
+    'file_mtime': 'REAL',
+    'file_inode': 'INTEGER',
+    'enrichment_pending': 'INTEGER DEFAULT 0',
+    'offline': 'INTEGER DEFAULT 0'
+}
+
+# Sekundär-Indizes von media_files (beim Bulk-Import erst am Ende angelegt)
+MEDIA_INDEXES = {
+    'idx_filepath': 'media_files(filepath)',
+    'idx_category': 'media_files(category)',
+    'idx_genre': 'media_files(genre)',
+    'idx_file_hash': 'media_files(file_hash)',
+    # Feld-Abfragen (cat:, year:, dur:, res:) - Ausdrücke wie in der Suchsprache
+    'idx_category_nocase': 'media_files(category COLLATE NOCASE)',
+    'idx_year_number': f'media_files({YEAR_NUMBER_SQL})',
+    'idx_duration_minutes': f'media_files({DURATION_MINUTES_SQL})',
+    'idx_video_lines': f'media_files({VIDEO_LINES_SQL})',
+    # Nur offene Einträge - die Hintergrund-Analyse findet sie ohne Tabellen-Scan
+    'idx_enrichment_pending': 'media_files(enrichment_pending) WHERE enrichment_pending = 1'
+}
+
+# Volltext-Index (FTS5) über die Suchfelder - Inhalt bleibt in media_files, Trigger halten ihn aktuell
+MEDIA_FTS_COLUMNS = ('filename', 'container', 'genre', 'actors', 'comment', 'album', 'contributors')
+MEDIA_FTS_TRIGGERS = ('media_fts_insert', 'media_fts_delete', 'media_fts_update')
+
+# Werte für media_files.enrichment_pending (zweiphasiger Scan)
+ENRICHMENT_DONE = 0      # vollständig analysiert
+ENRICHMENT_PENDING = 1   # nur Dateisystem-Daten - Hintergrund-Analyse steht aus
+ENRICHMENT_FAILED = 2    # Analyse fehlgeschlagen/Quarantäne - erst nach Dateiänderung erneut
+
+# === DB-ZUGRIFF ===
+# Gemeinsame Verbindungs-Einstellungen - der Writer öffnet die DB im WAL-Modus,
+# Lese-Verbindungen werden pro Thread gehalten statt bei jedem Aufruf neu geöffnet
+DB_CACHE_KB = 32768                 # Page-Cache pro Verbindung (32 MB)
+DB_MMAP_BYTES = 256 * 1024 * 1024   # Memory-Mapped I/O für Lesezugriffe
+DB_STATEMENT_CACHE = 256            # vorbereitete Statements pro Verbindung
+
+_read_pool_lock = threading.Lock()
+_read_pool = {}   # Thread-ID -> (Thread, Verbindung)
+
+def configure_db_connection(conn):
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_KB}")
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+def get_read_connection():
+    """
+    Lese-Verbindung des aktuellen Threads - bleibt offen, nicht schließen!
+
+    Read-only und im WAL-Modus: ein laufender Scan blockiert keine Leser.
+    Wirft sqlite3.OperationalError, wenn die DB nicht existiert.
+    """
+    thread = threading.current_thread()
+    with _read_pool_lock:
+        entry = _read_pool.get(thread.ident)
+        if entry is not None and entry[0] is thread:
+            return entry[1]
+    if not os.path.exists('media_index.db'):
+        raise sqlite3.OperationalError("Datenbank nicht gefunden: media_index.db")
+    # Kein Warten auf den Writer - Schema-Migration und WAL-Umstellung hat prepare_database()
+    # vor dem GUI-Start erledigt; fehlende Tabellen/Spalten melden sich als sqlite3.OperationalError
+    conn = sqlite3.connect('file:media_index.db?mode=ro', uri=True, timeout=30.0,
+                           cached_statements=DB_STATEMENT_CACHE, check_same_thread=False)
+    configure_db_connection(conn)
+    with _read_pool_lock:
+        # Verbindungen beendeter Threads gleich mit aufräumen
+        for ident, (owner, old_conn) in list(_read_pool.items()):
+            if ident == thread.ident or not owner.is_alive():
+                old_conn.close()
+                del _read_pool[ident]
+        _read_pool[thread.ident] = (thread, conn)
+    return conn
+
+def close_read_connections():
+    """Schließt alle Lese-Verbindungen (z.B. vor dem Löschen der DB)"""
+    with _read_pool_lock:
+        for _, conn in _read_pool.values():
+            conn.close()
+        _read_pool.clear()
+
+def path_prefix_filter(folder, column='filepath'):
+    """
+    SQL-Bedingung "liegt unter folder" als exakter Präfix-Vergleich - LIKE würde % und _
+    in Ordnernamen als Platzhalter lesen und Groß-/Kleinschreibung ignorieren
+    Returns: (SQL, Parameter)
+    """
+    prefix = folder.rstrip('\\/') + os.sep
+    return f"substr({column}, 1, ?) = ?", (len(prefix), prefix)
+
+# === DB-WRITER ===
+# Alle Änderungen an media_index.db laufen über einen Thread - keine "database is locked"-Wartezeiten
+DB_WRITER_COMMIT_ROWS = 5000       # Group-Commit spätestens nach so vielen Zeilen
+DB_WRITER_COMMIT_INTERVAL = 0.5    # ... oder wenn die Transaktion so lange (s) offen ist
+DB_WRITER_LINGER = 0.01            # kurz auf weitere Aufträge warten, bevor committet wird
+DB_WRITER_MAX_IN_FLIGHT = 16       # Scan/Analyse: offene Aufträge, bevor der Aufrufer wartet
+
+class DatabaseWriter:
+    """
+    Einziger schreibender Thread für die Index-DB
+
+    - Aufträge werden in Reihenfolge ausgeführt und zu Group-Commits gebündelt
+      (nach Zeilenzahl bzw. Zeitfenster, sonst sobald die Queue leer ist)
+    - Jeder Aufruf liefert ein Future - erfüllt erst nach dem Commit
+    - Funktionen (submit) laufen in einem Savepoint: ein Fehler verwirft nur diesen Auftrag
+    - transaction=False: außerhalb einer Transaktion (PRAGMA journal_mode, große DDL)
+    Funktionen erhalten die Writer-Verbindung und dürfen selbst nicht committen.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+
+    def submit(self, func, *args, transaction=True):
+        """func(conn, *args) im Writer-Thread ausführen - Future liefert den Rückgabewert"""
+        future = concurrent.futures.Future()
+        with self._lock:
+            if self._thread is None:
+                # Eigene Queue je Thread - ein noch auslaufender Writer holt keine neuen Aufträge
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, args=(self._queue,), daemon=True,
+                                                name='db-writer')
+                self._thread.start()
+            self._queue.put((func, args, transaction, future))
+        return future
+
+    def execute(self, sql, params=()):
+        """Einzelnes Statement - Future liefert rowcount"""
+        return self.submit(lambda conn: conn.execute(sql, params).rowcount)
+
+    def executemany(self, sql, rows):
+        """Statement für viele Zeilen - Future liefert rowcount"""
+        return self.submit(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    def flush(self):
+        """Future, das erfüllt ist, sobald alle vorher übergebenen Aufträge committet sind"""
+        return self.submit(lambda conn: None)
+
+    def stop(self, timeout=30):
+        """Schreibt alles Übergebene und schließt die Verbindung (z.B. vor dem Löschen der DB)"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._thread = None
+            self._queue.put(None)
+            self._queue = None
+        thread.join(timeout)
+
+    def _run(self, commands):
+        conn = None
+        command = None
+        finished = []
+        try:
+            # Eigene Transaktionssteuerung: BEGIN/COMMIT setzt nur der Writer
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None,
+                                   cached_statements=DB_STATEMENT_CACHE)
+            # WAL: Leser sehen den letzten Commit, ohne auf den Writer zu warten;
+            # synchronous=NORMAL ist damit sicher (fsync nur beim Checkpoint)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            configure_db_connection(conn)
+            ensure_db_schema(conn)
+            running = True
+            while running:
+                command = commands.get()
+                if command is None:
+                    break
+                if not command[2]:
+                    self._run_outside_transaction(conn, command)
+                    continue
+                
+                conn.execute("BEGIN")
+                started = time.time()
+                finished = []
+                rows = 0
+                while True:
+                    func, args, _, future = command
+                    if future.set_running_or_notify_cancel():
+                        conn.execute("SAVEPOINT writer_command")
+                        try:
+                            result = func(conn, *args)
+                            conn.execute("RELEASE writer_command")
+                            finished.append((future, result, None))
+                            rows += result if isinstance(result, int) and result > 0 else 1
+                        except Exception as e:
+                            conn.execute("ROLLBACK TO writer_command")
+                            conn.execute("RELEASE writer_command")
+                            finished.append((future, None, e))
+                    
+                    limit = BULK_INGEST_COMMIT_ROWS if bulk_ingest_active.is_set() else DB_WRITER_COMMIT_ROWS
+                    if rows >= limit or time.time() - started >= DB_WRITER_COMMIT_INTERVAL:
+                        break
+                    try:
+                        command = commands.get(timeout=DB_WRITER_LINGER)
+                    except queue.Empty:
+                        break
+                    if command is None or not command[2]:
+                        break
+                
+                try:
+                    conn.execute("COMMIT")
+                except sqlite3.Error as e:
+                    print(f"DB-Writer: Commit fehlgeschlagen: {e}")
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    finished = [(future, None, e) for future, _, _ in finished]
+                for future, result, error in finished:
+                    if error is None:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(error)
+                
+                # Beim Bündeln abgeholter Auftrag außerhalb der Transaktion bzw. Ende
+                if command is None:
+                    running = False
+                elif not command[2]:
+                    self._run_outside_transaction(conn, command)
+        except Exception as e:
+            print(f"DB-Writer Fehler: {e}")
+            unresolved = [future for future, _, _ in finished]
+            if command is not None:
+                unresolved.append(command[3])
+            for future in unresolved:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            if conn is not None:
+                conn.close()
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+                    self._queue = None
+            self._fail_pending(commands)
+
+    def _run_outside_transaction(self, conn, command):
+        func, args, _, future = command
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(conn, *args))
+        except Exception as e:
+            future.set_exception(e)
+
+    @staticmethod
+    def _fail_pending(commands):
+        """Writer beendet: übrige Aufträge nicht hängen lassen"""
+        while True:
+            try:
+                command = commands.get_nowait()
+            except queue.Empty:
+                return
+            if command is not None and command[3].set_running_or_notify_cancel():
+                command[3].set_exception(sqlite3.OperationalError("DB-Writer beendet"))
+
+db_writer = DatabaseWriter('media_index.db')
+
+def prepare_database():
+    """
+    Schema-Migration und WAL-Umstellung einmalig vorab erledigen (Programmstart, neue DB) -
+    danach warten Lese-Verbindungen nie auf den Writer
+    """
+    if os.path.exists('media_index.db'):
+        db_writer.flush().result()
+
+# === BULK-IMPORT ===
+# Erster Scan in eine (fast) leere DB: große Batches, seltene Commits, Indizes erst am Ende
+DEFAULT_BULK_INGEST_MAX_ROWS = 1000  # bis zu so vielen Einträgen gilt die DB als "fast leer"
+BULK_INGEST_BATCH_SIZE = 2000        # Zeilen pro executemany
+BULK_INGEST_COMMIT_ROWS = 20000      # Writer committet spätestens nach so vielen Zeilen
+BULK_INGEST_CACHE_KB = 65536         # Page-Cache des Writers (64 MB)
+bulk_ingest_active = threading.Event()
+
+def create_media_indexes(conn):
+    for name, target in MEDIA_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+def ensure_media_fts(conn):
+    """
+    Legt media_fts samt Sync-Triggern an und baut den Index neu auf, wenn Trigger gefehlt haben
+    (neue Tabelle, nach Bulk-Import). Returns: False, wenn SQLite ohne FTS5 gebaut ist
+    """
+    columns = ', '.join(MEDIA_FTS_COLUMNS)
+    new_values = ', '.join(f"new.{column}" for column in MEDIA_FTS_COLUMNS)
+    old_values = ', '.join(f"old.{column}" for column in MEDIA_FTS_COLUMNS)
+    try:
+        conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS media_fts USING fts5({columns}, "
+                     f"content='media_files', content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+    except sqlite3.OperationalError as e:
+        print(f"Volltext-Index nicht verfügbar ({e}) - Suche per LIKE")
+        return False
+
+    present = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'media_files'")}
+    if all(name in present for name in MEDIA_FTS_TRIGGERS):
+        return True
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS media_fts_insert AFTER INSERT ON media_files BEGIN
+            INSERT INTO media_fts(rowid, {columns}) VALUES (new.id, {new_values});
+        END""")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS media_fts_delete AFTER DELETE ON media_files BEGIN
+            INSERT INTO media_fts(media_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END""")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS media_fts_update AFTER UPDATE OF {columns} ON media_files BEGIN
+            INSERT INTO media_fts(media_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO media_fts(rowid, {columns}) VALUES (new.id, {new_values});
+        END""")
+    started = time.time()
+    conn.execute("INSERT INTO media_fts(media_fts) VALUES ('rebuild')")
+    conn.commit()
+    print(f"Volltext-Index aufgebaut in {time.time() - started:.1f}s")
+    return True
+
+def begin_bulk_ingest(conn):
+    """
+    Writer-Verbindung (außerhalb einer Transaktion): größerer Cache, Sekundär-Indizes und
+    Volltext-Trigger entfernen (der UNIQUE-Index auf filepath bleibt)
+    """
+    bulk_ingest_active.set()
+    conn.execute(f"PRAGMA cache_size=-{BULK_INGEST_CACHE_KB}")
+    for name in MEDIA_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    # Volltext-Index wird am Ende in einem Durchgang neu aufgebaut statt pro Zeile
+    for name in MEDIA_FTS_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.commit()
+
+def finish_bulk_ingest(conn):
+    """Indizes in einem Durchgang aufbauen, Statistiken für den Query-Planer sammeln, Writer zurückstellen"""
+    try:
+        started = time.time()
+        create_media_indexes(conn)
+        ensure_media_fts(conn)
+        conn.execute("ANALYZE")
+        conn.commit()
+        print(f"Bulk-Import: Indizes und ANALYZE in {time.time() - started:.1f}s")
+    finally:
+        bulk_ingest_active.clear()
+        configure_db_connection(conn)
+
+def ensure_db_schema(conn):
+    """Ergänzt fehlende Spalten und Hilfstabellen in älteren Datenbanken"""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(media_files)")}
+    for column, column_type in MEDIA_FILES_EXTRA_COLUMNS.items():
+        if existing and column not in existing:
+            conn.execute(f"ALTER TABLE media_files ADD COLUMN {column} {column_type}")
+            print(f"Datenbank-Migration: Spalte '{column}' hinzugefügt")
+    # Fehlende Indizes nachziehen (z.B. nach abgebrochenem Bulk-Import) - nicht während des Imports
+    if existing and not bulk_ingest_active.is_set():
+        create_media_indexes(conn)
+        ensure_media_fts(conn)
+    # Bibliotheks-Ordner mit Laufwerks-Kennung (Wechselmedien/Netzlaufwerke wiedererkennen)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS volume_roots (
+            root TEXT PRIMARY KEY,
+            volume_serial TEXT,
+            marker_id TEXT,
+            last_seen TIMESTAMP
+        )
+    ''')
+    # Fortschritt laufender Scans (Fortsetzen nach Abbruch/Absturz)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scan_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            root TEXT,
+            phase TEXT,
+            completed_dirs TEXT,
+            counters TEXT,
+            started TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Während eines Scans gesehene Pfade (Cleanup ohne Pfad-Set im Speicher) - je Scan-Session getrennt,
+    # damit ein anderer Scan die Einträge einer unterbrochenen Session nicht löscht
+    seen_columns = {row[1] for row in conn.execute("PRAGMA table_info(scan_seen)")}
+    if seen_columns and 'session_id' not in seen_columns:
+        # Alte Tabelle ohne Session-Bezug: unterbrochene Scans sind nicht sicher fortsetzbar
+        conn.execute("DROP TABLE scan_seen")
+        conn.execute("UPDATE scan_sessions SET phase = 'done' WHERE phase != 'done'")
+        print("Datenbank-Migration: scan_seen je Scan-Session - unterbrochene Scans starten neu")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scan_seen (
+            session_id INTEGER NOT NULL,
+            filepath TEXT NOT NULL,
+            PRIMARY KEY (session_id, filepath)
+        ) WITHOUT ROWID""")
+    conn.commit()
+
+# Zähler aus scan_status, die mit jedem Checkpoint gesichert werden
+SCAN_SESSION_COUNTERS = (
+    'total_scanned', 'new_files_count', 'updated_files_count', 'changed_files_count',
+    'path_metadata_used', 'total_duration_found', 'duration_errors', 'medientyp_erkannt',
+    'quality_analyzed', 'current_file_count', 'files_found', 'quarantined_skipped'
+)
+
+SCAN_SESSION_CHECKPOINT_SQL = (
+    "UPDATE scan_sessions SET completed_dirs = ?, counters = ?, updated = CURRENT_TIMESTAMP WHERE id = ?"
+)
+
+def load_unfinished_scan_session(scan_root):
+    """
+    Sucht einen unterbrochenen Scan für scan_root
+
+    Returns: dict mit id, phase, completed_dirs, counters, updated - oder None
+    """
+    if not os.path.exists('media_index.db'):
+        return None
+    try:
+        row = get_read_connection().execute(
+            "SELECT id, phase, completed_dirs, counters, updated FROM scan_sessions "
+            "WHERE root = ? AND phase != 'done' ORDER BY id DESC LIMIT 1",
+            (scan_root,)
+        ).fetchone()
+    except sqlite3.Error as e:
+        print(f"Scan-Session konnte nicht gelesen werden: {e}")
+        return None
+
+    if not row:
+        return None
+    return {
+        'id': row[0],
+        'phase': row[1],
+        'completed_dirs': json.loads(row[2] or '[]'),
+        'counters': json.loads(row[3] or '{}'),
+        'updated': row[4]
+    }
+
 def create_or_reset_db():
     """Erweiterte Datenbank mit Tracking-Feldern"""
     db_path = 'media_index.db'
+    enrichment_service.stop(timeout=5)
+    # Alle Verbindungen schließen - Writer und Leser öffnen beim nächsten Zugriff die neue DB
+    db_writer.stop()
+    close_read_connections()
     if os.path.exists(db_path):
         os.remove(db_path)
         print("Datenbank gelöscht.")
+    # WAL-Dateien der alten DB dürfen nicht auf die neue angewendet werden
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
 
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
@@ -1881,19 +4423,743 @@ def create_or_reset_db():
             has_metadata INTEGER DEFAULT 0,
             file_hash TEXT,
             scan_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_modified TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            last_modified TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            file_mtime REAL,
+            file_inode INTEGER,
+            enrichment_pending INTEGER DEFAULT 0,
+            offline INTEGER DEFAULT 0
         )
     ''')
     
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_filepath ON media_files(filepath)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON media_files(category)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_genre ON media_files(genre)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_file_hash ON media_files(file_hash)')
+    create_media_indexes(conn)
     
     conn.commit()
     conn.close()
+    prepare_database()
     print("Erweiterte Datenbank mit Tracking erstellt.")
 
+# Dateitypen, die in die Datenbank aufgenommen werden (Scan + Live-Überwachung)
+AUDIO_EXTENSIONS = ('.mp3', '.flac', '.m4a', '.aac', '.ogg', '.oga', '.opus', '.wav')
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv')
+INDEX_MEDIA_EXTENSIONS = AUDIO_EXTENSIONS + VIDEO_EXTENSIONS
+
+# === SCAN-WORKER-POOL ===
+# Standardwerte für die parallele Metadaten-Analyse (überschreibbar in MediaIndexer.cfg, Sektion [Scan])
+DEFAULT_SCAN_WORKERS = max(2, min(8, os.cpu_count() or 4))
+DEFAULT_WORKERS_PER_DRIVE = 4
+
+def load_scan_settings():
+    """
+    Liest die Scan-Einstellungen aus der Config
+
+    [Scan]
+    workers = 8                 # Gesamtzahl paralleler Analysen
+    workers_per_drive = 4       # Limit pro physischem Laufwerk
+    drive_limits = F:=2, G:=6   # Optionale Limits für einzelne Laufwerke
+    walker_threads = 8          # Parallel gelesene Verzeichnisse
+    skip_unchanged_dirs = False # Ordner mit unveränderter mtime aus dem Snapshot übernehmen
+                                # (schneller, erkennt aber keine direkt überschriebenen Dateien)
+    bulk_ingest = True          # Bulk-Import beim ersten Scan (WAL, Indizes erst am Ende)
+    bulk_ingest_max_rows = 1000 # DB-Größe, bis zu der der Bulk-Import greift
+    """
+    workers = config.getint('Scan', 'workers', fallback=DEFAULT_SCAN_WORKERS)
+    workers_per_drive = config.getint('Scan', 'workers_per_drive', fallback=DEFAULT_WORKERS_PER_DRIVE)
+    walker_threads = config.getint('Scan', 'walker_threads', fallback=DEFAULT_WALKER_THREADS)
+    skip_unchanged_dirs = config.getboolean('Scan', 'skip_unchanged_dirs', fallback=False)
+    bulk_ingest = config.getboolean('Scan', 'bulk_ingest', fallback=True)
+    bulk_ingest_max_rows = config.getint('Scan', 'bulk_ingest_max_rows', fallback=DEFAULT_BULK_INGEST_MAX_ROWS)
+
+    drive_limits = {}
+    raw_limits = config.get('Scan', 'drive_limits', fallback='')
+    for item in raw_limits.split(','):
+        if '=' not in item:
+            continue
+        drive, limit = item.rsplit('=', 1)
+        try:
+            drive_limits[drive.strip().rstrip('\\/').upper()] = max(1, int(limit.strip()))
+        except ValueError:
+            print(f"Ungültiges Laufwerks-Limit ignoriert: {item.strip()}")
+
+    return {
+        'workers': max(1, workers),
+        'workers_per_drive': max(1, workers_per_drive),
+        'drive_limits': drive_limits,
+        'walker_threads': max(1, walker_threads),
+        'skip_unchanged_dirs': skip_unchanged_dirs,
+        'bulk_ingest': bulk_ingest,
+        'bulk_ingest_max_rows': max(0, bulk_ingest_max_rows)
+    }
+
+@lru_cache(maxsize=4096)
+def get_drive_key(directory):
+    """
+    Ermittelt das physische Laufwerk eines Verzeichnisses
+    - Windows: Laufwerksbuchstabe bzw. UNC-Freigabe (\\\\server\\share)
+    - Sonst: Mount-Point
+    """
+    drive = os.path.splitdrive(directory)[0]
+    if drive:
+        return drive.rstrip('\\/').upper()
+
+    path = os.path.abspath(directory)
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+class DriveLimiter:
+    """Begrenzt gleichzeitige Zugriffe pro Laufwerk (HDDs/NAS vertragen nur wenige parallele Leser)"""
+
+    def __init__(self, default_limit, drive_limits=None):
+        self.default_limit = default_limit
+        self.drive_limits = drive_limits or {}
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def semaphore_for(self, file_path):
+        drive = get_drive_key(os.path.dirname(file_path))
+        with self._lock:
+            if drive not in self._semaphores:
+                limit = self.drive_limits.get(drive, self.default_limit)
+                self._semaphores[drive] = threading.BoundedSemaphore(limit)
+            return self._semaphores[drive]
+
+# === LAUFWERKS-ERKENNUNG (WECHSELMEDIEN / NETZLAUFWERKE) ===
+# Bibliotheks-Ordner werden über Dateisystem-Kennung + Markierungsdatei wiedererkannt.
+# Ist ein Laufwerk nicht verbunden, bleiben seine Einträge erhalten (offline = 1).
+VOLUME_MARKER_FILE = '.mediaindexer_volume'
+
+def get_volume_serial(path):
+    """Dateisystem-Kennung: Windows-Seriennummer, sonst UUID des Mount-Geräts ('' wenn unbekannt)"""
+    if os.name == 'nt':
+        try:
+            import ctypes
+            drive = os.path.splitdrive(os.path.abspath(path))[0] + '\\'
+            serial = ctypes.c_uint32()
+            if ctypes.windll.kernel32.GetVolumeInformationW(ctypes.c_wchar_p(drive), None, 0,
+                                                            ctypes.byref(serial), None, None, None, 0):
+                return f"{serial.value:08X}"
+        except Exception:
+            pass
+        return ''
+    try:
+        device = os.stat(path).st_dev
+        by_uuid = '/dev/disk/by-uuid'
+        for name in os.listdir(by_uuid):
+            if os.stat(os.path.join(by_uuid, name)).st_rdev == device:
+                return name
+    except OSError:
+        pass
+    # Netzlaufwerke/tmpfs haben keine UUID - st_dev ist nicht über Neustarts stabil
+    return ''
+
+def read_volume_marker(root_path):
+    try:
+        with open(os.path.join(root_path, VOLUME_MARKER_FILE), encoding='utf-8') as marker:
+            return json.load(marker).get('id', '')
+    except (OSError, ValueError, AttributeError):
+        return ''
+
+def ensure_volume_marker(root_path):
+    """Legt die Markierungsdatei an (schreibgeschützte Medien: nur Seriennummer)"""
+    marker_id = read_volume_marker(root_path)
+    if marker_id:
+        return marker_id
+    marker_id = hashlib.sha1(f"{root_path}|{time.time()}|{os.getpid()}".encode('utf-8')).hexdigest()
+    try:
+        with open(os.path.join(root_path, VOLUME_MARKER_FILE), 'w', encoding='utf-8') as marker:
+            json.dump({'id': marker_id, 'created': datetime.now().isoformat(timespec='seconds')}, marker)
+        return marker_id
+    except OSError as e:
+        print(f"Markierungsdatei nicht möglich ({e}) - Erkennung nur über Seriennummer")
+        return ''
+
+def find_volume_root(conn, path):
+    """Registrierter Bibliotheks-Ordner, der path enthält (längster Treffer) - oder None"""
+    path = os.path.normpath(path)
+    best = None
+    for (registered,) in conn.execute("SELECT root FROM volume_roots"):
+        if path == registered or path.startswith(registered.rstrip('\\/') + os.sep):
+            if best is None or len(registered) > len(best):
+                best = registered
+    return best
+
+def check_volume_root(conn, root_path):
+    """
+    Prüft, ob das Laufwerk eines Bibliotheks-Ordners verbunden ist
+
+    Returns: (verbunden, Grund)
+    """
+    if not os.path.isdir(root_path):
+        return False, "Ordner nicht erreichbar"
+    row = conn.execute("SELECT volume_serial, marker_id FROM volume_roots WHERE root = ?", (root_path,)).fetchone()
+    if row is None:
+        return True, "neu"
+    volume_serial, marker_id = row
+    try:
+        if not os.listdir(root_path):
+            return False, "Ordner leer (Laufwerk nicht eingehängt?)"
+    except OSError as e:
+        return False, f"Ordner nicht lesbar ({e})"
+    current_serial = get_volume_serial(root_path)
+    serial_known = bool(volume_serial and current_serial)
+    if serial_known and current_serial != volume_serial:
+        return False, f"anderes Laufwerk (Kennung {current_serial} statt {volume_serial})"
+    if marker_id:
+        current_marker = read_volume_marker(root_path)
+        if current_marker and current_marker != marker_id:
+            return False, "anderes Laufwerk eingehängt"
+        # Gelöschte Markierung ist unkritisch, solange die Kennung passt (wird neu angelegt)
+        if not current_marker and not serial_known:
+            return False, "Markierungsdatei fehlt (Laufwerk nicht eingehängt?)"
+    return True, ""
+
+def register_volume_root(conn, root_path):
+    """Merkt Kennung und Markierung eines (verbundenen) Bibliotheks-Ordners"""
+    conn.execute(
+        "INSERT OR REPLACE INTO volume_roots (root, volume_serial, marker_id, last_seen) "
+        "VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+        (root_path, get_volume_serial(root_path), ensure_volume_marker(root_path))
+    )
+
+def set_volume_offline(conn, root_path, offline):
+    """Markiert alle Einträge unter root_path als offline bzw. wieder verfügbar"""
+    under_root, root_params = path_prefix_filter(root_path)
+    return conn.execute(
+        f"UPDATE media_files SET offline = ? WHERE {under_root} AND offline != ?",
+        (1 if offline else 0, *root_params, 1 if offline else 0)
+    ).rowcount
+
+def refresh_volume_status():
+    """Gleicht die offline-Markierung aller registrierten Ordner ab (Start + periodisch, im Thread)"""
+    if not os.path.exists('media_index.db'):
+        return
+    reconnected = False
+
+    def update_volume(writer_conn, root_path, online):
+        changed = set_volume_offline(writer_conn, root_path, not online)
+        if online:
+            writer_conn.execute("UPDATE volume_roots SET last_seen = CURRENT_TIMESTAMP WHERE root = ?", (root_path,))
+        return changed
+
+    try:
+        conn = get_read_connection()
+        for (root_path,) in conn.execute("SELECT root FROM volume_roots").fetchall():
+            online, reason = check_volume_root(conn, root_path)
+            changed = db_writer.submit(update_volume, root_path, online).result()
+            if changed:
+                reconnected = reconnected or online
+                state = "wieder verbunden" if online else f"offline ({reason})"
+                print(f"Laufwerk {root_path}: {state} - {changed} Einträge")
+        # Offene Analysen eines wieder verbundenen Laufwerks fortsetzen
+        if reconnected:
+            enrichment_service.start()
+    except sqlite3.Error as e:
+        print(f"Laufwerks-Status konnte nicht geprüft werden: {e}")
+
+def get_offline_paths(paths):
+    """Teilmenge von paths, deren Laufwerk zuletzt nicht verbunden war"""
+    if not paths or not os.path.exists('media_index.db'):
+        return set()
+    offline = set()
+    try:
+        conn = get_read_connection()
+        for i in range(0, len(paths), 500):
+            chunk = paths[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            offline.update(row[0] for row in conn.execute(
+                f"SELECT filepath FROM media_files WHERE offline = 1 AND filepath IN ({placeholders})", chunk
+            ))
+    except sqlite3.Error as e:
+        print(f"Offline-Status konnte nicht gelesen werden: {e}")
+    return offline
+
+RELOCATE_SAMPLE_SIZE = 20       # Stichprobe vor dem Umschreiben der Pfade
+
+def relocate_library_root(old_root, new_root, sample_size=RELOCATE_SAMPLE_SIZE):
+    """
+    Hängt alle Einträge eines Bibliotheks-Ordners auf einen neuen Pfad um (z.B. F:\\ → G:\\)
+
+    Vorher Stichprobe: die Dateien müssen am neuen Ort mit gleicher Größe existieren.
+    media_index.db wird in EINER Transaktion umgeschrieben, danach die Pfad-Schlüssel
+    in media_cache.db (Inhalts-Fingerprints, Quarantäne, Verzeichnis-Snapshots).
+    Cover und Analyse-Ergebnisse hängen am Inhalts-Fingerprint und bleiben gültig.
+    Returns: Anzahl umgehängter Einträge - wirft ValueError, wenn die Prüfung fehlschlägt
+    """
+    old_root = os.path.normpath(old_root)
+    new_root = os.path.normpath(new_root)
+    old_prefix = old_root.rstrip('\\/') + os.sep
+    new_prefix = new_root.rstrip('\\/') + os.sep
+    if old_prefix == new_prefix:
+        raise ValueError("Alter und neuer Pfad sind identisch")
+    if new_prefix.startswith(old_prefix) or old_prefix.startswith(new_prefix):
+        raise ValueError("Alter und neuer Pfad dürfen nicht ineinander liegen")
+    if not os.path.isdir(new_root):
+        raise ValueError(f"Neuer Ordner nicht erreichbar: {new_root}")
+
+    # Exakter Präfix-Vergleich - bei LIKE würden Geschwister wie "Film_A" ↔ "filmXa" mit umgehängt
+    under_old, old_params = path_prefix_filter(old_root)
+    under_new, new_params = path_prefix_filter(new_root)
+    offset = len(old_prefix) + 1
+
+    conn = get_read_connection()
+    # Stichprobe: gleiche Größe am neuen Ort (seit dem letzten Scan gelöschte Dateien toleriert)
+    sample = conn.execute(
+        f"SELECT filepath, file_size FROM media_files WHERE {under_old} ORDER BY RANDOM() LIMIT ?",
+        (*old_params, sample_size)
+    ).fetchall()
+    if not sample:
+        raise ValueError(f"Keine Einträge unter {old_root}")
+    missing = []
+    for filepath, file_size in sample:
+        try:
+            if os.stat(new_prefix + filepath[len(old_prefix):]).st_size != file_size:
+                missing.append(filepath)
+        except OSError:
+            missing.append(filepath)
+    if len(missing) > len(sample) // 10:
+        raise ValueError(f"Stichprobe fehlgeschlagen: {len(missing)} von {len(sample)} Dateien "
+                         f"fehlen am neuen Ort oder haben eine andere Größe, z.B.\n"
+                         f"{new_prefix + missing[0][len(old_prefix):]}")
+
+    marker = conn.execute("SELECT marker_id FROM volume_roots WHERE root = ?", (old_root,)).fetchone()
+    current_marker = read_volume_marker(new_root)
+    if marker and marker[0] and current_marker and current_marker != marker[0]:
+        raise ValueError("Die Markierungsdatei am neuen Ort gehört zu einer anderen Bibliothek")
+
+    def relocate_rows(writer_conn):
+        # Einträge, die ein Scan am neuen Ort schon angelegt hat, weichen den analysierten alten
+        writer_conn.execute(
+            f"DELETE FROM media_files WHERE {under_new} AND ? || substr(filepath, ?) IN "
+            f"(SELECT filepath FROM media_files WHERE {under_old})",
+            (*new_params, old_prefix, len(new_prefix) + 1, *old_params)
+        )
+        relocated = writer_conn.execute(
+            f"UPDATE media_files SET filepath = ? || substr(filepath, ?), offline = 0 WHERE {under_old}",
+            (new_prefix, offset, *old_params)
+        ).rowcount
+        new_root_filter, _ = path_prefix_filter(new_root, 'root')
+        writer_conn.execute(f"DELETE FROM volume_roots WHERE root = ? OR {new_root_filter}", (new_root, *new_params))
+        old_root_filter, _ = path_prefix_filter(old_root, 'root')
+        for table in ('volume_roots', 'scan_sessions'):
+            writer_conn.execute(f"UPDATE {table} SET root = ? || substr(root, ?) WHERE {old_root_filter}",
+                                (new_prefix, offset, *old_params))
+            writer_conn.execute(f"UPDATE {table} SET root = ? WHERE root = ?", (new_root, old_root))
+        writer_conn.execute(f"UPDATE OR REPLACE scan_seen SET filepath = ? || substr(filepath, ?) WHERE {under_old}",
+                            (new_prefix, offset, *old_params))
+        if marker:
+            # Neue Laufwerks-Kennung übernehmen (Markierung wandert mit den Dateien)
+            register_volume_root(writer_conn, new_root)
+        return relocated
+
+    # Eine Transaktion im DB-Writer - scheitert ein Schritt, bleibt alles beim Alten
+    relocated = db_writer.submit(relocate_rows).result()
+
+    try:
+        cache = get_probe_cache_connection()
+        with cache:
+            for table, column in (('probe_cache_paths', 'filepath'), ('quarantine', 'filepath'),
+                                  ('dir_snapshots', 'directory')):
+                under_old_cache, _ = path_prefix_filter(old_root, column)
+                cache.execute(f"UPDATE OR REPLACE {table} SET {column} = ? || substr({column}, ?) "
+                              f"WHERE {under_old_cache}", (new_prefix, offset, *old_params))
+            cache.execute("UPDATE OR REPLACE dir_snapshots SET directory = ? WHERE directory = ?", (new_root, old_root))
+    except sqlite3.Error as e:
+        # Nur Cache - schlimmstenfalls werden Fingerprints neu berechnet
+        print(f"Cache-Schlüssel konnten nicht umgehängt werden: {e}")
+
+    clear_path_classification_cache()
+    get_drive_key.cache_clear()
+    print(f"Bibliothek umgehängt: {old_root} → {new_root} ({relocated} Einträge)")
+    return relocated
+
+def relocate_library_root_dialog():
+    """Settings-Button: Bibliothek nach Laufwerks-/Mount-Wechsel umhängen"""
+    global folder_path
+    if getattr(root, '_scan_in_progress', False):
+        messagebox.showwarning("Scan läuft", "Bitte warten, bis der laufende Scan beendet ist.")
+        return
+    if not os.path.exists('media_index.db'):
+        messagebox.showinfo("Keine Datenbank", "Es gibt noch keine Datenbank.")
+        return
+
+    # Vorschlag: ein als offline markierter Bibliotheks-Ordner, sonst der aktuelle Ordner
+    suggestion = folder_path or ''
+    try:
+        conn = get_read_connection()
+        for (registered,) in conn.execute("SELECT root FROM volume_roots ORDER BY last_seen").fetchall():
+            if not check_volume_root(conn, registered)[0]:
+                suggestion = registered
+                break
+    except sqlite3.Error:
+        pass
+
+    old_root = simpledialog.askstring("Bibliothek umhängen",
+                                      "Bisheriger Pfad der Bibliothek (z.B. F:\\Medien):",
+                                      initialvalue=suggestion)
+    if not old_root:
+        return
+    new_root = filedialog.askdirectory(title="Neuer Ort der Bibliothek")
+    if not new_root:
+        return
+    if not messagebox.askyesno("Bibliothek umhängen",
+                               f"Alle Einträge umhängen?\n\n{os.path.normpath(old_root)}\n→ {os.path.normpath(new_root)}"):
+        return
+
+    stop_library_watcher()
+    enrichment_service.stop(timeout=10)
+    try:
+        relocated = relocate_library_root(old_root, new_root)
+    except (ValueError, sqlite3.Error) as e:
+        messagebox.showerror("Umhängen nicht möglich", str(e))
+        relocated = None
+    finally:
+        enrichment_service.start()
+
+    if relocated is not None:
+        old_prefix = os.path.normpath(old_root).rstrip('\\/') + os.sep
+        if folder_path and (os.path.normpath(folder_path) + os.sep).startswith(old_prefix):
+            folder_path = os.path.normpath(os.path.join(new_root, os.path.relpath(folder_path, old_root)))
+            save_last_directory(folder_path)
+            update_display()
+        messagebox.showinfo("Bibliothek umgehängt", f"{relocated} Einträge zeigen jetzt auf\n{os.path.normpath(new_root)}")
+    restart_library_watcher()
+
+def build_media_record(file_path, file_info=None):
+    """
+    Analysiert eine Mediendatei und baut die Datenbank-Zeile
+
+    Läuft in den Worker-Threads - schreibt NICHT in scan_status,
+    sondern liefert alle Zähler-Infos im Ergebnis zurück.
+
+    file_info: (fingerprint, size, mtime, inode) aus dem Verzeichnis-Scan
+    Returns: dict mit 'row' (Tupel für INSERT) und Status-Informationen
+    """
+    if file_info is None:
+        file_info = get_file_hash(file_path)
+        if file_info is None:
+            raise FileNotFoundError(file_path)
+    fingerprint, file_size, file_mtime, file_inode = file_info
+    parent_folder = os.path.basename(os.path.dirname(file_path))
+    path_meta = classify_path_dynamic(file_path)
+    path_metadata_used = False
+
+    if is_audio_file(file_path):
+        # === AUDIO-VERARBEITUNG (MP3 + FLAC/M4A/AAC/OGG/Opus/WAV über mutagen) ===
+        # EIN Lesevorgang liefert Tags und Stream-Infos
+        audio_record = get_audio_record(file_path)
+        album, track_number, year, id3_genre, contributors, length = audio_record['tags']
+        audio_quality = audio_record['quality']
+
+        # KRITISCH: Genre-Normalisierung
+        final_genre = ''
+
+        # 1. Priorität: ID3-Genre normalisieren
+        if id3_genre:
+            normalized_id3 = normalize_genre(id3_genre)
+            if normalized_id3:
+                final_genre = normalized_id3
+
+        # 2. Fallback: Pfad-Genre normalisieren
+        if not final_genre:
+            path_genre = path_meta.get('genre', '')
+            if path_genre:
+                normalized_path = normalize_genre(path_genre)
+                if normalized_path:
+                    final_genre = normalized_path
+                    path_metadata_used = True
+
+        if id3_genre and id3_genre != final_genre:
+            print(f"Genre normalisiert: '{id3_genre}' → '{final_genre}'")
+
+        # Fallbacks für andere Felder
+        if not year and path_meta.get('year'):
+            year = path_meta['year']
+        if not album and path_meta.get('album'):
+            album = path_meta['album']
+
+        # Medientyp (NICHT Genre!)
+        category = path_meta.get('main_category', 'Musik')
+
+        has_metadata = 1 if (album and category and contributors) else 0
+
+        row = (
+            os.path.basename(file_path), file_path, parent_folder,
+            album, track_number, year,
+            final_genre,  # ← NORMALISIERTES Genre!
+            length, contributors, '', '',
+            category, file_size, audio_quality['bitrate'],
+            '', audio_quality['audio_codec'], '', 0.0,
+            audio_quality['audio_channels'], audio_quality['sample_rate'],
+            has_metadata
+        )
+        detail = f"{os.path.splitext(file_path)[1][1:].upper()}: {final_genre or category} | {audio_quality['bitrate']//1000}kbps"
+
+    else:
+        # === VIDEO-VERARBEITUNG (mit Normalisierung) ===
+        # EIN Header-Lesevorgang (ffprobe nur als Fallback) - Tags, Qualität und Laufzeit werden daraus abgeleitet
+        probe = probe_media_headers(file_path)
+        genre, actors, comment, year = extract_video_tags(probe)
+        video_quality = get_video_quality_info(file_path, probe)
+
+        final_genre = ''
+        if genre:
+            normalized = normalize_genre(genre)
+            if normalized:
+                final_genre = normalized
+
+        if not final_genre and path_meta.get('genre'):
+            normalized = normalize_genre(path_meta['genre'])
+            if normalized:
+                final_genre = normalized
+                path_metadata_used = True
+
+        if not year and path_meta.get('year'):
+            year = path_meta['year']
+        if not actors:
+            actors = path_meta.get('sub_genre') or path_meta.get('series') or ''
+
+        category = path_meta.get('main_category', 'Video')
+        length = extract_media_duration(probe)
+
+        has_metadata = 1 if (final_genre and year) else 0
+
+        row = (
+            os.path.basename(file_path), file_path, parent_folder,
+            '', '', year or '',
+            final_genre or '',  # ← NORMALISIERTES Genre!
+            length, '', actors or '', comment or '',
+            category, file_size, video_quality['bitrate'],
+            video_quality['video_codec'], video_quality['audio_codec'],
+            video_quality['resolution'], video_quality['fps'],
+            video_quality['audio_channels'], video_quality['sample_rate'],
+            has_metadata
+        )
+        resolution_text = video_quality['resolution'] or 'N/A'
+        codec_text = video_quality['video_codec'] or 'N/A'
+        detail = f"VIDEO: {category} | {resolution_text} | {codec_text}"
+
+    # Laufzeit
+    duration_minutes = 0
+    duration_ok = True
+    try:
+        duration_minutes = float(length.replace(' min', '').replace('min', '').strip())
+    except:
+        duration_ok = False
+        length = "0 min"
+        row = row[:7] + (length,) + row[8:]
+
+    row += (fingerprint, file_mtime, file_inode, ENRICHMENT_DONE)
+
+    return {
+        'row': row,
+        'detail': detail,
+        'length': length,
+        'duration_minutes': duration_minutes,
+        'duration_ok': duration_ok,
+        'category': category,
+        'path_metadata_used': path_metadata_used
+    }
+
+def build_filesystem_record(file_path, file_info, pending=ENRICHMENT_PENDING):
+    """
+    Phase 1 des Scans: vorläufige Zeile nur aus Dateisystem-Daten (ohne Datei zu öffnen)
+
+    Name, Pfad, Größe, mtime, Pfad-Klassifizierung und Jahr aus dem Dateinamen -
+    Tags, Laufzeit und Qualität ergänzt die Hintergrund-Analyse.
+    """
+    fingerprint, file_size, file_mtime, file_inode = file_info
+    filename = os.path.basename(file_path)
+    parent_folder = os.path.basename(os.path.dirname(file_path))
+    path_meta = classify_path_dynamic(file_path)
+    audio = is_audio_file(file_path)
+
+    year_match = YEAR_PATTERN.search(os.path.splitext(filename)[0])
+    year = year_match.group() if year_match else (path_meta.get('year') or '')
+    genre = normalize_genre(path_meta['genre']) if path_meta.get('genre') else ''
+    category = path_meta.get('main_category') or ('Musik' if audio else 'Video')
+    album = (path_meta.get('album') or '') if audio else ''
+    actors = '' if audio else (path_meta.get('sub_genre') or path_meta.get('series') or '')
+
+    row = (
+        filename, file_path, parent_folder,
+        album, '', year,
+        genre or '',
+        "0 min", '', actors, '',
+        category, file_size, 0,
+        '', '', '', 0.0,
+        0, 0,
+        0,
+        fingerprint, file_mtime, file_inode, pending
+    )
+    return {'row': row, 'category': category, 'path_metadata_used': bool(genre)}
+
+# === VERSCHIEBEN / UMBENENNEN ===
+def find_moved_files(vanished, candidates):
+    """
+    Ordnet verschwundene Einträge neu aufgetauchten Dateien zu (verschoben/umbenannt)
+
+    vanished / candidates: [(filepath, file_size, file_mtime, file_inode)]
+    Gleiche Größe + mtime, dann Inhalts-Fingerprint (erster/letzter Block) gegen den
+    gespeicherten der alten Datei. Ist keiner gespeichert, genügt gleicher inode
+    oder ein eindeutiges Paar.
+    Returns: [(alter Pfad, neuer Pfad)]
+    """
+    options_by_key = defaultdict(list)
+    for candidate in candidates:
+        options_by_key[(candidate[1], candidate[2])].append(candidate)
+    vanished_per_key = Counter((size, mtime) for _, size, mtime, _ in vanished)
+
+    cache = get_probe_cache_connection()
+    moves = []
+    for old_path, size, mtime, inode in vanished:
+        options = options_by_key.get((size, mtime))
+        if not options:
+            continue
+        known = cache.execute(
+            "SELECT file_size, file_mtime, content_key FROM probe_cache_paths WHERE filepath = ?", (old_path,)
+        ).fetchone()
+        match = None
+        if known and known[0] == size and known[1] == mtime:
+            match = next((option for option in options if get_content_key(option[0]) == known[2]), None)
+        else:
+            same_inode = [option for option in options if inode and option[3] == inode]
+            if len(same_inode) == 1:
+                match = same_inode[0]
+            elif len(options) == 1 and vanished_per_key[(size, mtime)] == 1:
+                match = options[0]
+        if match:
+            options.remove(match)
+            moves.append((old_path, match[0]))
+    return moves
+
+def relink_moved_files(conn, moves):
+    """
+    Übernimmt die Index-Zeilen verschobener Dateien ohne erneute Analyse
+
+    Die alte Zeile (mit Tags/Qualität) erhält Pfad und Fingerprint der neuen Datei,
+    die vorläufige Zeile der neuen Datei entfällt. Aus dem Pfad abgeleitete Werte
+    (Medientyp, Genre/Album/Darsteller ohne Tag) werden für den neuen Ort neu bestimmt.
+    """
+    relinked = 0
+    cache = get_probe_cache_connection()
+    for old_path, new_path in moves:
+        old_row = conn.execute(
+            "SELECT genre, album, actors FROM media_files WHERE filepath = ?", (old_path,)
+        ).fetchone()
+        new_row = conn.execute(
+            "SELECT file_hash, file_size, file_mtime, file_inode FROM media_files WHERE filepath = ?", (new_path,)
+        ).fetchone()
+        if not old_row or not new_row:
+            continue
+        genre, album, actors = old_row
+        old_meta = classify_path_dynamic(old_path)
+        new_meta = classify_path_dynamic(new_path)
+        audio = is_audio_file(new_path)
+
+        if genre == (normalize_genre(old_meta['genre']) if old_meta.get('genre') else ''):
+            genre = normalize_genre(new_meta['genre']) if new_meta.get('genre') else ''
+        if audio and album == (old_meta.get('album') or ''):
+            album = new_meta.get('album') or ''
+        if not audio and actors == (old_meta.get('sub_genre') or old_meta.get('series') or ''):
+            actors = new_meta.get('sub_genre') or new_meta.get('series') or ''
+        category = new_meta.get('main_category') or ('Musik' if audio else 'Video')
+
+        conn.execute("DELETE FROM media_files WHERE filepath = ?", (new_path,))
+        conn.execute("""
+            UPDATE media_files SET filepath = ?, filename = ?, container = ?,
+                file_hash = ?, file_size = ?, file_mtime = ?, file_inode = ?,
+                genre = ?, album = ?, actors = ?, category = ?, last_modified = CURRENT_TIMESTAMP
+            WHERE filepath = ?
+        """, (new_path, os.path.basename(new_path), os.path.basename(os.path.dirname(new_path)))
+             + tuple(new_row) + (genre or '', album or '', actors or '', category, old_path))
+        cache.execute("DELETE FROM probe_cache_paths WHERE filepath = ?", (old_path,))
+        relinked += 1
+    cache.commit()
+    if relinked:
+        print(f"Verschoben/umbenannt: {relinked} Einträge übernommen")
+    return relinked
+
+def probe_media_file(file_path, file_info=None, drive_limiter=None, cancel_event=None):
+    """
+    Worker-Funktion: Analyse mit Laufwerks-Limit
+
+    cancel_event beendet laufende ffprobe/ffmpeg-Prozesse dieses Workers.
+    Bei Timeout/Absturz eines Tools wird KEIN Datensatz geliefert (ToolError),
+    damit der nächste Scan die Datei erneut versucht bzw. in Quarantäne überspringt.
+    """
+    _tool_context.cancel_event = cancel_event
+    try:
+        if drive_limiter is None:
+            return build_media_record(file_path, file_info)
+        with drive_limiter.semaphore_for(file_path):
+            return build_media_record(file_path, file_info)
+    finally:
+        _tool_context.cancel_event = None
+
+# INSERT oder In-Place-Update bei geänderten Dateien (filepath ist UNIQUE)
+MEDIA_UPSERT_SQL = '''
+    INSERT INTO media_files (
+        filename, filepath, container, album, track_number, 
+        year, genre, length, contributors, actors, comment,
+        category, file_size, bitrate, video_codec, audio_codec,
+        resolution, fps, audio_channels, sample_rate, has_metadata,
+        file_hash, file_mtime, file_inode, enrichment_pending
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(filepath) DO UPDATE SET
+        filename = excluded.filename,
+        container = excluded.container,
+        album = excluded.album,
+        track_number = excluded.track_number,
+        year = excluded.year,
+        genre = excluded.genre,
+        length = excluded.length,
+        contributors = excluded.contributors,
+        actors = excluded.actors,
+        comment = excluded.comment,
+        category = excluded.category,
+        file_size = excluded.file_size,
+        bitrate = excluded.bitrate,
+        video_codec = excluded.video_codec,
+        audio_codec = excluded.audio_codec,
+        resolution = excluded.resolution,
+        fps = excluded.fps,
+        audio_channels = excluded.audio_channels,
+        sample_rate = excluded.sample_rate,
+        has_metadata = excluded.has_metadata,
+        file_hash = excluded.file_hash,
+        file_mtime = excluded.file_mtime,
+        file_inode = excluded.file_inode,
+        enrichment_pending = excluded.enrichment_pending,
+        last_modified = CURRENT_TIMESTAMP
+'''
+
+# Ergebnis der Detail-Analyse: nur eintragen, wenn die Zeile noch existiert und die Datei
+# seit dem Abholen unverändert ist - sonst entstünden Geister-Einträge bzw. veraltete Daten
+MEDIA_ENRICH_UPDATE_SQL = '''
+    UPDATE media_files SET
+        filename = ?, container = ?, album = ?, track_number = ?,
+        year = ?, genre = ?, length = ?, contributors = ?, actors = ?, comment = ?,
+        category = ?, file_size = ?, bitrate = ?, video_codec = ?, audio_codec = ?,
+        resolution = ?, fps = ?, audio_channels = ?, sample_rate = ?, has_metadata = ?,
+        file_hash = ?, file_mtime = ?, file_inode = ?, enrichment_pending = ?,
+        last_modified = CURRENT_TIMESTAMP
+    WHERE filepath = ? AND file_hash IS ?
+'''
+
+def enrich_update_params(row, fetched_hash):
+    """MEDIA_UPSERT_SQL-Zeile in die Parameter für MEDIA_ENRICH_UPDATE_SQL umstellen"""
+    return (row[0],) + tuple(row[2:]) + (row[1], fetched_hash)
+
+# Geänderte Datei in Phase 1: alte Metadaten bleiben suchbar, Analyse wird neu vorgemerkt
+MEDIA_MARK_CHANGED_SQL = (
+    "UPDATE media_files SET file_hash = ?, file_size = ?, file_mtime = ?, file_inode = ?, "
+    "enrichment_pending = ?, last_modified = CURRENT_TIMESTAMP WHERE filepath = ?"
+)
+
 def train_db_with_progress():
     """
     KORRIGIERT: Verwendet korrektes Genre-Mapping mit Thread-Safety
@@ -1906,10 +5172,24 @@ def train_db_with_progress():
     if hasattr(root, '_scan_in_progress') and root._scan_in_progress:
         if messagebox.askyesno("Scan läuft", "Ein Scan läuft bereits. Möchten Sie diesen abbrechen?"):
             # Stoppe aktuellen Scan
+            if getattr(root, '_scan_stop_event', None):
+                root._scan_stop_event.set()
             root._scan_in_progress = False
             root.after(1000, train_db_with_progress)  # Neustart nach 1s
         return
     
+    # Unterbrochenen Scan fortsetzen?
+    resume_session = load_unfinished_scan_session(os.path.normpath(folder_path))
+    if resume_session:
+        if not messagebox.askyesno(
+            "Scan fortsetzen",
+            f"Ein unterbrochener Scan wurde gefunden (Stand: {resume_session['updated']}).\n"
+            f"Bereits abgeschlossen: {len(resume_session['completed_dirs'])} Hauptverzeichnisse\n\n"
+            f"Scan an dieser Stelle fortsetzen?\n"
+            f"(Nein = kompletter Neu-Scan)"
+        ):
+            resume_session = None
+    
     root._scan_in_progress = True
     
     progress_window = tk.Toplevel(root)
@@ -1948,11 +5228,13 @@ def train_db_with_progress():
     cleanup_label.pack(pady=2)
 
     stop_scanning = threading.Event()
+    root._scan_stop_event = stop_scanning
 
     scan_status = {
         'total_scanned': 0,
         'new_files_count': 0,
         'updated_files_count': 0,
+        'changed_files_count': 0,
         'path_metadata_used': 0,
         'total_duration_found': 0,
         'duration_errors': 0,
@@ -1965,12 +5247,16 @@ def train_db_with_progress():
         'is_running': True,
         'last_update': 0,
         'deleted_files_count': 0,
+        'moved_files_count': 0,
         'db_entries_checked': 0,
         'cleanup_phase': False,
         'quality_analyzed': 0,
         'current_main_category': '',
         'main_dirs_total': 0,
-        'main_dirs_completed': 0
+        'main_dirs_completed': 0,
+        'files_found': 0,
+        'enumeration_done': False,
+        'quarantined_skipped': 0
     }
 
     def update_gui_from_main_thread():
@@ -1978,14 +5264,20 @@ def train_db_with_progress():
             return
             
         try:
+            # Solange noch gezählt wird, ist die Gesamtzahl nur geschätzt
+            total_text = str(scan_status['total_files'])
+            if not scan_status['enumeration_done']:
+                total_text = f"~{total_text}"
+            
             if scan_status['total_files'] > 0:
                 if scan_status['cleanup_phase']:
                     progress = 100
                     progress_label.config(text=f"Bereinige Datenbank... {scan_status['db_entries_checked']} geprüft")
                 else:
-                    progress = (scan_status['current_file_count'] / scan_status['total_files']) * 100
+                    progress = min(100, (scan_status['current_file_count'] / scan_status['total_files']) * 100)
                     cat_text = f" [{scan_status['current_main_category']}]" if scan_status['current_main_category'] else ""
-                    progress_label.config(text=f"Scan läuft{cat_text}... {progress:.1f}%")
+                    counting_text = "" if scan_status['enumeration_done'] else " (Verzeichnisse werden noch gelesen)"
+                    progress_label.config(text=f"Scan läuft{cat_text}... {progress:.1f}%{counting_text}")
                 
                 progress_bar['value'] = progress
             
@@ -1999,7 +5291,7 @@ def train_db_with_progress():
             if filename:
                 display_name = filename[:60] + "..." if len(filename) > 60 else filename
                 file_progress_label.config(
-                    text=f"({scan_status['current_file_count']}/{scan_status['total_files']}) - {display_name}"
+                    text=f"({scan_status['current_file_count']}/{total_text}) - {display_name}"
                 )
             
             detail_label.config(text=scan_status['current_detail'])
@@ -2007,13 +5299,11 @@ def train_db_with_progress():
             if scan_status['current_duration']:
                 duration_label.config(text=f"Laufzeit: {scan_status['current_duration']}")
             
-            hours = int(scan_status['total_duration_found'] / 60)
-            minutes = int(scan_status['total_duration_found'] % 60)
             stats_label.config(
-                text=f"Gesamt: {hours}h {minutes}m | "
-                     f"Neue: {scan_status['new_files_count']} | "
+                text=f"Neue: {scan_status['new_files_count']} | "
+                     f"Geändert: {scan_status['changed_files_count']} | "
                      f"Übersprungen: {scan_status['updated_files_count']} | "
-                     f"Qualität: {scan_status['quality_analyzed']}"
+                     f"Quarantäne: {scan_status['quarantined_skipped']}"
             )
             
             status_text.config(
@@ -2048,301 +5338,377 @@ def train_db_with_progress():
         - Thread-safe DB-Verbindung
         - MP3-Genre wird normalisiert
         - UTF-8 sichere Genre-Behandlung
+        NEU: Pipeline Walker → Filter → DB-Writer mit begrenzten Queues
+        - Speicherbedarf unabhängig von der Bibliotheksgröße
+        NEU: Zweiphasig - der Scan schreibt nur Dateisystem-Daten (sofort suchbar),
+        ffprobe/Tags liest danach der EnrichmentService im Hintergrund
+        NEU: Bulk-Import beim ersten Scan - große Batches, seltene Commits, Indizes erst am Ende
         """
         try:
-            media_extensions = ('.mp3', '.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv')
+            media_extensions = INDEX_MEDIA_EXTENSIONS
             batch_size = 50
+            filter_batch_size = 500
             
-            # KRITISCH: Connection im Worker-Thread erstellen!
-            conn = sqlite3.connect('media_index.db', timeout=30.0)
+            # KRITISCH: Lese-Verbindung des Worker-Threads - geschrieben wird über db_writer
+            conn = get_read_connection()
             cursor = conn.cursor()
 
             print(f"\n=== STARTE SCAN FÜR: {folder_path} ===")
 
             current_scan_path = os.path.normpath(folder_path)
+            # Exakter Präfix mit Trenner: ein Scan von D:\Film darf D:\Filme nicht bereinigen
+            in_scope, scope_params = path_prefix_filter(current_scan_path)
             
-            # Existing files check
-            cursor.execute("SELECT filepath FROM media_files WHERE filepath LIKE ? ESCAPE '\\'", 
-                         (f"{current_scan_path.replace(chr(92), chr(92)*2)}%",))
-            db_files_in_scope = set(row[0] for row in cursor.fetchall())
-            print(f"Gefunden: {len(db_files_in_scope)} DB-Einträge im Scan-Bereich")
+            # Laufwerk nicht verbunden: Einträge behalten (offline) statt alles zu löschen
+            volume_root = find_volume_root(conn, current_scan_path) or current_scan_path
+            volume_online, volume_reason = check_volume_root(conn, volume_root)
+            if not volume_online:
+                flagged = db_writer.submit(set_volume_offline, volume_root, True).result()
+                print(f"Scan abgebrochen - Laufwerk nicht verbunden: {volume_root} ({volume_reason})")
+                scan_status['is_running'] = False
+                root._scan_in_progress = False
+                root.after(0, lambda: show_volume_offline_dialog(volume_root, volume_reason, flagged))
+                return
+            db_writer.submit(register_volume_root, volume_root)
+            db_writer.submit(set_volume_offline, volume_root, False)
+            
+            # Bisheriger Umfang dient als Schätzung, solange noch gezählt wird
+            cursor.execute(f"SELECT COUNT(*) FROM media_files WHERE {in_scope}", scope_params)
+            db_count_in_scope = cursor.fetchone()[0]
+            print(f"Gefunden: {db_count_in_scope} DB-Einträge im Scan-Bereich")
             
             # Directory structure analysis
             print("Analysiere Verzeichnisstruktur...")
-            main_directories = {}
+            main_directories = []
             
             try:
                 for entry in os.listdir(current_scan_path):
                     entry_path = os.path.join(current_scan_path, entry)
                     if os.path.isdir(entry_path):
-                        main_directories[entry] = []
+                        main_directories.append(entry)
             except Exception as e:
                 print(f"Fehler beim Lesen von {current_scan_path}: {e}")
             
             if not main_directories:
-                main_directories['[Aktueller Ordner]'] = []
+                main_directories.append('[Aktueller Ordner]')
+            main_directories.sort()
             
             scan_status['main_dirs_total'] = len(main_directories)
+            scan_settings = load_scan_settings()
+            
+            # Scan-Session: neu anlegen oder unterbrochene fortsetzen
+            if resume_session:
+                session_id = resume_session['id']
+                completed_dirs = [d for d in resume_session['completed_dirs'] if d in main_directories]
+                for key, value in resume_session['counters'].items():
+                    if key in SCAN_SESSION_COUNTERS:
+                        scan_status[key] = value
+                print(f"Setze Scan fort: {len(completed_dirs)}/{len(main_directories)} Hauptverzeichnisse bereits erledigt")
+            else:
+                # Gesehene Dateien landen in der DB statt in einem Set (für den Cleanup)
+                completed_dirs = []
+                
+                def start_session(writer_conn):
+                    # Nur frühere Sessions desselben Ordners verwerfen - andere bleiben fortsetzbar
+                    writer_conn.execute("DELETE FROM scan_seen WHERE session_id IN "
+                                        "(SELECT id FROM scan_sessions WHERE root = ?)", (current_scan_path,))
+                    writer_conn.execute("DELETE FROM scan_sessions WHERE root = ?", (current_scan_path,))
+                    return writer_conn.execute(
+                        "INSERT INTO scan_sessions (root, phase, completed_dirs, counters) VALUES (?, 'scan', '[]', '{}')",
+                        (current_scan_path,)
+                    ).lastrowid
+                session_id = db_writer.submit(start_session).result()
+            
+            # (Fast) leere DB: Bulk-Import statt Index-Pflege bei jedem Insert
+            db_total = cursor.execute("SELECT COUNT(*) FROM media_files").fetchone()[0]
+            bulk_mode = scan_settings['bulk_ingest'] and db_total <= scan_settings['bulk_ingest_max_rows']
+            if bulk_mode:
+                batch_size = BULK_INGEST_BATCH_SIZE
+                db_writer.submit(begin_bulk_ingest, transaction=False).result()
+                print(f"Bulk-Import-Modus: {db_total} Einträge in der DB - Indizes werden nach dem Scan aufgebaut")
+            
+            scan_status['main_dirs_completed'] = len(completed_dirs)
+            scan_status['total_files'] = max(scan_status['files_found'], db_count_in_scope)
+            
+            walk_queue = queue.Queue(maxsize=8)
+            walk_complete = threading.Event()
+            insert_sql = MEDIA_UPSERT_SQL
+            
+            def put_with_backpressure(target_queue, item):
+                """Blockiert bei voller Queue, reagiert aber auf Abbruch"""
+                while not stop_scanning.is_set():
+                    try:
+                        target_queue.put(item, timeout=0.5)
+                        return True
+                    except queue.Full:
+                        continue
+                return False
+            
+            def enumerate_files():
+                """Stufe 1: Verzeichnisse lesen und Dateien in Paketen weiterreichen"""
+                try:
+                    for main_dir_idx, main_dir_name in enumerate(main_directories, 1):
+                        if stop_scanning.is_set():
+                            return
+                        if main_dir_name in completed_dirs:
+                            continue
+                        
+                        if main_dir_name == '[Aktueller Ordner]':
+                            scan_root = current_scan_path
+                        else:
+                            scan_root = os.path.join(current_scan_path, main_dir_name)
+                        
+                        print(f"\n=== SCANNE HAUPTVERZEICHNIS {main_dir_idx}/{len(main_directories)}: {main_dir_name} ===")
+                        records = []
+                        dir_count = 0
+                        for record in walk_media_files(scan_root, media_extensions, stop_scanning,
+                                                       scan_settings['walker_threads'],
+                                                       scan_settings['skip_unchanged_dirs']):
+                            records.append(record)
+                            dir_count += 1
+                            scan_status['files_found'] += 1
+                            scan_status['total_files'] = max(scan_status['files_found'], db_count_in_scope)
+                            if len(records) >= filter_batch_size:
+                                if not put_with_backpressure(walk_queue, (main_dir_idx, main_dir_name, records)):
+                                    return
+                                records = []
+                        
+                        if records and not put_with_backpressure(walk_queue, (main_dir_idx, main_dir_name, records)):
+                            return
+                        # Ende-Markierung: Verzeichnis vollständig gelesen
+                        if not put_with_backpressure(walk_queue, (main_dir_idx, main_dir_name, None)):
+                            return
+                        print(f"Hauptverzeichnis {main_dir_name}: {dir_count} Mediendateien")
+                    
+                    if not stop_scanning.is_set():
+                        walk_complete.set()
+                        scan_status['total_files'] = scan_status['files_found']
+                        scan_status['enumeration_done'] = True
+                        print(f"Gefunden: {scan_status['files_found']} Mediendateien")
+                except Exception as e:
+                    print(f"Verzeichnis-Scan Fehler: {e}")
+                finally:
+                    put_with_backpressure(walk_queue, None)
             
-            # File collection
-            all_current_files = set()
-            for main_dir_name in main_directories.keys():
-                if stop_scanning.is_set():
-                    break
-                    
-                if main_dir_name == '[Aktueller Ordner]':
-                    scan_root = current_scan_path
-                else:
-                    scan_root = os.path.join(current_scan_path, main_dir_name)
-                
-                for root_dir, _, files in os.walk(scan_root):
-                    if stop_scanning.is_set():
-                        break
-                    for file in files:
-                        if file.lower().endswith(media_extensions):
-                            file_path = os.path.join(root_dir, file)
-                            main_directories[main_dir_name].append(file_path)
-                            all_current_files.add(file_path)
+            # Stufe 3: DB-Writer - offene Aufträge begrenzen, damit der Speicher nicht volläuft
+            in_flight = deque()
             
-            scan_status['total_files'] = len(all_current_files)
-            print(f"Gefunden: {scan_status['total_files']} Mediendateien")
+            def check_writes(block_until):
+                """Erledigte Aufträge abräumen, bei mehr als block_until auf den ältesten warten"""
+                while in_flight and (in_flight[0].done() or len(in_flight) > block_until):
+                    error = in_flight.popleft().exception()
+                    if error is not None:
+                        print(f"DB-Writer Fehler: {error}")
+                        stop_scanning.set()
             
-            new_files = all_current_files - db_files_in_scope
-            existing_files = all_current_files.intersection(db_files_in_scope)
+            def send_to_writer(sql, rows):
+                """Übergibt an den Writer - auch nach Abbruch, damit nichts verloren geht"""
+                in_flight.append(db_writer.executemany(sql, rows))
+                check_writes(DB_WRITER_MAX_IN_FLIGHT)
             
-            print(f"Neue Dateien: {len(new_files)}")
-            print(f"Bereits bekannt (übersprungen): {len(existing_files)}")
+            # Phase 1: nur Dateisystem-Daten - die Analyse übernimmt der Hintergrund-Dienst
+            media_files = []
+            quarantined = load_quarantine_fingerprints()
             
-            scan_status['updated_files_count'] = len(existing_files)
+            def flush_rows():
+                nonlocal media_files
+                if media_files:
+                    send_to_writer(insert_sql, media_files)
+                    print(f"Batch gespeichert: {scan_status['current_main_category']} - {scan_status['current_file_count']}/{scan_status['total_files']}")
+                    media_files = []
             
-            media_files = []
+            def write_checkpoint(main_dir_name):
+                """Checkpoint je fertigem Hauptverzeichnis: Rest-Batch + Session-Stand an den Writer"""
+                completed_dirs.append(main_dir_name)
+                flush_rows()
+                counters = {key: scan_status[key] for key in SCAN_SESSION_COUNTERS}
+                send_to_writer(SCAN_SESSION_CHECKPOINT_SQL, [
+                    (json.dumps(completed_dirs), json.dumps(counters), session_id)
+                ])
+                scan_status['main_dirs_completed'] = len(completed_dirs)
+                print(f"Checkpoint: {main_dir_name} abgeschlossen")
             
-            for main_dir_idx, (main_dir_name, file_list) in enumerate(sorted(main_directories.items()), 1):
-                if stop_scanning.is_set():
-                    break
-                
-                scan_status['current_main_category'] = main_dir_name
-                scan_status['main_dirs_completed'] = main_dir_idx - 1
+            def filter_and_record(records):
+                """Stufe 2: Fingerprint-Vergleich pro Paket (eine DB-Abfrage), vorläufige Zeilen an den Writer"""
+                paths = [record.path for record in records]
+                placeholders = ','.join('?' * len(paths))
+                cursor.execute(f"SELECT filepath, file_hash FROM media_files WHERE filepath IN ({placeholders})", paths)
+                db_fingerprints = dict(cursor.fetchall())
                 
-                print(f"\n=== SCANNE HAUPTVERZEICHNIS {main_dir_idx}/{len(main_directories)}: {main_dir_name} ({len(file_list)} Dateien) ===")
+                send_to_writer("INSERT OR IGNORE INTO scan_seen (session_id, filepath) VALUES (?, ?)",
+                               [(session_id, path) for path in paths])
                 
-                for file_path in file_list:
+                legacy_rows = []
+                changed_rows = []
+                for record in records:
                     if stop_scanning.is_set():
-                        break
-                    
-                    if file_path in existing_files:
-                        scan_status['current_file_count'] += 1
-                        continue
-                    
+                        return
+                    file_path = record.path
+                    file_info = (make_file_fingerprint(record.size, record.mtime, record.inode),
+                                 record.size, record.mtime, record.inode)
                     scan_status['current_file_count'] += 1
                     scan_status['current_file'] = os.path.basename(file_path)
                     
-                    try:
-                        file_size = os.path.getsize(file_path)
-                        parent_folder = os.path.basename(os.path.dirname(file_path))
-
-                        if file_path.lower().endswith('.mp3'):
-                            # === MP3-VERARBEITUNG (KORRIGIERT) ===
-                            album, track_number, year, id3_genre, contributors, length = get_mp3_metadata_with_timeout(file_path)
-                            audio_quality = get_audio_quality_info(file_path)
-                            
-                            path_meta = classify_path_dynamic(file_path)
-                            
-                            # KRITISCH: Genre-Normalisierung
-                            final_genre = ''
-                            
-                            # 1. Priorität: ID3-Genre normalisieren
-                            if id3_genre:
-                                normalized_id3 = normalize_genre(id3_genre)
-                                if normalized_id3:
-                                    final_genre = normalized_id3
-                            
-                            # 2. Fallback: Pfad-Genre normalisieren
-                            if not final_genre:
-                                path_genre = path_meta.get('genre', '')
-                                if path_genre:
-                                    normalized_path = normalize_genre(path_genre)
-                                    if normalized_path:
-                                        final_genre = normalized_path
-                                        scan_status['path_metadata_used'] += 1
-                            
-                            # Debug-Ausgabe
-                            if id3_genre and id3_genre != final_genre:
-                                print(f"Genre normalisiert: '{id3_genre}' → '{final_genre}'")
-                            
-                            # Fallbacks für andere Felder
-                            if not year and path_meta.get('year'):
-                                year = path_meta['year']
-                            if not album and path_meta.get('album'):
-                                album = path_meta['album']
-                            
-                            # Medientyp (NICHT Genre!)
-                            category = path_meta.get('main_category', 'Musik')
-                            if category:
-                                scan_status['medientyp_erkannt'] += 1
-                            
-                            # Laufzeit
-                            duration_minutes = 0
-                            try:
-                                duration_minutes = float(length.replace(' min', '').replace('min', '').strip())
-                                scan_status['total_duration_found'] += duration_minutes
-                            except:
-                                scan_status['duration_errors'] += 1
-                                length = "0 min"
-                            
-                            has_metadata = 1 if (album and category and contributors) else 0
-                            
-                            # === SPEICHERN MIT NORMALISIERTEM GENRE ===
-                            media_files.append((
-                                os.path.basename(file_path), file_path, parent_folder, 
-                                album, track_number, year, 
-                                final_genre,  # ← NORMALISIERTES Genre!
-                                length, contributors, '', '',
-                                category, file_size, audio_quality['bitrate'], 
-                                '', audio_quality['audio_codec'], '', 0.0,
-                                audio_quality['audio_channels'], audio_quality['sample_rate'],
-                                has_metadata
-                            ))
-                            
-                            scan_status['current_detail'] = f"MP3: {final_genre or category} | {audio_quality['bitrate']//1000}kbps"
-                            scan_status['current_duration'] = f"{length} ({duration_minutes:.1f} min)"
-                        
-                        else:
-                            # === VIDEO-VERARBEITUNG (mit Normalisierung) ===
-                            path_meta = classify_path_dynamic(file_path)
-                            genre, actors, comment, year = get_media_metadata_hidden(file_path)
-                            video_quality = get_video_quality_info(file_path)
-                            
-                            # Genre normalisieren
-                            final_genre = ''
-                            if genre:
-                                normalized = normalize_genre(genre)
-                                if normalized:
-                                    final_genre = normalized
-                            
-                            if not final_genre and path_meta.get('genre'):
-                                path_genre = path_meta['genre']
-                                normalized = normalize_genre(path_genre)
-                                if normalized:
-                                    final_genre = normalized
-                                    scan_status['path_metadata_used'] += 1
-                            
-                            if not year and path_meta.get('year'):
-                                year = path_meta['year']
-                            if not actors:
-                                actors = path_meta.get('sub_genre') or path_meta.get('series') or ''
-                            
-                            category = path_meta.get('main_category', 'Video')
-                            if category:
-                                scan_status['medientyp_erkannt'] += 1
-                            
-                            length = get_media_duration(file_path)
-                            duration_minutes = 0
-                            try:
-                                duration_minutes = float(length.replace(' min', '').replace('min', '').strip())
-                                scan_status['total_duration_found'] += duration_minutes
-                            except:
-                                scan_status['duration_errors'] += 1
-                                length = "0 min"
-                            
-                            has_metadata = 1 if (final_genre and year) else 0
-                                
-                            media_files.append((
-                                os.path.basename(file_path), file_path, parent_folder, 
-                                '', '', year or '', 
-                                final_genre or '',  # ← NORMALISIERTES Genre!
-                                length, '', actors or '', comment or '',
-                                category, file_size, video_quality['bitrate'],
-                                video_quality['video_codec'], video_quality['audio_codec'],
-                                video_quality['resolution'], video_quality['fps'],
-                                video_quality['audio_channels'], video_quality['sample_rate'],
-                                has_metadata
-                            ))
-                            
-                            resolution_text = video_quality['resolution'] or 'N/A'
-                            codec_text = video_quality['video_codec'] or 'N/A'
-                            scan_status['current_detail'] = f"VIDEO: {category} | {resolution_text} | {codec_text}"
-                            scan_status['current_duration'] = f"{length} ({duration_minutes:.1f} min)"
-
+                    # Quarantäne: Eintrag anlegen, aber nicht analysieren
+                    pending = ENRICHMENT_PENDING
+                    if quarantined.get(file_path) == file_info[0]:
+                        scan_status['quarantined_skipped'] += 1
+                        pending = ENRICHMENT_FAILED
+                    
+                    if file_path in db_fingerprints:
+                        stored = db_fingerprints[file_path]
+                        if stored is None:
+                            # Alt-Eintrag ohne Fingerprint: als unverändert übernehmen und nachtragen
+                            legacy_rows.append(file_info + (file_path,))
+                            stored = file_info[0]
+                        if stored == file_info[0]:
+                            scan_status['updated_files_count'] += 1
+                            continue
+                        # Geändert: bisherige Metadaten bleiben bis zur Analyse suchbar
+                        changed_rows.append(file_info + (pending, file_path))
+                        scan_status['changed_files_count'] += 1
                         scan_status['total_scanned'] += 1
-                        scan_status['new_files_count'] += 1
-                        scan_status['quality_analyzed'] += 1
-
-                        # Batch-Insert
-                        if len(media_files) >= batch_size:
-                            cursor.executemany('''
-                                INSERT INTO media_files (
-                                    filename, filepath, container, album, track_number, 
-                                    year, genre, length, contributors, actors, comment,
-                                    category, file_size, bitrate, video_codec, audio_codec,
-                                    resolution, fps, audio_channels, sample_rate, has_metadata
-                                )
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', media_files)
-                            conn.commit()
-                            media_files = []
-                            print(f"Batch gespeichert: {main_dir_name} - {scan_status['current_file_count']}/{scan_status['total_files']}")
-
-                    except Exception as e:
-                        print(f"Fehler bei {file_path}: {e}")
-                        scan_status['duration_errors'] += 1
                         continue
+                    
+                    record_info = build_filesystem_record(file_path, file_info, pending)
+                    media_files.append(record_info['row'])
+                    scan_status['new_files_count'] += 1
+                    scan_status['total_scanned'] += 1
+                    if record_info['path_metadata_used']:
+                        scan_status['path_metadata_used'] += 1
+                    if record_info['category']:
+                        scan_status['medientyp_erkannt'] += 1
+                    scan_status['current_detail'] = f"Erfasst: {record_info['category']}"
+                    if len(media_files) >= batch_size:
+                        flush_rows()
                 
-                scan_status['main_dirs_completed'] = main_dir_idx
-
-            # Letzter Batch
-            if media_files and not stop_scanning.is_set():
+                if changed_rows:
+                    send_to_writer(MEDIA_MARK_CHANGED_SQL, changed_rows)
+                if legacy_rows:
+                    send_to_writer(
+                        "UPDATE media_files SET file_hash = ?, file_size = ?, file_mtime = ?, file_inode = ? WHERE filepath = ?",
+                        legacy_rows
+                    )
+                    print(f"Fingerprints nachgetragen: {len(legacy_rows)}")
+            
+            walker_thread = threading.Thread(target=enumerate_files, daemon=True, name='scan-walker')
+            walker_thread.start()
+            
+            current_main_idx = 0
+            while not stop_scanning.is_set():
                 try:
-                    cursor.executemany('''
-                        INSERT INTO media_files (
-                            filename, filepath, container, album, track_number, 
-                            year, genre, length, contributors, actors, comment,
-                            category, file_size, bitrate, video_codec, audio_codec,
-                            resolution, fps, audio_channels, sample_rate, has_metadata
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', media_files)
-                    conn.commit()
-                except Exception as e:
-                    print(f"Fehler beim Einfügen der letzten Batch: {e}")
+                    item = walk_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    break
+                
+                main_dir_idx, main_dir_name, records = item
+                if main_dir_idx != current_main_idx:
+                    current_main_idx = main_dir_idx
+                    scan_status['current_main_category'] = main_dir_name
+                
+                if records is None:
+                    write_checkpoint(main_dir_name)
+                else:
+                    filter_and_record(records)
+            
+            # Letzter Batch - auch bei Abbruch: bereits erfasste Dateien nicht verwerfen
+            flush_rows()
+            
+            in_flight.append(db_writer.flush())
+            check_writes(0)
+            
+            # Indizes auch nach Abbruch wiederherstellen - sonst bleiben Suchen langsam
+            if bulk_mode:
+                db_writer.submit(finish_bulk_ingest, transaction=False).result()
 
-            # Cleanup
-            if not stop_scanning.is_set():
+            # Cleanup - nur nach vollständigem Durchlauf (sonst fehlen Einträge in scan_seen)
+            if not stop_scanning.is_set() and walk_complete.is_set():
                 print(f"\n=== STARTE CLEANUP FÜR: {current_scan_path} ===")
                 scan_status['cleanup_phase'] = True
+                db_writer.execute("UPDATE scan_sessions SET phase = 'cleanup', updated = CURRENT_TIMESTAMP WHERE id = ?",
+                                  (session_id,))
                 
-                deleted_files = db_files_in_scope - all_current_files
+                # Laufwerk während des Scans getrennt? Dann fehlt scan_seen zu Unrecht - nichts löschen
+                volume_online, volume_reason = check_volume_root(conn, volume_root)
                 
-                if deleted_files:
-                    delete_batch_size = 100
-                    deleted_list = list(deleted_files)
-                    
-                    for i in range(0, len(deleted_list), delete_batch_size):
-                        if stop_scanning.is_set():
-                            break
-                        
-                        batch = deleted_list[i:i + delete_batch_size]
-                        placeholders = ','.join('?' * len(batch))
-                        
-                        cursor.execute(f"DELETE FROM media_files WHERE filepath IN ({placeholders})", batch)
-                        conn.commit()
-                        
-                        scan_status['deleted_files_count'] += len(batch)
+                # Verschobene/umbenannte Dateien: alte Zeile übernehmen statt löschen + neu analysieren
+                vanished = cursor.execute(f"""
+                    SELECT filepath, file_size, file_mtime, file_inode FROM media_files
+                    WHERE {in_scope}
+                      AND filepath NOT IN (SELECT filepath FROM scan_seen WHERE session_id = ?)
+                """, (*scope_params, session_id)).fetchall()
+                if vanished and volume_online:
+                    sizes = list({row[1] for row in vanished})
+                    candidates = []
+                    for i in range(0, len(sizes), 500):
+                        chunk = sizes[i:i + 500]
+                        placeholders = ','.join('?' * len(chunk))
+                        candidates += cursor.execute(f"""
+                            SELECT m.filepath, m.file_size, m.file_mtime, m.file_inode
+                            FROM media_files m JOIN scan_seen s ON s.session_id = ? AND s.filepath = m.filepath
+                            WHERE m.enrichment_pending = ? AND m.file_size IN ({placeholders})
+                        """, [session_id, ENRICHMENT_PENDING] + chunk).fetchall()
+                    moves = find_moved_files(vanished, candidates)
+                    scan_status['moved_files_count'] = db_writer.submit(relink_moved_files, moves).result()
+                
+                def finish_cleanup(writer_conn):
+                    """Nicht gesehene Einträge entfernen und Session abschließen - eine Transaktion"""
+                    deleted = 0
+                    if volume_online:
+                        deleted = writer_conn.execute(f"""
+                            DELETE FROM media_files
+                            WHERE {in_scope}
+                              AND filepath NOT IN (SELECT filepath FROM scan_seen WHERE session_id = ?)
+                        """, (*scope_params, session_id)).rowcount
+                    else:
+                        flagged = writer_conn.execute(f"""
+                            UPDATE media_files SET offline = 1
+                            WHERE {in_scope}
+                              AND filepath NOT IN (SELECT filepath FROM scan_seen WHERE session_id = ?)
+                        """, (*scope_params, session_id)).rowcount
+                        print(f"Laufwerk nicht mehr verbunden ({volume_reason}) - Löschen verweigert, "
+                              f"{flagged} Einträge offline markiert")
+                    writer_conn.execute("DELETE FROM scan_seen WHERE session_id = ?", (session_id,))
+                    writer_conn.execute("UPDATE scan_sessions SET phase = 'done', updated = CURRENT_TIMESTAMP WHERE id = ?",
+                                        (session_id,))
+                    return deleted
+                
+                scan_status['deleted_files_count'] = db_writer.submit(finish_cleanup).result()
+                scan_status['db_entries_checked'] = db_count_in_scope
+                schedule_fuzzy_index_refresh()
+            else:
+                print(f"Scan unterbrochen - Cleanup übersprungen, Fortsetzen beim nächsten Start möglich "
+                      f"({len(completed_dirs)}/{len(main_directories)} Hauptverzeichnisse abgeschlossen)")
 
-            conn.close()
             scan_status['is_running'] = False
             root._scan_in_progress = False
             
             if not stop_scanning.is_set():
+                enrichment_service.start()
                 root.after(0, lambda: show_scan_complete_dialog())
 
         except Exception as e:
             print(f"Scanning-Thread Fehler: {e}")
             import traceback
             traceback.print_exc()
+            # Fehlende Indizes legt das nächste ensure_db_schema wieder an
+            bulk_ingest_active.clear()
             scan_status['is_running'] = False
             root._scan_in_progress = False
 
+    def show_volume_offline_dialog(volume_root, reason, flagged):
+        if progress_window.winfo_exists():
+            cleanup_progress_window(progress_window)
+        messagebox.showwarning(
+            "Laufwerk nicht verbunden",
+            f"Der Bibliotheks-Ordner ist nicht erreichbar:\n{volume_root}\n\n"
+            f"Grund: {reason}\n\n"
+            f"Es wurde nichts gelöscht - {flagged} Einträge sind als offline markiert\n"
+            f"und werden in den Suchergebnissen ausgegraut angezeigt."
+        )
+
     def show_scan_complete_dialog():
         if progress_window.winfo_exists():
             cleanup_progress_window(progress_window)
@@ -2350,8 +5716,7 @@ def train_db_with_progress():
         winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
         play_tts_message()
         
-        total_hours = int(scan_status['total_duration_found'] / 60)
-        total_minutes = int(scan_status['total_duration_found'] % 60)
+        pending = enrichment_service.count_pending()
         
         summary_message = (
             f"Scan abgeschlossen!\n\n"
@@ -2359,31 +5724,620 @@ def train_db_with_progress():
             f"Hauptverzeichnisse: {scan_status['main_dirs_total']}\n"
             f"Dateien gescannt: {scan_status['total_scanned']}\n"
             f"Neue Dateien: {scan_status['new_files_count']}\n"
+            f"Geänderte Dateien: {scan_status['changed_files_count']}\n"
             f"Übersprungen: {scan_status['updated_files_count']}\n"
-            f"Qualität analysiert: {scan_status['quality_analyzed']}\n"
             f"Pfad-Metadaten genutzt: {scan_status['path_metadata_used']}\n"
-            f"Medientypen erkannt: {scan_status['medientyp_erkannt']}\n\n"
+            f"Medientypen erkannt: {scan_status['medientyp_erkannt']}\n"
+            f"Quarantäne (übersprungen): {scan_status['quarantined_skipped']}\n\n"
             f"BEREINIGUNG:\n"
+            f"Verschoben/umbenannt: {scan_status['moved_files_count']}\n"
             f"Gelöschte Einträge: {scan_status['deleted_files_count']}\n"
             f"(Nur im Scan-Pfad: {folder_path})\n\n"
-            f"LAUFZEIT:\n"
-            f"Gesamtlaufzeit: {total_hours}h {total_minutes}m\n"
-            f"Fehler: {scan_status['duration_errors']}"
+            f"DETAIL-ANALYSE:\n"
+            f"Dauer, Qualität und Tags werden im Hintergrund ergänzt\n"
+            f"Ausstehend: {pending} Dateien"
         )
         messagebox.showinfo("Scan Abgeschlossen", summary_message)
 
     progress_window.after(100, update_gui_from_main_thread)
     
     scan_thread = threading.Thread(target=run_ffprobe, daemon=True)
+    root._scan_thread = scan_thread
     scan_thread.start()
     
+# === HINTERGRUND-ANALYSE ===
+# Phase 2: ffprobe/Tags für vorgemerkte Einträge (enrichment_pending = 1) nachtragen
+ENRICHMENT_FETCH_SIZE = 500     # Einträge pro DB-Abfrage
+ENRICHMENT_BATCH_SIZE = 50      # Ergebnisse pro Schreib-Transaktion
+ENRICHMENT_IDLE_SECONDS = 5     # Wartezeit auf neue Einträge, bevor der Thread endet
+ENRICHMENT_PRIORITY_LIMIT = 1000  # Max. vorgezogene Dateien pro Anforderung (z.B. Suchtreffer)
+
+# Vorrang-Stufen (kleiner = früher); danach folgen angezeigter Ordner und Rest der Bibliothek
+PRIORITY_HOVER = 0      # Tooltip für noch nicht analysierte Datei
+PRIORITY_SEARCH = 1     # aktuelle Suchergebnisse
+
+class EnrichmentService:
+    """
+    Analysiert im Hintergrund alle Einträge, die der Scan nur aus dem Dateisystem angelegt hat
+
+    - Ein Thread holt Pakete aus der DB, ein Worker-Pool analysiert mit Laufwerks-Limit
+    - Ergebnisse werden gebündelt geschrieben (enrichment_pending = 0) - nur für Einträge,
+      die noch existieren und seit dem Abholen unverändert sind
+    - Fehlschläge und Quarantäne-Dateien werden markiert (enrichment_pending = 2)
+    - Pausiert während eines Voll-Scans (außer für Tooltip-/Such-Anfragen)
+    Reihenfolge: Tooltip-Anfragen → Suchtreffer → angezeigter Ordner → Rest (nach id)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._priority = []          # heapq: (Stufe, laufende Nr., Pfad)
+        self._priority_levels = {}   # Pfad -> aktuell gültige Stufe (ältere Heap-Einträge verfallen)
+        self._priority_seq = 0
+        self._focus_folder = None
+        self.status = {'running': False, 'pending': 0, 'done': 0, 'errors': 0, 'current_file': ''}
+
+    def start(self):
+        """Startet den Dienst bzw. weckt ihn für neu vorgemerkte Einträge"""
+        with self._lock:
+            if self._thread is not None:
+                self._wakeup.set()
+                return
+            if not os.path.exists('media_index.db'):
+                return
+            self._stop.clear()
+            self.status.update(running=True, done=0, errors=0, current_file='')
+            self._thread = threading.Thread(target=self._run, daemon=True, name='enrichment')
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Beendet den Dienst - laufende ffprobe-Prozesse werden abgebrochen, Einträge bleiben vorgemerkt"""
+        with self._lock:
+            thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        self._wakeup.set()
+        thread.join(timeout)
+
+    def prioritize(self, paths, level):
+        """Zieht Dateien vor - nicht (mehr) vorgemerkte Pfade werden beim Abholen übergangen"""
+        with self._lock:
+            for path in paths[:ENRICHMENT_PRIORITY_LIMIT]:
+                path = os.path.normpath(path)
+                current = self._priority_levels.get(path)
+                if current is not None and current <= level:
+                    continue
+                self._priority_levels[path] = level
+                self._priority_seq += 1
+                heapq.heappush(self._priority, (level, self._priority_seq, path))
+        self.start()
+
+    def focus_folder(self, path):
+        """Angezeigter Ordner - seine Einträge kommen vor dem Rest der Bibliothek"""
+        self._focus_folder = os.path.normpath(path) if path else None
+        self._wakeup.set()
+
+    def is_pending(self, file_path):
+        """True, wenn die Datei im Index steht, aber noch nicht analysiert wurde"""
+        if not os.path.exists('media_index.db'):
+            return False
+        try:
+            row = get_read_connection().execute(
+                "SELECT enrichment_pending FROM media_files WHERE filepath = ?", (os.path.normpath(file_path),)
+            ).fetchone()
+        except sqlite3.Error:
+            return False
+        return bool(row) and row[0] == ENRICHMENT_PENDING
+
+    def count_pending(self):
+        try:
+            return get_read_connection().execute(
+                "SELECT COUNT(*) FROM media_files WHERE enrichment_pending = ?", (ENRICHMENT_PENDING,)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def _pop_priority(self, limit):
+        with self._lock:
+            paths = []
+            while self._priority and len(paths) < limit:
+                level, _, path = heapq.heappop(self._priority)
+                if self._priority_levels.get(path) == level:
+                    del self._priority_levels[path]
+                    paths.append(path)
+            return paths
+
+    def _next_rows(self, conn, limit, priority_only=False):
+        """Nächstes Paket nach Vorrang - Returns: (rows, vorgezogen)"""
+        # Einträge auf getrennten Laufwerken warten, bis das Laufwerk wieder da ist
+        select = ("SELECT filepath, file_hash, file_size, file_mtime, file_inode FROM media_files "
+                  "WHERE enrichment_pending = ? AND offline = 0")
+        while True:
+            paths = self._pop_priority(limit)
+            if not paths:
+                break
+            placeholders = ','.join('?' * len(paths))
+            rows = conn.execute(f"{select} AND filepath IN ({placeholders})", [ENRICHMENT_PENDING] + paths).fetchall()
+            if rows:
+                return rows, True
+        if priority_only:
+            return [], False
+
+        focus = self._focus_folder
+        if focus:
+            in_focus, focus_params = path_prefix_filter(focus)
+            rows = conn.execute(f"{select} AND {in_focus} ORDER BY id LIMIT ?",
+                                (ENRICHMENT_PENDING, *focus_params, ENRICHMENT_FETCH_SIZE)).fetchall()
+            if rows:
+                return rows, False
+            if self._focus_folder == focus:
+                self._focus_folder = None
+
+        rows = conn.execute(f"{select} ORDER BY id LIMIT ?", (ENRICHMENT_PENDING, ENRICHMENT_FETCH_SIZE)).fetchall()
+        return rows, False
+
+    def _finish(self):
+        """True, wenn der Thread enden darf (kein neuer Auftrag seit der letzten Abfrage)"""
+        with self._lock:
+            if self._wakeup.is_set() and not self._stop.is_set():
+                return False
+            self._thread = None
+            self.status.update(running=False, current_file='')
+            return True
+
+    def _run(self):
+        executor = None
+        try:
+            conn = get_read_connection()
+            scan_settings = load_scan_settings()
+            drive_limiter = DriveLimiter(scan_settings['workers_per_drive'], scan_settings['drive_limits'])
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=scan_settings['workers'], thread_name_prefix='enrich'
+            )
+            print(f"Detail-Analyse gestartet: {scan_settings['workers']} Threads")
+            failed_once = set()
+
+            while True:
+                self._wakeup.clear()
+                if self._stop.is_set():
+                    if self._finish():
+                        break
+                    continue
+                # Während eines Voll-Scans nur Tooltip-/Such-Anfragen bedienen
+                scanning = getattr(root, '_scan_in_progress', False)
+                max_in_flight = scan_settings['workers'] * 4
+                rows, prioritized = self._next_rows(conn, max_in_flight, priority_only=scanning)
+                if scanning and not rows:
+                    self._wakeup.wait(1.0)
+                    continue
+                if not rows:
+                    self.status['pending'] = 0
+                    if self._wakeup.wait(ENRICHMENT_IDLE_SECONDS) or not self._finish():
+                        continue
+                    break
+
+                self.status['pending'] = self.count_pending()
+                self._process(conn, executor, drive_limiter, rows, failed_once, max_in_flight, not prioritized)
+
+            print(f"Detail-Analyse beendet: {self.status['done']} analysiert, {self.status['errors']} Fehler")
+            schedule_fuzzy_index_refresh(throttled=True)
+        except Exception as e:
+            print(f"Detail-Analyse Fehler: {e}")
+            self._stop.set()
+            self._finish()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _process(self, conn, executor, drive_limiter, rows, failed_once, max_in_flight, preemptible):
+        """
+        Analysiert ein Paket und schreibt die Ergebnisse gebündelt
+
+        preemptible: Paket bei neuen Vorrang-Anfragen abbrechen (Rest bleibt vorgemerkt)
+        """
+        in_flight = {}
+        records = []
+        failures = []
+        writes = []
+
+        def write_results(writer_conn, records, failures):
+            # Gelöschte, verschobene oder inzwischen geänderte Einträge bleiben unberührt
+            if records:
+                writer_conn.executemany(MEDIA_ENRICH_UPDATE_SQL, records)
+            if failures:
+                writer_conn.executemany(
+                    "UPDATE media_files SET enrichment_pending = ? WHERE filepath = ? AND file_hash IS ?", failures
+                )
+
+        def flush():
+            # An den DB-Writer - gewartet wird erst am Paketende
+            if records or failures:
+                writes.append(db_writer.submit(write_results, list(records), list(failures)))
+            records.clear()
+            failures.clear()
+
+        def handle(future):
+            file_path, file_hash = in_flight.pop(future)
+            self.status['current_file'] = os.path.basename(file_path)
+            try:
+                records.append(enrich_update_params(future.result()['row'], file_hash))
+                self.status['done'] += 1
+            except concurrent.futures.CancelledError:
+                return
+            except ToolError as e:
+                if e.reason == 'cancelled':
+                    return
+                # Timeout/Absturz: einmal erneut versuchen, danach (bzw. in Quarantäne) aufgeben
+                if e.reason == 'quarantined' or file_path in failed_once or is_quarantined(file_path):
+                    failures.append((ENRICHMENT_FAILED, file_path, file_hash))
+                    self.status['errors'] += 1
+                else:
+                    failed_once.add(file_path)
+            except Exception as e:
+                print(f"Detail-Analyse: Fehler bei {file_path}: {e}")
+                failures.append((ENRICHMENT_FAILED, file_path, file_hash))
+                self.status['errors'] += 1
+            self.status['pending'] = max(0, self.status['pending'] - 1)
+            if len(records) + len(failures) >= ENRICHMENT_BATCH_SIZE:
+                flush()
+
+        for file_path, file_hash, file_size, file_mtime, file_inode in rows:
+            if self._stop.is_set():
+                break
+            if preemptible and (self._priority or getattr(root, '_scan_in_progress', False)):
+                break
+            if not os.path.exists(file_path):
+                failures.append((ENRICHMENT_FAILED, file_path, file_hash))
+                continue
+            while len(in_flight) >= max_in_flight:
+                done, _ = concurrent.futures.wait(list(in_flight), timeout=0.5,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    handle(future)
+            file_info = (file_hash, file_size, file_mtime, file_inode)
+            future = executor.submit(probe_media_file, file_path, file_info, drive_limiter, self._stop)
+            in_flight[future] = (file_path, file_hash)
+
+        # Restliche Worker abwarten - bei Abbruch beenden sie sich über self._stop
+        while in_flight:
+            done, _ = concurrent.futures.wait(list(in_flight), timeout=0.5)
+            for future in done:
+                handle(future)
+        flush()
+        # Vor dem nächsten Paket muss alles geschrieben sein - sonst kommen dieselben Einträge erneut
+        for future in writes:
+            future.result()
+
+enrichment_service = EnrichmentService()
+
+def update_enrichment_label():
+    """Fortschritt der Hintergrund-Analyse im Hauptfenster"""
+    try:
+        status = enrichment_service.status
+        if status['running'] and status['pending']:
+            text = f"🔍 Detail-Analyse: {status['done']} fertig, {status['pending']} ausstehend"
+            if status['errors']:
+                text += f", {status['errors']} Fehler"
+            enrichment_label.config(text=text)
+        else:
+            enrichment_label.config(text="")
+        root.after(1000, update_enrichment_label)
+    except tk.TclError:
+        pass
+
+# === LIVE-ÜBERWACHUNG (WATCHER) ===
+# Index zwischen zwei Synchronisierungen aktuell halten
+DEFAULT_WATCH_POLL_INTERVAL = 60    # Sekunden (Polling-Modus für Netzlaufwerke)
+WATCH_DEBOUNCE_SECONDS = 2.0        # Ruhezeit nach dem letzten Ereignis
+WATCH_MAX_DELAY_SECONDS = 15.0      # Spätestens dann wird auch bei Dauerfeuer geschrieben
+NETWORK_FILESYSTEMS = ('cifs', 'smbfs', 'smb3', 'nfs', 'nfs4', 'fuse.sshfs', 'afpfs', '9p')
+
+library_watcher = None
+
+def is_network_path(path):
+    """Erkennt Netzlaufwerke - dort liefern Dateisystem-Ereignisse keine verlässlichen Daten"""
+    path = os.path.abspath(path)
+    if path.startswith('\\\\'):
+        return True
+    if os.name == 'nt':
+        try:
+            import ctypes
+            drive = os.path.splitdrive(path)[0] + '\\'
+            return ctypes.windll.kernel32.GetDriveTypeW(drive) == 4  # DRIVE_REMOTE
+        except Exception:
+            return False
+    try:
+        mount_point = get_drive_key(path)
+        with open('/proc/mounts', encoding='utf-8') as mounts:
+            for line in mounts:
+                parts = line.split()
+                if len(parts) > 2 and parts[1] == mount_point:
+                    return parts[2] in NETWORK_FILESYSTEMS
+    except OSError:
+        pass
+    return False
+
+class LibraryWatcher:
+    """
+    Überwacht den Bibliotheksordner und pflegt Änderungen einzeln in den Index ein
+
+    - Lokale Laufwerke: Ereignisse über watchdog (inotify / ReadDirectoryChangesW)
+    - Netzlaufwerke oder ohne watchdog: Polling der Verzeichnis-mtimes
+      Achtung: Direkt überschriebene Dateien ändern die Ordner-mtime nicht - solche
+      Änderungen sieht erst der nächste Scan.
+    Ereignisse werden gesammelt (Entprellung) und gebündelt in wenigen Transaktionen geschrieben.
+    """
+
+    # Stärkere Prüfung gewinnt beim Zusammenfassen
+    KIND_PRIORITY = {'file': 0, 'dir': 1, 'tree': 2}
+    # Nur Änderungen zählen - 'opened'/'closed_no_write' (z.B. beim Abspielen) werden ignoriert
+    FILE_EVENT_TYPES = ('created', 'modified', 'deleted', 'moved')
+
+    def __init__(self, root_path, poll_interval=DEFAULT_WATCH_POLL_INTERVAL):
+        self.root_path = os.path.normpath(root_path)
+        self.poll_interval = max(5, poll_interval)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._first_event = 0
+        self._last_event = 0
+        self._observer = None
+
+    def start(self):
+        mode = 'Polling'
+        if watchdog_available and not is_network_path(self.root_path):
+            try:
+                self._observer = Observer()
+                self._observer.schedule(self, self.root_path, recursive=True)
+                self._observer.start()
+                mode = 'Dateisystem-Ereignisse'
+            except Exception as e:
+                print(f"Watcher-Ereignisse nicht verfügbar ({e}) - nutze Polling")
+                self._observer = None
+
+        if self._observer is None:
+            threading.Thread(target=self._poll_loop, daemon=True, name='watch-poll').start()
+        threading.Thread(target=self._flush_loop, daemon=True, name='watch-flush').start()
+        print(f"Live-Überwachung aktiv ({mode}): {self.root_path}")
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+                self._observer.join(timeout=5)
+            except Exception:
+                pass
+        print(f"Live-Überwachung beendet: {self.root_path}")
+
+    def queue_change(self, path, kind):
+        """Merkt eine Änderung vor ('file' = Datei, 'dir' = Ordnerinhalt, 'tree' = ganzer Unterbaum)"""
+        path = os.path.normpath(path)
+        now = time.time()
+        with self._lock:
+            if not self._pending:
+                self._first_event = now
+            self._last_event = now
+            previous = self._pending.get(path)
+            if previous is None or self.KIND_PRIORITY[kind] > self.KIND_PRIORITY[previous]:
+                self._pending[path] = kind
+        self._wakeup.set()
+
+    def dispatch(self, event):
+        """watchdog-Schnittstelle (Observer ruft dispatch für jedes Ereignis auf)"""
+        paths = [event.src_path]
+        if getattr(event, 'dest_path', None):
+            paths.append(event.dest_path)
+
+        if event.is_directory:
+            if event.event_type in ('created', 'deleted', 'moved'):
+                for path in paths:
+                    self.queue_change(path, 'tree')
+            return
+        if event.event_type not in self.FILE_EVENT_TYPES:
+            return
+
+        for path in paths:
+            if path.lower().endswith(INDEX_MEDIA_EXTENSIONS):
+                self.queue_change(path, 'file')
+
+    def _snapshot_directories(self):
+        """mtime aller Verzeichnisse - ein stat pro Ordner, keine Dateizugriffe"""
+        snapshot = {}
+        stack = [self.root_path]
+        while stack and not self._stop.is_set():
+            directory = stack.pop()
+            try:
+                snapshot[directory] = os.stat(directory).st_mtime
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+        return snapshot
+
+    def _poll_loop(self):
+        previous = self._snapshot_directories()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot_directories()
+            if self._stop.is_set():
+                break
+            for directory, mtime in current.items():
+                if directory not in previous:
+                    self.queue_change(directory, 'tree')
+                elif previous[directory] != mtime:
+                    self.queue_change(directory, 'dir')
+            for directory in previous.keys() - current.keys():
+                self.queue_change(directory, 'tree')
+            previous = current
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(1.0)
+            self._wakeup.clear()
+            with self._lock:
+                if not self._pending:
+                    continue
+                now = time.time()
+                quiet = now - self._last_event >= WATCH_DEBOUNCE_SECONDS
+                overdue = now - self._first_event >= WATCH_MAX_DELAY_SECONDS
+                # Voll-Scan hat Vorrang - Änderungen bleiben bis danach vorgemerkt
+                if not (quiet or overdue) or getattr(root, '_scan_in_progress', False):
+                    continue
+                pending = self._pending
+                self._pending = {}
+            try:
+                self._apply_changes(pending)
+            except Exception as e:
+                print(f"Live-Update Fehler: {e}")
+
+    def _apply_changes(self, pending):
+        """Gleicht vorgemerkte Pfade mit der Datenbank ab"""
+        batch_size = 50
+        conn = get_read_connection()
+        # Getrenntes Laufwerk sieht aus wie "alles gelöscht" - Einträge nur offline markieren
+        volume_root = find_volume_root(conn, self.root_path) or self.root_path
+        online, reason = check_volume_root(conn, volume_root)
+        if not online:
+            flagged = db_writer.submit(set_volume_offline, volume_root, True).result()
+            if flagged:
+                print(f"Live-Update: Laufwerk nicht verbunden ({reason}) - {flagged} Einträge offline")
+            return
+        if db_writer.submit(set_volume_offline, volume_root, False).result():
+            print(f"Live-Update: Laufwerk {volume_root} wieder verbunden")
+
+        files_to_check = set()
+        deletions = set()
+
+        for path, kind in pending.items():
+            if kind == 'file':
+                files_to_check.add(path)
+                continue
+
+            # Ordner: aktuelle Dateien einlesen, verschwundene DB-Einträge entfernen
+            present = set()
+            if os.path.isdir(path):
+                if kind == 'tree':
+                    present = {record.path for record in walk_media_files(path, INDEX_MEDIA_EXTENSIONS, self._stop)}
+                else:
+                    try:
+                        with os.scandir(path) as entries:
+                            present = {entry.path for entry in entries
+                                       if entry.name.lower().endswith(INDEX_MEDIA_EXTENSIONS) and entry.is_file()}
+                    except OSError:
+                        continue
+            files_to_check.update(present)
+
+            under_path, path_params = path_prefix_filter(path)
+            for (filepath,) in conn.execute(f"SELECT filepath FROM media_files WHERE {under_path}", path_params):
+                if kind == 'dir' and os.path.dirname(filepath) != path:
+                    continue
+                if filepath not in present:
+                    deletions.add(filepath)
+
+        def write_rows(writer_conn, rows, changed_rows):
+            writer_conn.executemany(MEDIA_UPSERT_SQL, rows)
+            writer_conn.executemany(MEDIA_MARK_CHANGED_SQL, changed_rows)
+
+        # Nur Dateisystem-Daten schreiben - die Analyse übernimmt der EnrichmentService
+        rows = []
+        changed_rows = []
+        new_files = []
+        writes = []
+        updated = 0
+        for file_path in sorted(files_to_check):
+            if self._stop.is_set():
+                break
+            file_info = get_file_hash(file_path)
+            if file_info is None:
+                deletions.add(file_path)
+                continue
+            stored = conn.execute("SELECT file_hash FROM media_files WHERE filepath = ?", (file_path,)).fetchone()
+            if stored and stored[0] == file_info[0]:
+                continue
+            if stored:
+                changed_rows.append(file_info + (ENRICHMENT_PENDING, file_path))
+            else:
+                rows.append(build_filesystem_record(file_path, file_info)['row'])
+                new_files.append((file_path, file_info[1], file_info[2], file_info[3]))
+            if len(rows) + len(changed_rows) >= batch_size:
+                writes.append(db_writer.submit(write_rows, rows, changed_rows))
+                updated += len(rows) + len(changed_rows)
+                rows = []
+                changed_rows = []
+
+        if rows or changed_rows:
+            writes.append(db_writer.submit(write_rows, rows, changed_rows))
+            updated += len(rows) + len(changed_rows)
+
+        # Verschoben/umbenannt: alte Zeile übernehmen statt löschen + neu analysieren
+        moves = []
+        if deletions and new_files:
+            deletion_list = list(deletions)
+            vanished = []
+            for i in range(0, len(deletion_list), 500):
+                chunk = deletion_list[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                vanished += conn.execute(
+                    f"SELECT filepath, file_size, file_mtime, file_inode FROM media_files WHERE filepath IN ({placeholders})",
+                    chunk
+                ).fetchall()
+            moves = find_moved_files(vanished, new_files)
+            deletions.difference_update(old_path for old_path, _ in moves)
+
+        def apply_removals(writer_conn):
+            moved = relink_moved_files(writer_conn, moves) if moves else 0
+            deleted = 0
+            deletion_list = list(deletions)
+            for i in range(0, len(deletion_list), 500):
+                chunk = deletion_list[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                deleted += writer_conn.execute(f"DELETE FROM media_files WHERE filepath IN ({placeholders})",
+                                               chunk).rowcount
+            return moved, deleted
+
+        # Wartet zugleich auf die vorher übergebenen Zeilen (Reihenfolge des Writers)
+        moved, deleted = db_writer.submit(apply_removals).result()
+        for future in writes:
+            future.result()
+
+        if updated or deleted:
+            print(f"Live-Update: {updated} aktualisiert, {moved} verschoben, {deleted} entfernt")
+            schedule_fuzzy_index_refresh(throttled=True)
+        if updated:
+            enrichment_service.start()
+
+def stop_library_watcher():
+    global library_watcher
+    if library_watcher is not None:
+        library_watcher.stop()
+        library_watcher = None
+
+def restart_library_watcher():
+    """Startet die Überwachung für den aktuellen Bibliotheksordner neu (oder beendet sie)"""
+    global library_watcher
+    stop_library_watcher()
+    if not live_watch_var.get() or not folder_path or not os.path.isdir(folder_path):
+        return
+    if not os.path.exists('media_index.db'):
+        return
+    library_watcher = LibraryWatcher(
+        folder_path, config.getint('Scan', 'watch_poll_interval', fallback=DEFAULT_WATCH_POLL_INTERVAL)
+    )
+    library_watcher.start()
+
 def get_enhanced_collection_statistics():
     """
     KORRIGIERT: Verwendet tatsächliche Metadaten aus Datenbank
     """
     try:
-        conn = sqlite3.connect('media_index.db')
-        cursor = conn.cursor()
+        cursor = get_read_connection().cursor()
         
         # === KATEGORIE-EBENE (Hauptebene) ===
         cursor.execute("""
@@ -2547,8 +6501,6 @@ def get_enhanced_collection_statistics():
         paths_and_files = cursor.fetchall()
         hierarchy = analyze_enhanced_path_hierarchy(paths_and_files)
         
-        conn.close()
-        
         return {
             'total_files': total_files,
             'total_duration': total_duration,
@@ -2574,91 +6526,95 @@ def get_enhanced_collection_statistics():
         traceback.print_exc()
         return None
 
-def get_video_quality_info(file_path):
+def extract_video_quality(probe):
     """
-    Extrahiert Video-Qualitätsinformationen
+    Extrahiert Video-Qualitätsinformationen aus einem ffprobe-Ergebnis (reine Funktion)
     KORRIGIERT: Ignoriert MJPEG Cover-Art Streams
     """
-    try:
-        metadata = ffprobe_file(file_path)
-        
-        video_info = {
-            'video_codec': '',
-            'resolution': '',
-            'fps': 0.0,
-            'bitrate': 0,
-            'audio_codec': '',
-            'audio_channels': 0,
-            'sample_rate': 0
-        }
-        
-        # KRITISCH: Finde echten Video-Stream (nicht Cover-Art)
-        video_stream = None
-        audio_stream = None
+    video_info = {
+        'video_codec': '',
+        'resolution': '',
+        'fps': 0.0,
+        'bitrate': 0,
+        'audio_codec': '',
+        'audio_channels': 0,
+        'sample_rate': 0
+    }
+    
+    # KRITISCH: Finde echten Video-Stream (nicht Cover-Art)
+    video_stream = None
+    audio_stream = None
+    
+    for stream in probe.get('streams', []):
+        codec_type = stream.get('codec_type')
         
-        for stream in metadata.get('streams', []):
-            codec_type = stream.get('codec_type')
+        if codec_type == 'video':
+            codec_name = stream.get('codec_name', '').lower()
+            disposition = stream.get('disposition', {})
             
-            if codec_type == 'video':
-                codec_name = stream.get('codec_name', '').lower()
-                disposition = stream.get('disposition', {})
-                
-                # FILTER: Überspringe MJPEG Cover-Art
-                if codec_name == 'mjpeg' and disposition.get('attached_pic') == 1:
-                    continue
-                
-                # FILTER: Überspringe sehr kleine Auflösungen (wahrscheinlich Thumbnails)
-                width = stream.get('width', 0)
-                height = stream.get('height', 0)
-                if width > 0 and height > 0 and (width < 640 or height < 360):
-                    # Behalte als Fallback, falls kein besserer Stream existiert
-                    if video_stream is None:
-                        video_stream = stream
-                    continue
-                
-                # Primärer Video-Stream gefunden
-                video_stream = stream
-                break  # Nimm ersten echten Video-Stream
-                
-            elif codec_type == 'audio' and audio_stream is None:
-                audio_stream = stream
-        
-        # Video-Informationen extrahieren
-        if video_stream:
-            video_info['video_codec'] = video_stream.get('codec_name', '')
+            # FILTER: Überspringe MJPEG Cover-Art
+            if codec_name == 'mjpeg' and disposition.get('attached_pic') == 1:
+                continue
             
-            width = video_stream.get('width', 0)
-            height = video_stream.get('height', 0)
-            if width and height:
-                video_info['resolution'] = f"{width}x{height}"
+            # FILTER: Überspringe sehr kleine Auflösungen (wahrscheinlich Thumbnails)
+            width = stream.get('width', 0)
+            height = stream.get('height', 0)
+            if width > 0 and height > 0 and (width < 640 or height < 360):
+                # Behalte als Fallback, falls kein besserer Stream existiert
+                if video_stream is None:
+                    video_stream = stream
+                continue
             
-            # FPS berechnen
-            fps_str = video_stream.get('r_frame_rate', '0/1')
-            try:
-                num, den = fps_str.split('/')
-                if int(den) > 0:
-                    video_info['fps'] = round(int(num) / int(den), 2)
-            except:
-                pass
+            # Primärer Video-Stream gefunden
+            video_stream = stream
+            break  # Nimm ersten echten Video-Stream
             
-            # Video-Bitrate
-            bitrate = video_stream.get('bit_rate')
-            if bitrate:
-                video_info['bitrate'] = int(bitrate)
+        elif codec_type == 'audio' and audio_stream is None:
+            audio_stream = stream
+    
+    # Video-Informationen extrahieren
+    if video_stream:
+        video_info['video_codec'] = video_stream.get('codec_name', '')
         
-        # Audio-Informationen
-        if audio_stream:
-            video_info['audio_codec'] = audio_stream.get('codec_name', '')
-            video_info['audio_channels'] = audio_stream.get('channels', 0)
-            video_info['sample_rate'] = audio_stream.get('sample_rate', 0)
+        width = video_stream.get('width', 0)
+        height = video_stream.get('height', 0)
+        if width and height:
+            video_info['resolution'] = f"{width}x{height}"
         
-        # Fallback: Format-Bitrate wenn Stream-Bitrate fehlt
-        if video_info['bitrate'] == 0:
-            format_bitrate = metadata.get('format', {}).get('bit_rate')
-            if format_bitrate:
-                video_info['bitrate'] = int(format_bitrate)
+        # FPS berechnen
+        fps_str = video_stream.get('r_frame_rate', '0/1')
+        try:
+            num, den = fps_str.split('/')
+            if int(den) > 0:
+                video_info['fps'] = round(int(num) / int(den), 2)
+        except:
+            pass
         
-        return video_info
+        # Video-Bitrate
+        bitrate = video_stream.get('bit_rate')
+        if bitrate:
+            video_info['bitrate'] = int(bitrate)
+    
+    # Audio-Informationen
+    if audio_stream:
+        video_info['audio_codec'] = audio_stream.get('codec_name', '')
+        video_info['audio_channels'] = audio_stream.get('channels', 0)
+        video_info['sample_rate'] = audio_stream.get('sample_rate', 0)
+    
+    # Fallback: Format-Bitrate wenn Stream-Bitrate fehlt
+    if video_info['bitrate'] == 0:
+        format_bitrate = probe.get('format', {}).get('bit_rate')
+        if format_bitrate:
+            video_info['bitrate'] = int(format_bitrate)
+    
+    return video_info
+
+def get_video_quality_info(file_path, probe=None):
+    """Extrahiert Video-Qualitätsinformationen (ein ffprobe-Aufruf oder vorhandenes Ergebnis)"""
+    try:
+        if probe is None:
+            probe = probe_media_headers(file_path)
+        return extract_video_quality(probe)
         
     except Exception as e:
         print(f"Fehler bei Video-Qualitätsanalyse für {file_path}: {e}")
@@ -2673,34 +6629,8 @@ def get_video_quality_info(file_path):
         }
 
 def get_audio_quality_info(file_path):
-    """Extrahiert Audio-Qualitätsinformationen"""
-    try:
-        audio = MP3(file_path)
-        
-        audio_info = {
-            'bitrate': 0,
-            'sample_rate': 0,
-            'audio_channels': 0,
-            'audio_codec': 'mp3'
-        }
-        
-        if hasattr(audio.info, 'bitrate'):
-            audio_info['bitrate'] = audio.info.bitrate
-        if hasattr(audio.info, 'sample_rate'):
-            audio_info['sample_rate'] = audio.info.sample_rate
-        if hasattr(audio.info, 'channels'):
-            audio_info['audio_channels'] = audio.info.channels
-            
-        return audio_info
-        
-    except Exception as e:
-        print(f"Fehler bei Audio-Qualitätsanalyse für {file_path}: {e}")
-        return {
-            'bitrate': 0,
-            'sample_rate': 0,
-            'audio_channels': 0,
-            'audio_codec': 'mp3'
-        }
+    """Extrahiert Audio-Qualitätsinformationen (gemeinsamer Lesevorgang mit den Tags)"""
+    return get_audio_record(file_path)['quality']
 
 def test_single_file_duration():
     """Test-Funktion für einzelne Datei-Laufzeit"""
@@ -2738,13 +6668,11 @@ def test_single_file_duration():
     
     # Test 3: ffprobe direkt
     try:
-        result = subprocess.run(
-            [ffprobe_path, '-v', 'error', '-show_entries', 'format=duration', 
-             '-of', 'default=noprint_wrappers=1:nokey=1', test_file],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
-            creationflags=subprocess.CREATE_NO_WINDOW, timeout=30
-        )
-        duration3 = result.stdout.strip()
+        result = run_tool('ffprobe', [
+            ffprobe_path, '-v', 'error', '-show_entries', 'format=duration',
+            '-of', 'default=noprint_wrappers=1:nokey=1', test_file
+        ])
+        duration3 = result.stdout.decode('utf-8', errors='replace').strip()
         result_text += f"ffprobe direkt: '{duration3}'\n"
     except Exception as e:
         result_text += f"ffprobe direkt: FEHLER - {e}\n"
@@ -2777,17 +6705,25 @@ def play_tts_message():
     tts_thread = threading.Thread(target=tts_worker, daemon=True)
     tts_thread.start()
 
-def get_media_metadata_hidden(file_path):
-    metadata = ffprobe_file(file_path)
-    format_info = metadata.get('format', {})
-
-    genre = format_info.get('tags', {}).get('genre', '')  
-    actors = format_info.get('tags', {}).get('artist', '')  
-    comment = format_info.get('tags', {}).get('comment', '')
-    year = format_info.get('tags', {}).get('date', '')
+def extract_video_tags(probe):
+    """Liest genre/artist/comment/date aus den Format-Tags eines ffprobe-Ergebnisses (reine Funktion)"""
+    tags = probe.get('format', {}).get('tags', {})
+    
+    genre = tags.get('genre', '')
+    actors = tags.get('artist', '')
+    comment = tags.get('comment', '')
+    year = tags.get('date', '')
+    
+    return genre, actors, comment, year
 
+def get_media_metadata_hidden(file_path, probe=None):
+    if probe is None:
+        probe = probe_media_headers_for_display(file_path)
+    
+    genre, actors, comment, year = extract_video_tags(probe)
+    
     print(f"Extracted metadata for {file_path}: genre={genre}, actors={actors}, comment={comment}, year={year}")
-
+    
     return genre, actors, comment, year
 
 def toggle_search_options():
@@ -2843,8 +6779,7 @@ def test_database_search():
     Kann in Debug-Mode zu Settings hinzugefügt werden
     """
     try:
-        conn = sqlite3.connect('media_index.db')
-        cursor = conn.cursor()
+        cursor = get_read_connection().cursor()
         
         # Basis-Statistiken
         cursor.execute("SELECT COUNT(*) FROM media_files")
@@ -2860,8 +6795,6 @@ def test_database_search():
         cursor.execute("SELECT filename, genre, actors, album FROM media_files LIMIT 5")
         samples = cursor.fetchall()
         
-        conn.close()
-        
         # Zeige Ergebnisse
         debug_info = f"""DATENBANK-TEST
         
@@ -2896,7 +6829,7 @@ def debug_video_metadata():
         return
         
     video_extensions = ('.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv')
-    audio_extensions = ('.mp3',)
+    audio_extensions = AUDIO_EXTENSIONS
     
     with open(debug_file_path, 'w', encoding='utf-8') as debug_file:
         debug_file.write("=== METADATA DEBUG REPORT MIT NEUER PFAD-KLASSIFIZIERUNG ===\n")
@@ -2969,7 +6902,7 @@ def debug_video_metadata():
                     debug_file.write(f"Pfad-Genre: '{path_meta.get('genre', '')}'\n")
                     
                     # MP3 Metadaten
-                    album, track, year, genre, contributors, length = get_mp3_metadata_with_timeout(file_path)
+                    album, track, year, genre, contributors, length = get_audio_metadata(file_path)
                     debug_file.write(f"MP3 Album: '{album}'\n")
                     debug_file.write(f"MP3 Track: '{track}'\n")
                     debug_file.write(f"MP3 Year: '{year}'\n")
@@ -3016,8 +6949,7 @@ def get_collection_statistics():
     KORRIGIERT: Dynamische Genre-Statistik ohne statische Kategorien
     """
     try:
-        conn = sqlite3.connect('media_index.db')
-        cursor = conn.cursor()
+        cursor = get_read_connection().cursor()
         
         cursor.execute("SELECT COUNT(*) FROM media_files")
         total_files = cursor.fetchone()[0]
@@ -3106,7 +7038,7 @@ def get_collection_statistics():
         cursor.execute("""
             SELECT 
                 CASE 
-                    WHEN LOWER(filepath) LIKE '%.mp3' THEN 'Audio'
+                    WHEN LOWER(filepath) LIKE '%.mp3' OR LOWER(filepath) LIKE '%.flac' OR LOWER(filepath) LIKE '%.m4a' OR LOWER(filepath) LIKE '%.aac' OR LOWER(filepath) LIKE '%.ogg' OR LOWER(filepath) LIKE '%.oga' OR LOWER(filepath) LIKE '%.opus' OR LOWER(filepath) LIKE '%.wav' THEN 'Audio'
                     WHEN LOWER(filepath) LIKE '%.mp4' OR LOWER(filepath) LIKE '%.mkv' OR LOWER(filepath) LIKE '%.avi' OR LOWER(filepath) LIKE '%.mov' OR LOWER(filepath) LIKE '%.wmv' OR LOWER(filepath) LIKE '%.flv' THEN 'Video'
                     ELSE 'Andere'
                 END as media_type,
@@ -3139,8 +7071,6 @@ def get_collection_statistics():
         paths_and_files = cursor.fetchall()
         hierarchy = analyze_enhanced_path_hierarchy(paths_and_files)
         
-        conn.close()
-        
         return {
             'total_files': total_files,
             'total_duration': total_duration,
@@ -3331,11 +7261,9 @@ def create_analytics_window():
         notebook.add(hierarchy_frame, text="🗂️ Ordnerstruktur")
         
         # Alte Hierarchie-Daten holen
-        conn = sqlite3.connect('media_index.db')
-        cursor = conn.cursor()
+        cursor = get_read_connection().cursor()
         cursor.execute("SELECT filepath, filename FROM media_files")
         paths_and_files = cursor.fetchall()
-        conn.close()
         hierarchy = analyze_enhanced_path_hierarchy(paths_and_files)
         
         old_stats = {'hierarchy': hierarchy, 'total_files': stats['total_files']}
@@ -3514,8 +7442,7 @@ def create_quality_maintenance_tab(parent, stats):
 
     # Berechne fehlende Metadaten pro Kategorie
     try:
-        conn = sqlite3.connect('media_index.db')
-        cursor = conn.cursor()
+        cursor = get_read_connection().cursor()
         
         header_text = "METADATEN-VOLLSTÄNDIGKEIT PRO KATEGORIE:\n" + "="*60 + "\n\n"
         insert_text_utf8(missing_text, header_text)
@@ -3542,8 +7469,6 @@ def create_quality_maintenance_tab(parent, stats):
                 
                 insert_text_utf8(missing_text, category_info)
         
-        conn.close()
-        
         footer_text = "="*60 + "\n"
         footer_text += "EMPFEHLUNG:\n"
         footer_text += "• Dateien mit fehlenden Metadaten sollten nachbearbeitet werden\n"
@@ -3557,6 +7482,39 @@ def create_quality_maintenance_tab(parent, stats):
 
     missing_text.config(state=tk.DISABLED)
     
+    # Tab 4: Quarantäne (Dateien mit wiederholten ffprobe/ffmpeg-Timeouts oder -Abstürzen)
+    quarantine_frame = ttk.Frame(details_notebook)
+    quarantine_entries = get_quarantine_entries()
+    details_notebook.add(quarantine_frame, text=f"Quarantäne ({len(quarantine_entries)})")
+    
+    quarantine_text = tk.Text(quarantine_frame, height=10, font=('Arial', 9))
+    quarantine_scroll = tk.Scrollbar(quarantine_frame, orient=tk.VERTICAL, command=quarantine_text.yview)
+    quarantine_text.configure(yscrollcommand=quarantine_scroll.set)
+    
+    def release_quarantine():
+        clear_quarantine()
+        quarantine_text.config(state=tk.NORMAL)
+        quarantine_text.delete('1.0', tk.END)
+        insert_text_utf8(quarantine_text, "Quarantäne aufgehoben - betroffene Dateien werden im Hintergrund erneut analysiert.\n")
+        quarantine_text.config(state=tk.DISABLED)
+        details_notebook.tab(quarantine_frame, text="Quarantäne (0)")
+    
+    tk.Button(quarantine_frame, text="Quarantäne aufheben", command=release_quarantine).pack(side='bottom', pady=5)
+    quarantine_text.pack(side='left', fill='both', expand=True, padx=5, pady=5)
+    quarantine_scroll.pack(side='right', fill='y', pady=5)
+    
+    if quarantine_entries:
+        insert_text_utf8(quarantine_text, "DATEIEN IN QUARANTÄNE (werden beim Scan übersprungen):\n" + "="*60 + "\n\n")
+        for filepath, failures, tool, last_error, last_failure in quarantine_entries:
+            insert_text_utf8(quarantine_text,
+                             f"{os.path.basename(filepath)}\n"
+                             f"  Pfad: {filepath}\n"
+                             f"  {failures}x {tool}: {last_error} (zuletzt {last_failure})\n\n")
+    else:
+        insert_text_utf8(quarantine_text, "Keine Dateien in Quarantäne.\n")
+    
+    quarantine_text.config(state=tk.DISABLED)
+    
     # === WARTUNGS-EMPFEHLUNGEN ===
     maintenance_frame = tk.LabelFrame(paned, text="Wartungs-Empfehlungen", font=('Arial', 12, 'bold'))
     paned.add(maintenance_frame, weight=1)
@@ -4637,6 +8595,10 @@ MEDIENTYPEN DETAILS:"""
             '.flac': ('Audio', 'Free Lossless Audio Codec'),
             '.wav': ('Audio', 'Waveform Audio'),
             '.m4a': ('Audio', 'MPEG-4 Audio'),
+            '.aac': ('Audio', 'Advanced Audio Coding'),
+            '.ogg': ('Audio', 'Ogg Vorbis'),
+            '.oga': ('Audio', 'Ogg Audio'),
+            '.opus': ('Audio', 'Opus Audio'),
             '.xspf': ('Playlist', 'XML Shareable Playlist')
         }
         
@@ -4653,7 +8615,7 @@ MEDIENTYPEN DETAILS:"""
         video_formats = sum(count for ext, count in stats['file_extensions'].items() 
                            if ext.lower() in ['.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv'])
         audio_formats = sum(count for ext, count in stats['file_extensions'].items() 
-                           if ext.lower() in ['.mp3', '.flac', '.wav', '.m4a'])
+                           if ext.lower() in AUDIO_EXTENSIONS)
         
         details_text.insert(tk.END, f"• Video-Dateien: {video_formats} ({(video_formats/stats['total_files']*100):5.1f}%)\n")
         details_text.insert(tk.END, f"• Audio-Dateien: {audio_formats} ({(audio_formats/stats['total_files']*100):5.1f}%)\n")
@@ -4700,8 +8662,7 @@ MEDIENTYPEN DETAILS:"""
                     used_gb = disk_usage.used / (1024**3)
                     free_gb = disk_usage.free / (1024**3)
                     
-                    conn = sqlite3.connect('media_index.db')
-                    cursor = conn.cursor()
+                    cursor = get_read_connection().cursor()
                     
                     cursor.execute("SELECT filepath FROM media_files")
                     all_files = cursor.fetchall()
@@ -4724,8 +8685,6 @@ MEDIENTYPEN DETAILS:"""
                         except Exception as e:
                             print(f"Fehler bei Dateigröße für {filepath}: {e}")
                     
-                    conn.close()
-                    
                     category_sizes_gb = {k: v/(1024**3) for k, v in category_sizes.items()}
                     
                     # Rest der Chart-Erstellung...
@@ -5124,7 +9083,7 @@ def open_settings():
 
     settings_window = tk.Toplevel(root)
     settings_window.title("Benutzer Einstellungen")
-    settings_window.geometry("400x650")  # Höhe erhöht
+    settings_window.geometry("400x765")  # Höhe erhöht
 
     tk.Label(settings_window, text="Datenbank-Verwaltung", 
              font=('Arial', 12, 'bold')).pack(pady=(10, 5))
@@ -5135,6 +9094,16 @@ def open_settings():
     tk.Button(settings_window, text="🔄 Synchronize Drive & Database", 
               command=train_db_with_progress, bg='lightgreen').pack(pady=5)
     
+    tk.Button(settings_window, text="🗑️ Analyse-Cache leeren", 
+              command=clear_probe_cache).pack(pady=5)
+    
+    tk.Button(settings_window, text="📦 Bibliothek umhängen (Laufwerk gewechselt)", 
+              command=relocate_library_root_dialog).pack(pady=5)
+    
+    tk.Checkbutton(settings_window, 
+                   text="Live-Überwachung (Index bei Änderungen aktualisieren)", 
+                   variable=live_watch_var).pack(pady=2)
+    
     # NEU: Genre-Normalisierung
     tk.Button(settings_window, text="🏷️ Genre-Normalisierung", 
               command=normalize_all_genres_in_database, bg='lightyellow').pack(pady=5)
@@ -5195,6 +9164,10 @@ def open_settings():
                                         variable=interpret_search_var, state=tk.DISABLED)
     interpret_checkbox.pack(pady=2)
 
+    tk.Checkbutton(settings_window, 
+                   text="Fehlertolerante Suche (findet auch Tippfehler)", 
+                   variable=fuzzy_search_var).pack(pady=2)
+
     toggle_search_options()
 
     save_button = tk.Button(settings_window, text="Speichern", command=save_settings)
@@ -5230,8 +9203,7 @@ def test_path_normalization():
     
     # Teste mit Datenbank
     try:
-        conn = sqlite3.connect('media_index.db')
-        cursor = conn.cursor()
+        cursor = get_read_connection().cursor()
         
         results += "\nDATENBANK-TEST:\n"
         
@@ -5248,8 +9220,6 @@ def test_path_normalization():
             results += f"\nPfad: {path}\n"
             results += f"Treffer: {count:,}\n"
         
-        conn.close()
-        
     except Exception as e:
         results += f"\nDatenbank-Fehler: {e}\n"
     
@@ -5279,6 +9249,35 @@ def on_closing():
         except:
             pass
         
+        # 1a. Live-Überwachung und Hintergrund-Analyse beenden
+        try:
+            stop_library_watcher()
+        except:
+            pass
+        try:
+            enrichment_service.stop(timeout=5)
+        except:
+            pass
+        
+        # 1b. Laufenden Scan anhalten - Writer schreibt den offenen Batch noch weg
+        try:
+            tool_supervisor.kill_all()
+            if getattr(root, '_scan_stop_event', None):
+                root._scan_stop_event.set()
+            scan_thread = getattr(root, '_scan_thread', None)
+            if scan_thread and scan_thread.is_alive():
+                print("Warte auf Scan-Checkpoint...")
+                scan_thread.join(timeout=10)
+        except:
+            pass
+        
+        # 1c. Offene Schreibaufträge committen, Lese-Verbindungen schließen
+        try:
+            db_writer.stop(timeout=10)
+            close_read_connections()
+        except:
+            pass
+        
         # 2. Alle Fenster schließen
         try:
             for window in root.winfo_children():
@@ -5597,11 +9596,14 @@ def save_settings():
         'use_comment': str(comment_var.get()),
         'use_album_search': str(album_search_var.get()),
         'use_interpret_search': str(interpret_search_var.get()),
+        'live_watch': str(live_watch_var.get()),
+        'fuzzy_search': str(fuzzy_search_var.get()),
         'debug_mode': 'False'
     }
     with open('MediaIndexer.cfg', 'w') as configfile:
         config.write(configfile)
     print("Einstellungen gespeichert")
+    restart_library_watcher()
 
 def load_settings():
     if 'Settings' in config:
@@ -5612,6 +9614,8 @@ def load_settings():
         comment_var.set(config.getboolean('Settings', 'use_comment', fallback=False))
         album_search_var.set(config.getboolean('Settings', 'use_album_search', fallback=False))
         interpret_search_var.set(config.getboolean('Settings', 'use_interpret_search', fallback=False))
+        live_watch_var.set(config.getboolean('Settings', 'live_watch', fallback=False))
+        fuzzy_search_var.set(config.getboolean('Settings', 'fuzzy_search', fallback=False))
 
 # GUI Setup
 root.title("Media Indexer and Player")
@@ -5638,6 +9642,14 @@ search_button.grid(row=0, column=2, padx=5, pady=5)
 settings_button = tk.Button(frame, text="Benutzer Einstellungen", command=open_settings)
 settings_button.grid(row=0, column=3, padx=5, pady=5)
 
+enrichment_label = tk.Label(frame, text="", font=('Arial', 9), fg='gray40', anchor='w')
+enrichment_label.grid(row=1, column=0, columnspan=4, padx=5, sticky='w')
+
+suggestion_label = tk.Label(frame, text="", font=('Arial', 9, 'underline'), fg='blue', cursor='hand2', anchor='w')
+suggestion_label.grid(row=2, column=1, columnspan=3, padx=5, sticky='w')
+suggestion_label.bind('<Button-1>', apply_search_suggestion)
+suggestion_label.grid_remove()
+
 paned_window = ttk.Panedwindow(root, orient=tk.VERTICAL)
 paned_window.pack(expand=True, fill='both')
 
@@ -5724,6 +9736,9 @@ def periodic_cleanup():
             # Clear Pfad-Cache
             clear_path_classification_cache()
             
+            # Wechselmedien/Netzlaufwerke: offline-Markierung aktualisieren
+            threading.Thread(target=refresh_volume_status, daemon=True, name='volume-check').start()
+            
             # Nächsten Cleanup planen
             root.after(300000, periodic_cleanup)  # 5 Minuten
     except:
@@ -5757,6 +9772,10 @@ if __name__ == '__main__':
         load_last_directory()
         load_settings()
         
+        # Datenbank-Migration vor dem ersten Lesezugriff (kann nach Updates dauern)
+        print("Prüfe Datenbank...")
+        prepare_database()
+        
         # Fenster sichtbar machen
         root.deiconify()
         
@@ -5766,6 +9785,16 @@ if __name__ == '__main__':
         # Regelmäßigen Cleanup starten
         root.after(60000, periodic_cleanup)  # Starte nach 1 Minute
         
+        # Live-Überwachung (falls aktiviert)
+        root.after(2000, restart_library_watcher)
+        
+        # Laufwerks-Status prüfen (Netzlaufwerke können träge sein - im Thread)
+        threading.Thread(target=refresh_volume_status, daemon=True, name='volume-check').start()
+        
+        # Hintergrund-Analyse: offene Einträge vom letzten Lauf fortsetzen
+        root.after(3000, enrichment_service.start)
+        root.after(1000, update_enrichment_label)
+        
         print("Starte GUI-Hauptschleife...")
         root.mainloop()
         